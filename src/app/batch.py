@@ -0,0 +1,212 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import statistics
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dependency_index import DependencyIndex
+from dependency_sheet import read_dependency_sheet
+from publication_schedule import allocate_dates_with_csp, filter_documents, select_publication_stages
+
+# Publication schedules of many projects at once, without the page. The manifest lists
+# the projects, each with its dependency sheet, stage dates, holidays and the document
+# groups it publishes; holidays given at the top apply to every project:
+#
+#   {"holidays": ["2023-03-01"],
+#    "projects": [{"name": "FW-A", "sheet": "resource/문서의존성.xlsx",
+#                  "spec": "2023-03-06", "design": "2023-03-13", "impl": "2023-03-20", "end": "2023-03-31",
+#                  "holidays": [], "safety_analysis": true, "cyber_security": false}]}
+#
+#   python src/app/batch.py manifest.json --output schedules.parquet --summary summary.json
+#
+# Projects are solved in --workers processes. Every schedule is written as soon as its
+# project finishes, one row per document, to Parquet (one row group per project) or CSV,
+# as the output's suffix says. Sheet paths are relative to the manifest.
+
+
+class Project(NamedTuple):
+    name: str
+    sheet: str
+    spec: datetime.date
+    design: datetime.date
+    impl: datetime.date
+    end: datetime.date
+    holidays: Tuple[str, ...]
+    safety_analysis: bool
+    cyber_security: bool
+
+
+# Manifest keys of the stage dates, as build_publication_csp takes them
+STAGES = ["spec", "design", "impl", "end"]
+
+
+def read_manifest(path: str) -> List[Project]:
+    with open(path, encoding="utf-8") as stored:
+        manifest = json.load(stored)
+    directory = os.path.dirname(os.path.abspath(path))
+    shared = tuple(manifest.get("holidays", []))
+    projects: List[Project] = []
+    for entry in manifest["projects"]:
+        name = entry.get("name")
+        if not name or any(project.name == name for project in projects):
+            raise ValueError(f"프로젝트 이름이 없거나 중복되었습니다: {name!r}")
+        try:
+            spec, design, impl, end = (datetime.date.fromisoformat(entry[key]) for key in STAGES)
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"{name}: 단계별 발행일을 읽을 수 없습니다 ({error})") from None
+        projects.append(
+            Project(
+                name,
+                os.path.join(directory, entry["sheet"]),
+                spec,
+                design,
+                impl,
+                end,
+                shared + tuple(entry.get("holidays", [])),
+                entry.get("safety_analysis", True),
+                entry.get("cyber_security", True),
+            )
+        )
+    return projects
+
+
+# The schedule of one project and how it went; runs in a worker process, so any error
+# is reported in the outcome rather than raised.
+def solve_project(project: Project) -> Dict[str, Any]:
+    started = perf_counter()
+    outcome: Dict[str, Any] = {"project": project.name, "documents": 0, "error": "", "schedule": None}
+    try:
+        df = filter_documents(read_dependency_sheet(project.sheet), project.safety_analysis, project.cyber_security)
+        documents, dependencies = select_publication_stages(df, None)
+        index = DependencyIndex(documents, dependencies)
+        outcome["documents"] = len(index.order)
+        outcome["schedule"] = allocate_dates_with_csp(
+            project.spec,
+            project.design,
+            project.impl,
+            project.end,
+            project.holidays,
+            index.order,
+            index.reduction,
+        )
+        outcome["status"] = "solved" if outcome["schedule"] is not None else "unsatisfied"
+    except Exception as error:
+        outcome["status"] = "failed"
+        outcome["error"] = f"{type(error).__name__}: {error}"
+    outcome["seconds"] = perf_counter() - started
+    return outcome
+
+
+# Outcomes in the order the projects finish. With one worker the projects are solved in
+# this process, in manifest order.
+def solve_projects(projects: List[Project], workers: int = 1) -> Iterator[Dict[str, Any]]:
+    if workers <= 1 or not projects:
+        for project in projects:
+            yield solve_project(project)
+        return
+    with ProcessPoolExecutor(min(workers, len(projects))) as executor:
+        pending: Dict[Future, Project] = {executor.submit(solve_project, project): project for project in projects}
+        for future in as_completed(pending):
+            try:
+                yield future.result()
+            except Exception as error:  # the worker died: the pool is broken for the rest too
+                yield {
+                    "project": pending[future].name,
+                    "status": "failed",
+                    "documents": 0,
+                    "error": f"{type(error).__name__}: {error}",
+                    "schedule": None,
+                    "seconds": 0.0,
+                }
+
+
+SCHEMA = pa.schema([("project", pa.string()), ("document", pa.string()), ("date", pa.date32())])
+
+
+# Schedule rows of every project, written and flushed one project at a time.
+class ScheduleWriter:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        if self.parquet:
+            self.writer = pq.ParquetWriter(path, SCHEMA)
+        else:
+            self.file = open(path, "w", encoding="utf-8-sig", newline="")
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(SCHEMA.names)
+
+    def write(self, project: str, schedule: Dict[str, datetime.date]) -> None:
+        if self.parquet:
+            columns = [[project] * len(schedule), list(schedule), list(schedule.values())]
+            self.writer.write_table(pa.Table.from_arrays(columns, schema=SCHEMA))
+        else:
+            self.csv.writerows((project, document, day.isoformat()) for document, day in schedule.items())
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.parquet:
+            self.writer.close()
+        else:
+            self.file.close()
+
+
+# Counts by status and solve times, over the outcomes without their schedules
+def summarize(outcomes: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    seconds = [outcome["seconds"] for outcome in outcomes]
+    return {
+        "projects": len(outcomes),
+        "solved": sum(outcome["status"] == "solved" for outcome in outcomes),
+        "unsatisfied": sum(outcome["status"] == "unsatisfied" for outcome in outcomes),
+        "failed": sum(outcome["status"] == "failed" for outcome in outcomes),
+        "wall": wall,
+        "median_seconds": statistics.median(seconds) if seconds else 0.0,
+        "max_seconds": max(seconds, default=0.0),
+        "results": outcomes,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Publication schedules of the projects in a manifest")
+    parser.add_argument("manifest")
+    parser.add_argument("--output", default="schedules.parquet", help="a .parquet or .csv file")
+    parser.add_argument("--summary", help="also write the summary to this JSON file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    projects = read_manifest(args.manifest)
+    started = perf_counter()
+    outcomes: List[Dict[str, Any]] = []
+    writer = ScheduleWriter(args.output)
+    try:
+        for outcome in solve_projects(projects, args.workers):
+            schedule = outcome.pop("schedule")
+            if schedule is not None:
+                writer.write(outcome["project"], schedule)
+            outcomes.append(outcome)
+            detail = outcome["error"] or f"{outcome['documents']} documents"
+            print(f"{outcome['project']}: {outcome['status']} in {outcome['seconds']:.2f}s ({detail})")
+    finally:
+        writer.close()
+
+    summary = summarize(outcomes, perf_counter() - started)
+    print(
+        f"{summary['solved']}/{summary['projects']} solved, {summary['unsatisfied']} unsatisfied, "
+        f"{summary['failed']} failed in {summary['wall']:.2f}s "
+        f"(median {summary['median_seconds']:.2f}s, max {summary['max_seconds']:.2f}s per project)"
+    )
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as output:
+            json.dump(summary, output, ensure_ascii=False, indent=2)
+    return 0 if summary["solved"] == summary["projects"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import argparse
+import datetime
+import json
+import platform
+import random
+import string
+import sys
+import tracemalloc
+from functools import partial
+from time import perf_counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from compiled_csp import CompiledCSP
+from csp import CSP, SolverStats, forward_checking, mac, mrv_degree
+from date_generation import PublicationDependencyConstraint, date_range
+from map_coloring import MapColoringConstraint
+from queens import queens_csp
+from word_search import Placement, WordSearchConstraint, generate_domain
+
+# Benchmarks of the solvers on the four example problems at growing sizes. Every
+# instance is generated from a fixed seed, so two runs solve the same problems and
+# their results can be compared:
+#
+#   python src/app/benchmark.py --output benchmark.json
+#   python src/app/benchmark.py --output new.json --baseline benchmark.json
+#
+# Each case enumerates up to --solutions solutions; wall time is the best of --repeat
+# runs, not counting the construction of the problem, and peak memory is measured on a
+# separate run, since tracing slows the search down.
+
+
+class Case(NamedTuple):
+    name: str
+    params: Dict[str, int]
+    build: Callable[[], CSP]
+    solver: str
+
+
+# Solver configurations by name; each enumerates up to `limit` solutions of the problem
+# and returns the statistics of the run. Min-conflicts stops at the first solution.
+def _compiled(csp: CSP, limit: int) -> SolverStats:
+    compiled = CompiledCSP(csp)
+    compiled.count_solutions(limit=limit)
+    return compiled.stats
+
+
+def _min_conflicts(csp: CSP, limit: int) -> SolverStats:
+    csp.min_conflicts(seed=1)
+    return csp.stats
+
+
+def _backtracking(**options: Any) -> Callable[[CSP, int], SolverStats]:
+    def solve(csp: CSP, limit: int) -> SolverStats:
+        csp.count_solutions(select_variable=mrv_degree, limit=limit, **options)
+        return csp.stats
+
+    return solve
+
+
+SOLVERS: Dict[str, Callable[[CSP, int], SolverStats]] = {
+    "backtracking": _backtracking(inference=forward_checking),
+    "mac": _backtracking(inference=mac),
+    "backjumping": _backtracking(inference=forward_checking, backjumping=True),
+    "min_conflicts": _min_conflicts,
+    "compiled": _compiled,
+}
+
+
+def planar_map(regions: int, seed: int) -> CSP[int, int]:
+    # Grid of regions with one random diagonal per cell: a triangulated, hence planar, map
+    rng = random.Random(seed)
+    width = max(2, int(regions**0.5))
+    height = max(2, regions // width)
+    cells = list(range(width * height))
+    csp: CSP[int, int] = CSP(cells, {cell: [0, 1, 2, 3] for cell in cells})
+    for row in range(height):
+        for column in range(width):
+            cell = row * width + column
+            if column + 1 < width:
+                csp.add_constraint(MapColoringConstraint(cell, cell + 1))  # type: ignore[arg-type]
+            if row + 1 < height:
+                csp.add_constraint(MapColoringConstraint(cell, cell + width))  # type: ignore[arg-type]
+            if column + 1 < width and row + 1 < height:
+                if rng.random() < 0.5:
+                    csp.add_constraint(MapColoringConstraint(cell, cell + width + 1))  # type: ignore[arg-type]
+                else:
+                    csp.add_constraint(MapColoringConstraint(cell + 1, cell + width))  # type: ignore[arg-type]
+    return csp
+
+
+def word_search(size: int, words: int, seed: int) -> CSP[str, Placement]:
+    rng = random.Random(seed)
+    grid = [[rng.choice(string.ascii_uppercase) for _ in range(size)] for _ in range(size)]
+    chosen: List[str] = []
+    while len(chosen) < words:
+        word = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, max(3, size // 2))))
+        if word not in chosen:
+            chosen.append(word)
+    domains = {word: generate_domain(word, grid) for word in chosen}
+    csp: CSP[str, Placement] = CSP(chosen, domains)
+    csp.add_constraint(WordSearchConstraint(chosen))
+    return csp
+
+
+def publication_dag(documents: int, seed: int) -> CSP[str, datetime.date]:
+    # Documents in topological order, each depending on one to three earlier ones;
+    # the date range leaves a few spare days beyond the longest dependency chain.
+    rng = random.Random(seed)
+    names = [f"문서 {k:03d}" for k in range(documents)]
+    depth = [0] * documents
+    edges: List[Tuple[int, int]] = []
+    for k in range(1, documents):
+        for before in rng.sample(range(max(0, k - 10), k), min(k, rng.randint(1, 3))):
+            edges.append((before, k))
+            depth[k] = max(depth[k], depth[before] + 1)
+    start = datetime.date(2023, 1, 2)
+    days = list(date_range(start, start + datetime.timedelta(days=2 * max(depth) + 14), []))
+    dates = days[: max(depth) + 6]
+    csp: CSP[str, datetime.date] = CSP(names, {name: list(dates) for name in names})
+    for before, after in edges:
+        csp.add_constraint(PublicationDependencyConstraint(names[before], names[after]))
+    return csp
+
+
+# Sizes whose search ends within seconds for each solver: backtracking on N-queens and
+# forward checking on long dependency chains are heavy-tailed beyond the sizes listed.
+def suite(quick: bool = False) -> List[Case]:
+    cases: List[Case] = []
+    for n in [8, 16] if quick else [8, 16, 32, 64, 100, 200]:
+        for solver in ["backtracking", "min_conflicts"] if n <= 100 else ["min_conflicts"]:
+            cases.append(Case("queens", {"n": n}, partial(queens_csp, n), solver))
+    for regions in [25] if quick else [25, 100, 400, 900]:
+        for solver in ["mac", "backjumping"]:
+            cases.append(Case("planar map", {"regions": regions}, partial(planar_map, regions, 1), solver))
+    for size, words in [(9, 4)] if quick else [(9, 4), (12, 6), (16, 10), (20, 14)]:
+        build = partial(word_search, size, words, 2)
+        cases.append(Case("word search", {"size": size, "words": words}, build, "backtracking"))
+    for documents in [20] if quick else [20, 50, 100, 200]:
+        for solver in ["mac", "compiled"] if documents <= 100 else ["compiled"]:
+            build = partial(publication_dag, documents, 3)
+            cases.append(Case("publication dag", {"documents": documents}, build, solver))
+    return cases
+
+
+def run_case(case: Case, solutions: int, repeat: int) -> Dict[str, Any]:
+    wall = float("inf")
+    stats = SolverStats()
+    solve = SOLVERS[case.solver]
+    for _ in range(repeat):
+        csp = case.build()
+        started = perf_counter()
+        stats = solve(csp, solutions)
+        wall = min(wall, perf_counter() - started)
+    csp = case.build()
+    tracemalloc.start()
+    try:
+        solve(csp, solutions)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "name": case.name,
+        "solver": case.solver,
+        "params": case.params,
+        "wall": wall,
+        "nodes": stats.nodes,
+        "backtracks": stats.backtracks,
+        "checks": stats.checks,
+        "solutions": stats.solutions,
+        "solutions_per_sec": stats.solutions / stats.elapsed if stats.elapsed else 0.0,
+        "peak_bytes": peak,
+    }
+
+
+def key(result: Dict[str, Any]) -> str:
+    params = ",".join(f"{name}={value}" for name, value in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]/{result['solver']}"
+
+
+# Wall time and peak memory of every case against the baseline; a case regresses when
+# either grows by more than `tolerance` (0.2 = 20%). Returns the report lines and the regressions.
+def compare(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> Tuple[List[str], List[str]]:
+    previous = {key(result): result for result in baseline}
+    lines: List[str] = []
+    regressions: List[str] = []
+    for result in results:
+        name = key(result)
+        if name not in previous:
+            lines.append(f"{name}: new case")
+            continue
+        old = previous[name]
+        time_ratio = result["wall"] / old["wall"] if old["wall"] else 1.0
+        memory_ratio = result["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else 1.0
+        flag = ""
+        if time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        nodes = f"nodes {old['nodes']} -> {result['nodes']}"
+        lines.append(f"{name}: time x{time_ratio:.2f}, memory x{memory_ratio:.2f}, {nodes}{flag}")
+    return lines, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CSP solver benchmarks")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--solutions", type=int, default=1, help="solutions to enumerate per case")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="smallest size of every problem only")
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in suite(args.quick):
+        result = run_case(case, args.solutions, args.repeat)
+        results.append(result)
+        megabytes = result["peak_bytes"] / 1e6
+        print(f"{key(result)}: {result['wall']:.3f}s, {result['nodes']} nodes, {megabytes:.1f} MB")
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "solutions": args.solutions,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as stored:
+            baseline = json.load(stored)["results"]
+        lines, regressions = compare(results, baseline, args.tolerance)
+        print("\n".join(lines))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import datetime
+from functools import lru_cache
+from typing import Any, Iterable, List, Tuple, Union
+
+import numpy as np
+
+DateLike = Union[datetime.date, np.datetime64, str]
+
+
+# Business days: Monday to Friday, minus holidays, on numpy's busdaycalendar. Every
+# operation takes dates or arrays of dates and runs in C, so a planning horizon of
+# several years costs about as much as a week.
+class BusinessCalendar:
+    def __init__(self, holidays: Iterable[DateLike] = ()) -> None:
+        self.holidays = np.unique(_days(list(holidays)))
+        self.calendar = np.busdaycalendar(weekmask="1111100", holidays=self.holidays)
+
+    def __repr__(self) -> str:
+        return f"BusinessCalendar({len(self.holidays)} holidays)"
+
+    def is_business_day(self, dates: DateLike) -> np.ndarray:
+        return np.is_busday(_days(dates), busdaycal=self.calendar)
+
+    # Business days from start to end, both included, as datetime64[D].
+    def days_array(self, start: DateLike, end: DateLike) -> np.ndarray:
+        first, last = _days(start), _days(end)
+        span = first + np.arange(max(0, int((last - first).astype(int)) + 1))
+        return span[np.is_busday(span, busdaycal=self.calendar)]
+
+    def days(self, start: DateLike, end: DateLike) -> List[datetime.date]:
+        return self.days_array(start, end).tolist()
+
+    # The n-th business day after each date (before it for negative n); a date that is
+    # not a business day counts from the business day before it, so the first business
+    # day after a Saturday is the Monday.
+    def offset(self, dates: DateLike, n: Union[int, np.ndarray]) -> np.ndarray:
+        days, steps = _days(dates), np.asarray(n)
+        after = np.busday_offset(days, steps, roll="backward", busdaycal=self.calendar)
+        before = np.busday_offset(days, steps, roll="forward", busdaycal=self.calendar)
+        return np.where(steps >= 0, after, before)
+
+    def add(self, date: DateLike, n: int) -> datetime.date:
+        return self.offset(date, n).item()
+
+    # Business days from start up to, not including, end; negative when end comes first.
+    def distance(self, start: DateLike, end: DateLike) -> np.ndarray:
+        return np.busday_count(_days(start), _days(end), busdaycal=self.calendar)
+
+
+def _days(dates: Any) -> np.ndarray:
+    return np.asarray(dates, dtype="datetime64[D]")
+
+
+# One calendar per holiday set, built the first time it is asked for.
+def business_calendar(holidays: Iterable[DateLike] = ()) -> BusinessCalendar:
+    days = np.unique(_days(list(holidays)))
+    return _cached_calendar(tuple(days.astype(str)))
+
+
+@lru_cache(maxsize=32)
+def _cached_calendar(holidays: Tuple[str, ...]) -> BusinessCalendar:
+    return BusinessCalendar(holidays)
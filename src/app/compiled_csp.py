@@ -0,0 +1,382 @@
+import threading
+from itertools import islice
+from time import perf_counter
+from typing import Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from csp import (
+    CSP,
+    Constraint,
+    SolveResult,
+    SolverStats,
+    STOP_CHECK_INTERVAL,
+    StopCondition,
+    forward_checking,
+    least_constraining_value,
+    mrv_degree,
+    solve_result,
+    timed_search,
+)
+
+V = TypeVar("V")  # Variable Type
+D = TypeVar("D")  # Domain Type
+
+
+# State of one search on a compiled model: its counters, its stop condition and the
+# deepest consistent row it reached. Searches only read the model, so several can run
+# on one CompiledCSP at once, from different threads.
+class CompiledSearch:
+    __slots__ = ("stats", "stop", "best")
+
+    def __init__(self, stats: SolverStats, stop: StopCondition, best: np.ndarray) -> None:
+        self.stats = stats
+        self.stop = stop
+        self.best = best
+
+
+# A CSP compiled to integers: variable i is self.variables[i], and value k of
+# variable i is self.values[i][k]. Domains are rows of a boolean mask and every
+# pair of variables linked by binary constraints gets one boolean compatibility
+# table, so checking and pruning are mask ANDs instead of satisfied() calls.
+# Constraints over more than two variables are kept and checked on the decoded values.
+class CompiledCSP(Generic[V, D]):
+    def __init__(self, csp: CSP[V, D]) -> None:
+        self.csp = csp
+        self.variables: List[V] = list(csp.variables)
+        self.index: Dict[V, int] = {variable: i for i, variable in enumerate(self.variables)}
+        self.values: List[List[D]] = [list(csp.domains[variable]) for variable in self.variables]
+        self.sizes = np.array([len(values) for values in self.values], dtype=np.int64)
+
+        width = int(self.sizes.max()) if len(self.variables) else 0
+        self.masks = np.zeros((len(self.variables), width), dtype=bool)
+        for i, size in enumerate(self.sizes):
+            self.masks[i, :size] = True
+
+        # tables[(i, j)][a, b] is True when variable i = value a and j = value b are compatible
+        # Constraint checks made while building the masks and tables
+        self.compile_stats = SolverStats()
+        # The last search started, whose stats, stop and best the properties below show
+        self.last = self._new_search(SolverStats(), StopCondition())
+        self.tables: Dict[Tuple[int, int], np.ndarray] = {}
+        self.neighbours: List[List[int]] = [[] for _ in self.variables]
+        self.nary: List[List[Constraint[V, D]]] = [[] for _ in self.variables]
+
+        seen = set()
+        for variable in self.variables:
+            for constraint in csp.constraints[variable]:
+                if id(constraint) in seen:
+                    continue
+                seen.add(id(constraint))
+                self._compile_constraint(constraint)
+
+    @property
+    def stats(self) -> SolverStats:
+        return self.last.stats
+
+    @property
+    def stop(self) -> StopCondition:
+        return self.last.stop
+
+    @property
+    def best(self) -> np.ndarray:
+        return self.last.best
+
+    def _new_search(self, stats: SolverStats, stop: StopCondition) -> CompiledSearch:
+        return CompiledSearch(stats, stop, np.full(len(self.variables), -1, dtype=np.int64))
+
+    def _compile_constraint(self, constraint: Constraint[V, D]) -> None:
+        indices = [self.index[variable] for variable in constraint.variables]
+        if len(set(indices)) == 1:
+            i = indices[0]
+            keep = [self._check(constraint, {self.variables[i]: value}, self.compile_stats) for value in self.values[i]]
+            self.masks[i, : self.sizes[i]] &= np.array(keep, dtype=bool)
+        elif len(indices) == 2:
+            i, j = indices
+            table = self._table(constraint, i, j)
+            if (i, j) in self.tables:
+                self.tables[(i, j)] &= table
+                self.tables[(j, i)] = self.tables[(i, j)].T
+            else:
+                self.tables[(i, j)] = table
+                self.tables[(j, i)] = table.T
+                self.neighbours[i].append(j)
+                self.neighbours[j].append(i)
+        else:
+            for i in set(indices):
+                self.nary[i].append(constraint)
+
+    # Evaluate a binary constraint once for every pair of values.
+    def _table(self, constraint: Constraint[V, D], i: int, j: int) -> np.ndarray:
+        x, y = self.variables[i], self.variables[j]
+        table = np.zeros((self.sizes[i], self.sizes[j]), dtype=bool)
+        pair: Dict[V, D] = {}
+        for a, value in enumerate(self.values[i]):
+            pair[x] = value
+            for b, other_value in enumerate(self.values[j]):
+                pair[y] = other_value
+                table[a, b] = self._check(constraint, pair, self.compile_stats)
+        return table
+
+    @staticmethod
+    def _check(constraint: Constraint[V, D], assignment: Dict[V, D], stats: SolverStats) -> bool:
+        started = perf_counter()
+        satisfied = constraint.satisfied(assignment)
+        stats.record_check(constraint, perf_counter() - started)
+        return satisfied
+
+    def encode(self, assignment: Dict[V, D]) -> np.ndarray:
+        encoded = np.full(len(self.variables), -1, dtype=np.int64)
+        for variable, value in assignment.items():
+            i = self.index[variable]
+            encoded[i] = self.values[i].index(value)
+        return encoded
+
+    def decode(self, encoded: np.ndarray) -> Dict[V, D]:
+        return {self.variables[i]: self.values[i][a] for i, a in enumerate(encoded) if a >= 0}
+
+    # Keep only the values of i that have a compatible value left in j.
+    def _revise(self, masks: np.ndarray, i: int, j: int) -> bool:
+        size_i, size_j = self.sizes[i], self.sizes[j]
+        supported = self.tables[(i, j)][:, masks[j, :size_j]].any(axis=1)
+        row = masks[i, :size_i]
+        revised = row & supported
+        if np.array_equal(revised, row):
+            return False
+        masks[i, :size_i] = revised
+        return True
+
+    # AC-3 over the compatibility tables. Returns False when a domain is wiped out.
+    def ac3(self, masks: np.ndarray) -> bool:
+        queue = [(i, j) for (i, j) in self.tables]
+        queued = set(queue)
+        while queue:
+            i, j = queue.pop()
+            queued.discard((i, j))
+            if self._revise(masks, i, j):
+                if not masks[i].any():
+                    return False
+                for k in self.neighbours[i]:
+                    if k != j and (k, i) not in queued:
+                        queue.append((k, i))
+                        queued.add((k, i))
+        return True
+
+    def _nary_consistent(self, i: int, encoded: np.ndarray, stats: SolverStats) -> bool:
+        if not self.nary[i]:
+            return True
+        assignment = self.decode(encoded)
+        return all(self._check(constraint, assignment, stats) for constraint in self.nary[i])
+
+    # Least constraining value order: count, for every value of i, how many values of the
+    # unassigned neighbours it rules out, with one vectorised pass per neighbour.
+    def _ordered_values(self, masks: np.ndarray, encoded: np.ndarray, i: int) -> np.ndarray:
+        candidates = np.flatnonzero(masks[i, : self.sizes[i]])
+        ruled_out = np.zeros(len(candidates), dtype=np.int64)
+        for j in self.neighbours[i]:
+            if encoded[j] < 0:
+                table = self.tables[(i, j)][candidates]
+                ruled_out += (~table & masks[j, : self.sizes[j]]).sum(axis=1)
+        return candidates[np.argsort(ruled_out, kind="stable")]
+
+    # MRV over the mask row counts, ties broken by the number of constraints on other
+    # unassigned variables (the degree heuristic); assigned variables are never picked.
+    def _select_variable(self, masks: np.ndarray, encoded: np.ndarray) -> int:
+        remaining = masks.sum(axis=1)
+        remaining[encoded >= 0] = np.iinfo(remaining.dtype).max
+        tied = np.flatnonzero(remaining == remaining.min())
+        if len(tied) == 1:
+            return int(tied[0])
+        degrees = [self._degree(int(i), encoded) for i in tied]
+        return int(tied[int(np.argmax(degrees))])
+
+    def _degree(self, i: int, encoded: np.ndarray) -> int:
+        count = int((encoded[self.neighbours[i]] < 0).sum())
+        for constraint in self.nary[i]:
+            if any(encoded[j] < 0 for j in {self.index[variable] for variable in constraint.variables} - {i}):
+                count += 1
+        return count
+
+    # Forward checking on the compatibility tables. Rows overwritten are saved on the trail.
+    def _forward_check(
+        self, masks: np.ndarray, encoded: np.ndarray, i: int, a: int, trail: List[Tuple[int, np.ndarray]]
+    ) -> bool:
+        for j in self.neighbours[i]:
+            if encoded[j] >= 0:
+                continue
+            size_j = self.sizes[j]
+            row = masks[j, :size_j]
+            pruned = row & self.tables[(i, j)][a]
+            if not np.array_equal(pruned, row):
+                trail.append((j, row.copy()))
+                masks[j, :size_j] = pruned
+                if not pruned.any():
+                    return False
+        return True
+
+    def backtracking_search(
+        self, assignment: Optional[Dict[V, D]] = None, arc_consistency: bool = True
+    ) -> Optional[Dict[V, D]]:
+        return next(self.iter_solutions(assignment, arc_consistency), None)
+
+    # First solution within `timeout` seconds or until `cancel` is set; see CSP.solve.
+    def solve(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        arc_consistency: bool = True,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> SolveResult[V, D]:
+        assignment = assignment or {}
+        if not self._encodable(assignment):
+            result = self.csp.solve(
+                assignment,
+                mrv_degree,
+                least_constraining_value,
+                forward_checking,
+                arc_consistency,
+                timeout=timeout,
+                cancel=cancel,
+            )
+            self.last = self._new_search(self.csp.stats, StopCondition(timeout, cancel))
+            return result
+        search, leaves = self._solutions(assignment, arc_consistency, timeout, cancel)
+        encoded = next(leaves, None)
+        solution = None if encoded is None else self.decode(encoded)
+        return solve_result(solution, search.stop, self.decode(search.best), search.stats)
+
+    # Solutions one at a time, decoded only when handed out; see CSP.iter_solutions.
+    def iter_solutions(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        arc_consistency: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[Dict[V, D]]:
+        assignment = assignment or {}
+        # A starting value outside its domain has no column in the masks; the plain
+        # solver accepts it as long as the constraints do, with the same heuristics.
+        if not self._encodable(assignment):
+            solutions = self.csp.iter_solutions(
+                assignment,
+                mrv_degree,
+                least_constraining_value,
+                forward_checking,
+                arc_consistency,
+                limit,
+                offset,
+                timeout=timeout,
+                cancel=cancel,
+            )
+            self.last = self._new_search(self.csp.stats, StopCondition(timeout, cancel))
+            return solutions
+        _, leaves = self._solutions(assignment, arc_consistency, timeout, cancel)
+        stop = None if limit is None else offset + limit
+        return (self.decode(encoded) for encoded in islice(leaves, offset, stop))
+
+    def count_solutions(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        arc_consistency: bool = True,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> int:
+        assignment = assignment or {}
+        if not self._encodable(assignment):
+            count = self.csp.count_solutions(
+                assignment,
+                mrv_degree,
+                least_constraining_value,
+                forward_checking,
+                arc_consistency,
+                limit,
+                timeout=timeout,
+                cancel=cancel,
+            )
+            self.last = self._new_search(self.csp.stats, StopCondition(timeout, cancel))
+            return count
+        _, leaves = self._solutions(assignment, arc_consistency, timeout, cancel)
+        return sum(1 for _ in islice(leaves, limit))
+
+    # A fresh search with its own stats and stop condition.
+    def _solutions(
+        self,
+        assignment: Dict[V, D],
+        arc_consistency: bool,
+        timeout: Optional[float],
+        cancel: Optional[threading.Event],
+    ) -> Tuple[CompiledSearch, Iterator[np.ndarray]]:
+        search = self.last = self._new_search(SolverStats(), StopCondition(timeout, cancel))
+        return search, timed_search(self._leaves(assignment, arc_consistency, search), search.stats)
+
+    def _encodable(self, assignment: Dict[V, D]) -> bool:
+        return all(value in self.values[self.index[variable]] for variable, value in assignment.items())
+
+    # Every complete assignment in search order, as the live encoded row. The search
+    # polls its stop condition every few nodes and keeps the deepest consistent row.
+    def _leaves(self, assignment: Dict[V, D], arc_consistency: bool, search: CompiledSearch) -> Iterator[np.ndarray]:
+        stats = search.stats
+        search.stop.resume()
+        masks = self.masks.copy()
+        encoded = self.encode(assignment)
+        fixed = [int(k) for k in np.flatnonzero(encoded >= 0)]
+        for k in fixed:
+            kept = masks[k, encoded[k]]
+            masks[k] = False
+            masks[k, encoded[k]] = kept
+        if not masks.any(axis=1).all():
+            return
+        trail: List[Tuple[int, np.ndarray]] = []
+        for k in fixed:
+            if not self._nary_consistent(k, encoded, stats):
+                return
+            if not self._forward_check(masks, encoded, k, int(encoded[k]), trail):
+                return
+        if arc_consistency and not self.ac3(masks):
+            return
+
+        search.best = encoded.copy()
+        total = len(self.variables)
+        depth = int((encoded >= 0).sum())
+        if depth == total:
+            yield encoded
+            return
+
+        stop = search.stop if search.stop.active else None
+        nodes = 0
+        deepest = 0
+        trail.clear()
+        i = self._select_variable(masks, encoded)
+        stack: List[Tuple[int, np.ndarray, int, int]] = [(i, self._ordered_values(masks, encoded, i), 0, 0)]
+        while stack:
+            nodes += 1
+            if stop is not None and nodes % STOP_CHECK_INTERVAL == 0 and stop():
+                return
+            i, candidates, position, mark = stack.pop()
+            encoded[i] = -1
+            while len(trail) > mark:
+                j, row = trail.pop()
+                masks[j, : self.sizes[j]] = row
+            if position == len(candidates):
+                stats.backtracks += 1
+                continue
+            stack.append((i, candidates, position + 1, mark))
+
+            a = int(candidates[position])
+            encoded[i] = a
+            stats.nodes += 1
+            if not self._nary_consistent(i, encoded, stats) or not self._forward_check(masks, encoded, i, a, trail):
+                continue
+            if len(stack) > deepest:
+                deepest = len(stack)
+                search.best = encoded.copy()
+            if len(stack) == total - depth:
+                search.stop.pause()
+                yield encoded
+                search.stop.resume()
+            else:
+                j = self._select_variable(masks, encoded)
+                stack.append((j, self._ordered_values(masks, encoded, j), 0, len(trail)))
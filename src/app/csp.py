@@ -1,11 +1,25 @@
-from typing import Generic, TypeVar, Dict, List, Optional
+from typing import Any, Callable, Generic, Iterator, Mapping, Set, Tuple, TypeVar, Dict, List, Optional
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from itertools import islice
+import hashlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+import os
+import random
+import threading
+from time import perf_counter
 
 V = TypeVar('V') # Variable Type
 D = TypeVar('D') # Domain Type 
+T = TypeVar('T')
 
 # base class for all constraint
+# Constraints are slotted: a model can hold many of them, and without a __dict__ each
+# takes a fraction of the memory. Subclasses declare __slots__ for their own attributes.
 class Constraint(Generic[V, D], ABC):
+    __slots__ = ("variables",)
+
     # constraint variable
     def __init__(self, variables:List[V]) -> None:
         self.variables = variables
@@ -14,11 +28,336 @@ class Constraint(Generic[V, D], ABC):
     def satisfied(self, assignement: Dict[V, D]) -> bool:
         pass
 
+
+# Constraint checked incrementally during search. Instead of rescanning the
+# assignment, it keeps counters of the values assigned so far and answers whether
+# one more value fits. The counters live in a state object created per search,
+# so the constraint itself is never modified. satisfied() stays the reference
+# check and is still used outside the backtracking search.
+class IncrementalConstraint(Constraint[V, D]):
+    __slots__ = ()
+
+    # Fresh state for an empty assignment.
+    @abstractmethod
+    def new_state(self) -> Any:
+        pass
+
+    # Whether variable (currently unassigned) can take value given the recorded values.
+    @abstractmethod
+    def accepts(self, state: Any, variable: V, value: D) -> bool:
+        pass
+
+    @abstractmethod
+    def on_assign(self, state: Any, variable: V, value: D) -> None:
+        pass
+
+    @abstractmethod
+    def on_unassign(self, state: Any, variable: V, value: D) -> None:
+        pass
+
+    # How many recorded values the value would clash with. Local search ranks values
+    # by it; the recorded values may already clash with one another there.
+    def conflicts(self, state: Any, variable: V, value: D) -> int:
+        return 0 if self.accepts(state, variable, value) else 1
+
+    # The recorded variables that value clashes with; by default all of them when it clashes.
+    def clashing(self, state: Any, variable: V, value: D) -> List[V]:
+        if self.accepts(state, variable, value):
+            return []
+        return [other for other in self.variables if other != variable]
+
+
+# Class name and attribute values of a constraint, slotted attributes included.
+def _constraint_key(constraint: Constraint) -> str:
+    attributes = dict(getattr(constraint, "__dict__", {}))
+    for kind in type(constraint).__mro__:
+        slots = getattr(kind, "__slots__", ())
+        for name in [slots] if isinstance(slots, str) else slots:
+            if not name.startswith("__") and hasattr(constraint, name):
+                attributes[name] = getattr(constraint, name)
+    return f"{type(constraint).__qualname__}{sorted((name, repr(value)) for name, value in attributes.items())}"
+
+
+# Counters of one solve. A search fills them in as it goes and the CSP keeps the
+# last ones in `stats`. Constraint checks are counted per constraint class; the
+# time per class is measured on a sample of the checks and scaled up, which keeps
+# the counters cheap enough to leave on.
+class SolverStats:
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.backtracks = 0
+        self.checks = 0
+        self.solutions = 0
+        self.elapsed = 0.0
+        self.check_counts: Dict[type, int] = {}
+        self.check_times: Dict[type, float] = {}
+
+    def __repr__(self) -> str:
+        return f"SolverStats({self.summary()})"
+
+    def record_check(self, constraint: Any, elapsed: float) -> None:
+        kind = type(constraint)
+        self.checks += 1
+        self.check_counts[kind] = self.check_counts.get(kind, 0) + 1
+        self.record_time(kind, elapsed)
+
+    def record_time(self, kind: type, elapsed: float) -> None:
+        self.check_times[kind] = self.check_times.get(kind, 0.0) + elapsed
+
+    # Add the counters of another solve, e.g. one of several attempts.
+    def merge(self, other: "SolverStats") -> None:
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.checks += other.checks
+        self.solutions += other.solutions
+        self.elapsed += other.elapsed
+        for kind, count in other.check_counts.items():
+            self.check_counts[kind] = self.check_counts.get(kind, 0) + count
+        for kind, seconds in other.check_times.items():
+            self.record_time(kind, seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "checks": self.checks,
+            "solutions": self.solutions,
+            "elapsed": self.elapsed,
+        }
+
+    # (constraint class name, checks, seconds), slowest class first
+    def by_constraint(self) -> List[Tuple[str, int, float]]:
+        rows = [(kind.__name__, count, self.check_times.get(kind, 0.0)) for kind, count in self.check_counts.items()]
+        return sorted(rows, key=lambda row: -row[2])
+
+
+# Pass the solutions of a search through, adding the time spent finding them to the
+# stats; the time a caller holds on to a solution before asking for the next is left out.
+def timed_search(leaves: Iterator[T], stats: SolverStats) -> Iterator[T]:
+    started: Optional[float] = perf_counter()
+    try:
+        for leaf in leaves:
+            stats.solutions += 1
+            stats.elapsed += perf_counter() - started  # type: ignore[operator]
+            started = None
+            yield leaf
+            started = perf_counter()
+    finally:
+        if started is not None:
+            stats.elapsed += perf_counter() - started
+
+
+# When a search gives up early: after `timeout` seconds of search, once the `cancel`
+# token is set from another thread, or when `should_stop` says so. The time a caller
+# holds on to a solution of a suspended enumeration is not charged to the timeout.
+# `reason` is "timeout" or "cancelled" once the condition has fired.
+class StopCondition:
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.cancel = cancel
+        self.should_stop = should_stop
+        self.reason: Optional[str] = None
+        self.spent = 0.0
+        self.resumed = perf_counter()
+
+    @property
+    def active(self) -> bool:
+        return self.timeout is not None or self.cancel is not None or self.should_stop is not None
+
+    def pause(self) -> None:
+        self.spent += perf_counter() - self.resumed
+
+    def resume(self) -> None:
+        self.resumed = perf_counter()
+
+    def __call__(self) -> bool:
+        if (self.cancel is not None and self.cancel.is_set()) or (self.should_stop is not None and self.should_stop()):
+            self.reason = "cancelled"
+        elif self.timeout is not None and self.spent + perf_counter() - self.resumed > self.timeout:
+            self.reason = "timeout"
+        return self.reason is not None
+
+
+# Outcome of a bounded solve. The status is "solved", "infeasible" (there is no solution
+# below the starting assignment), "timeout" or "cancelled"; the assignment is the solution,
+# or else the largest consistent partial assignment the search reached.
+class SolveResult(Generic[V, D]):
+    def __init__(self, status: str, assignment: Dict[V, D], stats: SolverStats) -> None:
+        self.status = status
+        self.assignment = assignment
+        self.stats = stats
+
+    def __repr__(self) -> str:
+        return f"SolveResult({self.status!r}, {len(self.assignment)} assigned)"
+
+    @property
+    def solved(self) -> bool:
+        return self.status == "solved"
+
+
+# Outcome of optimize: once a complete assignment was found, `assignment` is the cheapest
+# one and `cost` its objective value, even when the search was stopped; "solved" then
+# means no cheaper one exists. Before that it is a SolveResult like any other.
+class OptimizeResult(SolveResult[V, D]):
+    def __init__(self, status: str, assignment: Dict[V, D], stats: SolverStats, cost: Optional[float]) -> None:
+        super().__init__(status, assignment, stats)
+        self.cost = cost
+
+    def __repr__(self) -> str:
+        return f"OptimizeResult({self.status!r}, {len(self.assignment)} assigned, cost={self.cost})"
+
+    @property
+    def found(self) -> bool:
+        return self.cost is not None
+
+
+def solve_result(
+    solution: Optional[Dict[V, D]], stop: StopCondition, best: Dict[V, D], stats: SolverStats
+) -> SolveResult[V, D]:
+    if solution is not None:
+        return SolveResult("solved", solution, stats)
+    return SolveResult(stop.reason or "infeasible", best, stats)
+
+
+SearchHook = Callable[[str, Any, Any], None]
+# Inside a search, one constraint check in this many is timed.
+_TIMING_SAMPLE = 16
+
+
+# Variable ordering: picks the next unassigned variable of the search to branch on.
+VariableOrdering = Callable[["SearchContext[V, D]"], V]
+# Value ordering: returns the legal values of a variable in the order to try them.
+ValueOrdering = Callable[["SearchContext[V, D]", V], List[D]]
+
+
+# Static ordering: variables in declaration order.
+def first_unassigned(context: "SearchContext[V, D]") -> V:
+    return context.first_unassigned()
+
+
+# Minimum remaining values: the variable with the fewest legal values left fails first.
+def minimum_remaining_values(context: "SearchContext[V, D]") -> V:
+    return min(context.most_constrained(), key=context.position.__getitem__)
+
+
+# Degree heuristic: the variable involved in the most constraints on unassigned variables.
+def degree(context: "SearchContext[V, D]") -> V:
+    return _most_connected(context, context.unassigned)
+
+
+# MRV with the degree heuristic as tie-breaker.
+def mrv_degree(context: "SearchContext[V, D]") -> V:
+    return _most_connected(context, context.most_constrained())
+
+
+# Highest degree first, then declaration order.
+def _most_connected(context: "SearchContext[V, D]", candidates: Dict[V, None]) -> V:
+    degrees = context.degrees
+    highest = max(map(degrees.__getitem__, candidates))
+    return min((v for v in candidates if degrees[v] == highest), key=context.position.__getitem__)
+
+
+# Values in domain order.
+def domain_order(context: "SearchContext[V, D]", variable: V) -> List[D]:
+    return context.legal_values(variable)
+
+
+# Least constraining value: try first the values that rule out the fewest
+# values of the neighbouring unassigned variables.
+def least_constraining_value(context: "SearchContext[V, D]", variable: V) -> List[D]:
+    assignment = context.assignment
+    neighbours: Dict[V, List[D]] = {}
+    for constraint in context.csp.constraints[variable]:
+        for other in constraint.variables:
+            if other != variable and other not in assignment and other not in neighbours:
+                neighbours[other] = context.legal_values(other)
+
+    # Probe through the context so incremental constraints answer from their state
+    def ruled_out(value: D) -> int:
+        context.place(variable, value)
+        try:
+            return sum(
+                1
+                for other, other_values in neighbours.items()
+                for other_value in other_values
+                if not context.consistent(other, other_value)
+            )
+        finally:
+            context.lift(variable)
+
+    return sorted(context.legal_values(variable), key=ruled_out)
+
+
+# Inference: prunes the domains of unassigned variables after `variable` was assigned,
+# through SearchContext.prune so the pruning is undone on backtrack.
+# Returns False when some domain is wiped out.
+Inference = Callable[["SearchContext[V, D]", V], bool]
+
+# Objective: the cost of a complete assignment, to be minimised.
+Objective = Callable[[Dict[V, D]], float]
+# Bound: a lower bound on the cost of every completion of the search's current assignment,
+# read from its assignment and domains. It must never overestimate, or optimize may
+# prune the optimum away; the closer it is, the more of the tree is cut off.
+Bound = Callable[["SearchContext[V, D]"], float]
+
+
+# Forward checking: drop the values of unassigned neighbours that violate a
+# constraint shared with the newly assigned variable.
+def forward_checking(context: "SearchContext[V, D]", variable: V) -> bool:
+    assignment, domains = context.assignment, context.domains
+    if len(domains[variable]) != 1:
+        context.prune(variable, [assignment[variable]])
+    for constraint in context.csp.constraints[variable]:
+        for other in constraint.variables:
+            if other == variable or other in assignment:
+                continue
+            current = domains[other]
+            kept = [value for value in current if context.allows(constraint, other, value)]
+            if len(kept) != len(current):
+                context.prune(other, kept)
+                if not kept:
+                    return False
+    return True
+
+
+# Maintaining arc consistency: forward checking followed by AC-3 over the
+# binary constraints, starting from the arcs into every domain that shrank.
+def mac(context: "SearchContext[V, D]", variable: V) -> bool:
+    mark = len(context.trail)
+    if not forward_checking(context, variable):
+        return False
+    csp, assignment = context.csp, context.assignment
+    changed = {variable} | {pruned for pruned, _ in context.trail[mark:]}
+    arcs = [(z, y) for y in changed for z in csp._binary_arcs(y) if z not in assignment]
+    return csp.ac3(context.domains, arcs, context.trail, context)  # type: ignore[arg-type]
+
+
+# Domains and constraints of a frozen model: the mapping refuses changes and every value
+# in it is a tuple.
+class _FrozenDict(dict):
+    def _refuse(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError("고정된 모델은 바꿀 수 없습니다.")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _refuse  # type: ignore
+
+    def __reduce__(self) -> Any:
+        return (_FrozenDict, (dict(self),))
+
+
 class CSP(Generic[V, D]):
     def __init__(self, variables:List[V], domains: Dict[V, List[D]]) -> None:
         self.variables: List[V] = variables
         self.domains: Dict[V, List[D]] = domains
         self.constraints: Dict[V, List[Constraint[V, D]]] = {}
+        # Counters of the last solve started on the model, and callbacks told about every search event
+        self.stats = SolverStats()
+        self.hooks: List[SearchHook] = []
+        self.frozen = False
         for variable in self.variables:
             self.constraints[variable] = []
             if variable not in self.domains:
@@ -27,79 +366,1243 @@ class CSP(Generic[V, D]):
     def __repr__(self) -> str:
         return f"Variables: {self.variables}\nDomains: {self.domains}\nConstraints: {self.constraints}"
 
+    # Make the model read-only: variables, domains, constraints and hooks no longer change,
+    # and edits raise TypeError (AttributeError on the tuples holding them). Searches keep
+    # all of their state in their own SearchContext and never write to the model, so a
+    # frozen model can be shared between threads and solved by several at once. `stats`
+    # then points at the counters of whichever solve started last; a caller sharing the
+    # model reads those of its own result instead.
+    def freeze(self) -> "CSP[V, D]":
+        if not self.frozen:
+            self.variables = tuple(self.variables)  # type: ignore[assignment]
+            self.domains = _FrozenDict({variable: tuple(self.domains[variable]) for variable in self.variables})
+            self.constraints = _FrozenDict({variable: tuple(linked) for variable, linked in self.constraints.items()})
+            self.hooks = tuple(self.hooks)  # type: ignore[assignment]
+            self.frozen = True
+        return self
+
+    def _check_mutable(self) -> None:
+        if self.frozen:
+            raise TypeError("고정된 모델은 바꿀 수 없습니다.")
+
     def add_constraint(self, constraint: Constraint[V, D]) -> None:
+        self._check_mutable()
         for variable in constraint.variables:
             if variable not in self.variables:
                 raise LookupError("제약 조건 변수가 아닙니다.")
             else:
                 self.constraints[variable].append(constraint)
 
+    def remove_constraint(self, constraint: Constraint[V, D]) -> None:
+        self._check_mutable()
+        for variable in dict.fromkeys(constraint.variables):
+            self.constraints[variable].remove(constraint)
+
+    def add_variable(self, variable: V, domain: List[D]) -> None:
+        self._check_mutable()
+        if variable in self.constraints:
+            raise LookupError("이미 있는 변수입니다.")
+        self.variables.append(variable)
+        self.domains[variable] = domain
+        self.constraints[variable] = []
+
+    # Drop the variable together with every constraint on it.
+    def remove_variable(self, variable: V) -> None:
+        self._check_mutable()
+        if variable not in self.constraints:
+            raise LookupError("변수가 아닙니다.")
+        for constraint in list(self.constraints[variable]):
+            self.remove_constraint(constraint)
+        self.variables.remove(variable)
+        del self.domains[variable]
+        del self.constraints[variable]
+
+    # Narrow or widen the domain of a variable.
+    def set_domain(self, variable: V, domain: List[D]) -> None:
+        self._check_mutable()
+        if variable not in self.constraints:
+            raise LookupError("변수가 아닙니다.")
+        self.domains[variable] = domain
+
+    # Hash of the model that does not depend on the order of the variables, of the values
+    # in a domain or of the constraints: the same problem built twice gets the same
+    # fingerprint. Constraints count by class name and attribute values, compared by repr,
+    # so attribute values should have a repr that does not change between processes.
+    def fingerprint(self) -> str:
+        variables = sorted(repr(variable) for variable in self.variables)
+        domains = sorted(
+            f"{variable!r}: {sorted(repr(value) for value in self.domains[variable])}" for variable in self.variables
+        )
+        unique = {id(linked): linked for variable in self.variables for linked in self.constraints[variable]}
+        constraints = sorted(_constraint_key(constraint) for constraint in unique.values())
+        digest = hashlib.sha256()
+        for part in [*variables, "", *domains, "", *constraints]:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    # Variables with a single value: whatever else is assigned, they take that value.
+    def separators(self) -> List[V]:
+        return [variable for variable in self.variables if len(self.domains[variable]) == 1]
+
+    # Groups of variables linked by constraints, directly or through other variables, each
+    # in variable order. No constraint spans two groups, so every group can be solved on
+    # its own and the solutions put together.
+    # With `separators`, links through a separator (see separators) do not count: its value
+    # is known, so it cuts the model into groups that only share it. Each separator is then
+    # in every group it constrains, and all of them in a last group of their own, so every
+    # constraint is still within some group and the solutions still agree.
+    def components(self, separators: bool = False) -> List[List[V]]:
+        cut = set(self.separators()) if separators else set()
+        group: Dict[V, int] = {}
+        groups: List[List[V]] = []
+        for variable in self.variables:
+            if variable in group or variable in cut:
+                continue
+            group[variable] = len(groups)
+            members, pending = [variable], [variable]
+            touched: Set[V] = set()
+            while pending:
+                for constraint in self.constraints[pending.pop()]:
+                    for other in constraint.variables:
+                        if other in cut:
+                            touched.add(other)
+                        elif other not in group:
+                            group[other] = len(groups)
+                            members.append(other)
+                            pending.append(other)
+            groups.append(members + list(touched))
+        if cut:
+            groups.append(list(cut))
+        position = {variable: i for i, variable in enumerate(self.variables)}
+        return [sorted(members, key=position.__getitem__) for members in groups]
+
+    # The model over some of the variables: their domains and the constraints among them.
+    # Domain lists and constraint objects are shared with this model, not copied.
+    def subproblem(self, variables: List[V]) -> "CSP[V, D]":
+        chosen = set(variables)
+        sub: CSP[V, D] = CSP(list(variables), {variable: self.domains[variable] for variable in variables})
+        added: Set[int] = set()
+        for variable in variables:
+            for constraint in self.constraints[variable]:
+                if id(constraint) not in added and chosen.issuperset(constraint.variables):
+                    added.add(id(constraint))
+                    sub.add_constraint(constraint)
+        return sub
+
+    # Profiling hook, called as hook(event, variable, value) for "node" (a value tried),
+    # "prune" (a domain reduced to value), "backtrack" (variable out of values) and
+    # "solution" (value is the assignment). Hooks slow every search down; keep them for profiling.
+    def add_hook(self, hook: "SearchHook") -> None:
+        self._check_mutable()
+        self.hooks.append(hook)
+
     def consistent(self, variable: V, assignment: Dict[V, D]) -> bool:
         for constraint in self.constraints[variable]:
             if not constraint.satisfied(assignment):
                 return False
         return True
-    '''
-    def backtracking_search(self, assignment: Dict[V, D] = {}) -> Optional[Dict[V, D]]:
-        #assignment는 모든 변수가 할당될 때 완료된다.(base condition)
-        if len(assignment) == len(self.variables):
-            return assignment
-
-        # 할당되지 않은 모든 변수를 가져온다.
-        unassigned: List[V] = [v for v in self.variables if v not in assignment]
-
-        # 할당되지 않은 첫 번째 변수의 가능한 모든 도메인 값을 가져온다. 
-        first: V = unassigned[0]
-        for value in self.domains[first]:
-            local_assignment = assignment.copy()
-            local_assignment[first] = value
-            
-            #local_assignment 값이 일관적이면 재귀 호출한다.
-            if self.consistent(first, local_assignment):
-                result: Optional[Dict[V,D]] = self.backtracking_search(
-                    local_assignment)
-                #결과를 찾지 못하면 백트래킹을 종료한다.
-                if result is not None:
-                    
-                    return result
-    
-        return None # 솔루션 없음 
-    
-    '''
-    def backtracking_search(self, assignment: Dict[V, D] = {}) -> Optional[Dict[V, D]]:
-        # Base condition: assignment is complete when all variables have been assigned
-        if len(assignment) == len(self.variables):
-            return assignment
-
-        # Get all unassigned variables
-        unassigned: List[V] = [v for v in self.variables if v not in assignment]
-
-        # Get the first unassigned variable
-        first: V = unassigned[0]
-        original_domain = self.domains[first].copy()
-        
-        # Split the domain into two parts
-        mid = len(original_domain) // 2
-        split1 = original_domain[:mid]
-        split2 = original_domain[mid:]
-        
-        for subdomain in [split1, split2]:
-            self.domains[first] = subdomain
-
-            for value in subdomain:
-                local_assignment = assignment.copy()
-                local_assignment[first] = value
-
-                # If the local assignment is consistent, proceed with recursion
-                if self.consistent(first, local_assignment):
-                    result: Optional[Dict[V, D]] = self.backtracking_search(local_assignment)
-                    
-                    # If a result is found, return it
+
+    def backtracking_search(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        select_variable: VariableOrdering = first_unassigned,
+        order_values: ValueOrdering = domain_order,
+        inference: Optional[Inference] = None,
+        arc_consistency: bool = False,
+        backjumping: bool = False,
+        max_nogoods: int = 1000,
+    ) -> Optional[Dict[V, D]]:
+        search = SearchContext(
+            self,
+            assignment or {},
+            select_variable,
+            order_values,
+            inference,
+            arc_consistency,
+            backjumping=backjumping,
+            max_nogoods=max_nogoods,
+        )
+        self.stats = search.stats
+        return search.run()
+
+    # Backtracking that gives up after `timeout` seconds or once `cancel` is set, for
+    # callers that cannot afford an unbounded search. The search polls both every few
+    # nodes; the AC-3 pass before it, when asked for, always runs to the end.
+    def solve(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        select_variable: VariableOrdering = first_unassigned,
+        order_values: ValueOrdering = domain_order,
+        inference: Optional[Inference] = None,
+        arc_consistency: bool = False,
+        backjumping: bool = False,
+        max_nogoods: int = 1000,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> SolveResult[V, D]:
+        search = SearchContext(
+            self,
+            assignment or {},
+            select_variable,
+            order_values,
+            inference,
+            arc_consistency,
+            backjumping=backjumping,
+            max_nogoods=max_nogoods,
+            timeout=timeout,
+            cancel=cancel,
+        )
+        self.stats = search.stats
+        return search.result(search.run())
+
+    # Warm start after the model changed: keep what still fits of a previous solution and
+    # search only over the rest. Variables that are new, whose value left their domain, or
+    # whose value clashes with those kept before them are freed. When the freed variables
+    # cannot be completed around the kept values, their neighbours are freed as well, one
+    # ring at a time, and in the end the search starts from scratch.
+    def repair(
+        self,
+        previous: Dict[V, D],
+        select_variable: VariableOrdering = first_unassigned,
+        order_values: ValueOrdering = domain_order,
+        inference: Optional[Inference] = None,
+        arc_consistency: bool = False,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> SolveResult[V, D]:
+        started = perf_counter()
+        stats = SolverStats()
+        kept = self._kept_values(previous)
+        while True:
+            remaining = None if timeout is None else max(0.0, timeout - (perf_counter() - started))
+            result = self.solve(
+                kept, select_variable, order_values, inference, arc_consistency, timeout=remaining, cancel=cancel
+            )
+            stats.merge(result.stats)
+            if result.status != "infeasible" or not kept:
+                self.stats = result.stats = stats
+                return result
+            kept = self._free_neighbours(kept)
+
+    # The values of a previous solution that are in their domains and consistent with one
+    # another, taken in variable order.
+    def _kept_values(self, previous: Dict[V, D]) -> Dict[V, D]:
+        context = SearchContext(self, {}, first_unassigned, domain_order, None, False)
+        for variable in self.variables:
+            if variable not in previous or previous[variable] not in self.domains[variable]:
+                continue
+            if context.consistent(variable, previous[variable]):
+                context.assign(variable, previous[variable])
+        return dict(context.assignment)
+
+    # The kept values minus those of every variable sharing a constraint with a freed one;
+    # nothing at all when no kept variable touches the freed ones.
+    def _free_neighbours(self, kept: Dict[V, D]) -> Dict[V, D]:
+        touched: Dict[V, None] = {}
+        for variable in self.variables:
+            if variable not in kept:
+                for constraint in self.constraints[variable]:
+                    touched.update(dict.fromkeys(other for other in constraint.variables if other in kept))
+        if not touched:
+            return {}
+        return {variable: value for variable, value in kept.items() if variable not in touched}
+
+    # Solutions one at a time, in the order backtracking_search would reach them. The
+    # search is suspended between two solutions, so a caller holding the iterator can
+    # page through them: `offset` skips solutions without copying them, `limit` stops early.
+    # A `timeout` or `cancel` (see solve) ends the iteration early, as `limit` does.
+    def iter_solutions(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        select_variable: VariableOrdering = first_unassigned,
+        order_values: ValueOrdering = domain_order,
+        inference: Optional[Inference] = None,
+        arc_consistency: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        backjumping: bool = False,
+        max_nogoods: int = 1000,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[Dict[V, D]]:
+        search = SearchContext(
+            self,
+            assignment or {},
+            select_variable,
+            order_values,
+            inference,
+            arc_consistency,
+            backjumping=backjumping,
+            max_nogoods=max_nogoods,
+            timeout=timeout,
+            cancel=cancel,
+        )
+        self.stats = search.stats
+        stop = None if limit is None else offset + limit
+        return (dict(solution) for solution in islice(search.leaves(), offset, stop))
+
+    # Number of solutions, up to `limit`; no assignment is copied along the way.
+    def count_solutions(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        select_variable: VariableOrdering = first_unassigned,
+        order_values: ValueOrdering = domain_order,
+        inference: Optional[Inference] = None,
+        arc_consistency: bool = False,
+        limit: Optional[int] = None,
+        backjumping: bool = False,
+        max_nogoods: int = 1000,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> int:
+        search = SearchContext(
+            self,
+            assignment or {},
+            select_variable,
+            order_values,
+            inference,
+            arc_consistency,
+            backjumping=backjumping,
+            max_nogoods=max_nogoods,
+            timeout=timeout,
+            cancel=cancel,
+        )
+        self.stats = search.stats
+        return sum(1 for _ in islice(search.leaves(), limit))
+
+    # Branch and bound: the complete assignment of least `objective`. Every solution the
+    # search reaches that beats the incumbent replaces it and is reported to `on_improve`
+    # with its cost, so a caller can show the best schedule so far while the search goes on;
+    # any branch whose `bound` is no lower than the incumbent's cost is not searched.
+    # Without a bound every solution is visited. A `timeout` or `cancel` (see solve) makes
+    # this an anytime search that returns the incumbent it has.
+    def optimize(
+        self,
+        objective: Objective,
+        bound: Optional[Bound] = None,
+        assignment: Optional[Dict[V, D]] = None,
+        select_variable: VariableOrdering = first_unassigned,
+        order_values: ValueOrdering = domain_order,
+        inference: Optional[Inference] = None,
+        arc_consistency: bool = False,
+        on_improve: Optional[Callable[[Dict[V, D], float], None]] = None,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> OptimizeResult[V, D]:
+        search = SearchContext(
+            self,
+            assignment or {},
+            select_variable,
+            order_values,
+            inference,
+            arc_consistency,
+            timeout=timeout,
+            cancel=cancel,
+        )
+        self.stats = search.stats
+        incumbent: Dict[V, D] = {}
+        cost = float("inf")
+        if bound is not None:
+            search.cutoff = lambda: bound(search) >= cost
+        for solution in search.leaves():
+            value = objective(solution)
+            if value < cost:
+                cost, incumbent = value, dict(solution)
+                if on_improve is not None:
+                    on_improve(dict(incumbent), cost)
+        if not incumbent:
+            result = search.result(None)
+            return OptimizeResult(result.status, result.assignment, result.stats, None)
+        return OptimizeResult(search.stop.reason or "solved", incumbent, search.stats, cost)
+
+    # Split the search tree into disjoint subtrees, each fixed by a partial assignment.
+    # The domain of the branching variable is split value by value, going one level
+    # deeper on every subtree until there are at least `target` of them.
+    def _partitions(
+        self,
+        assignment: Dict[V, D],
+        target: int,
+        select_variable: VariableOrdering,
+        order_values: ValueOrdering,
+        inference: Optional[Inference],
+        arc_consistency: bool,
+    ) -> Tuple[List[Dict[V, D]], Optional[Dict[V, D]]]:
+        partitions: deque = deque([dict(assignment)])
+        while partitions and len(partitions) < target:
+            partial = partitions.popleft()
+            context = SearchContext(self, partial, select_variable, order_values, inference, arc_consistency)
+            branches = context.branches()
+            if branches is None:
+                continue
+            variable, values = branches
+            if variable is None:
+                return [], partial  # already a complete solution
+            for value in values:
+                child = dict(partial)
+                child[variable] = value
+                partitions.append(child)
+        return list(partitions), None
+
+    # Parallel backtracking: subtrees are solved in worker processes and the first
+    # solution found wins; the remaining workers are told to stop. Subtrees are
+    # oversubscribed (`tasks_per_worker` per process) so idle workers keep pulling
+    # work while a hard subtree is still being searched.
+    def parallel_search(
+        self,
+        assignment: Optional[Dict[V, D]] = None,
+        select_variable: VariableOrdering = first_unassigned,
+        order_values: ValueOrdering = domain_order,
+        inference: Optional[Inference] = None,
+        arc_consistency: bool = False,
+        workers: Optional[int] = None,
+        tasks_per_worker: int = 4,
+        start_method: Optional[str] = None,
+    ) -> Optional[Dict[V, D]]:
+        workers = workers or os.cpu_count() or 1
+        options: SearchOptions = (select_variable, order_values, inference, arc_consistency)
+        partitions, solution = self._partitions(assignment or {}, workers * tasks_per_worker, *options)
+        if solution is not None or not partitions:
+            return solution
+
+        # The model, the constraint classes and the orderings must pickle: "spawn" (macOS, Windows)
+        # re-imports them in every worker instead of inheriting them as "fork" does.
+        context = multiprocessing.get_context(start_method)
+        cancel = context.Event()
+        with ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_init_worker, initargs=(self, options, cancel)
+        ) as executor:
+            pending = {executor.submit(_solve_partition, partial) for partial in partitions}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
                     if result is not None:
+                        cancel.set()
+                        for other in pending:
+                            other.cancel()
                         return result
+        return None  # No solution found
+
+    # Solve every component (see components) as a model of its own with `solve` and merge
+    # the solutions, so search cost grows with the largest component rather than the whole
+    # model; None as soon as one component has no solution. Without components given, the
+    # model is cut at its separators too. With more than one worker the components go to
+    # worker processes, largest first, and `solve` must pickle as the model does; in this
+    # process the stats of the components are added up in `stats`.
+    def solve_components(
+        self,
+        solve: Callable[["CSP[V, D]"], Optional[Dict[V, D]]],
+        components: Optional[List[List[V]]] = None,
+        workers: int = 1,
+        start_method: Optional[str] = None,
+    ) -> Optional[Dict[V, D]]:
+        groups = sorted(components or self.components(separators=True), key=len, reverse=True)
+        subproblems = [self.subproblem(group) for group in groups]
+        solutions: List[Optional[Dict[V, D]]] = []
+        if workers > 1 and len(subproblems) > 1:
+            context = multiprocessing.get_context(start_method)
+            with ProcessPoolExecutor(min(workers, len(subproblems)), mp_context=context) as executor:
+                pending = [executor.submit(solve, sub) for sub in subproblems]
+                for future in pending:
+                    solutions.append(future.result())
+                    if solutions[-1] is None:
+                        for other in pending:
+                            other.cancel()
+                        return None
+        else:
+            self.stats = stats = SolverStats()
+            for sub in subproblems:
+                solutions.append(solve(sub))
+                stats.merge(sub.stats)
+                if solutions[-1] is None:
+                    return None
+        merged: Dict[V, D] = {}
+        for solution in solutions:
+            merged.update(solution or {})
+        return {variable: merged[variable] for variable in self.variables}
+
+    # Min-conflicts local search for instances too large for backtracking. Starts from a
+    # greedy complete assignment (seeded by `assignment` where given) and repeatedly moves a
+    # conflicted variable to the value with the fewest conflicts. Values left in the last
+    # `tabu` steps may only be taken back when they clear every conflict; after `max_steps`
+    # steps without a solution the search restarts from scratch, `restarts` times.
+    # Returns None when no solution was found, which does not prove there is none.
+    def min_conflicts(
+        self,
+        max_steps: int = 100_000,
+        seed: Optional[int] = None,
+        tabu: int = 0,
+        restarts: int = 0,
+        assignment: Optional[Dict[V, D]] = None,
+    ) -> Optional[Dict[V, D]]:
+        if any(not self.domains[variable] for variable in self.variables):
+            return None
+        rng = random.Random(seed)
+        # Nodes count the moves of every run, backtracks the restarts
+        self.stats = stats = SolverStats()
+        started = perf_counter()
+        try:
+            for attempt in range(restarts + 1):
+                stats.backtracks = attempt
+                search = LocalSearch(self, rng, tabu, stats)
+                solution = search.run(max_steps, assignment if attempt == 0 else None)
+                if solution is not None:
+                    stats.solutions = 1
+                    return solution
+            return None
+        finally:
+            stats.elapsed = perf_counter() - started
+
+    # Binary constraints shared by variable and each of its neighbours.
+    def _binary_arcs(self, variable: V) -> Dict[V, List[Constraint[V, D]]]:
+        arcs: Dict[V, List[Constraint[V, D]]] = {}
+        for constraint in self.constraints[variable]:
+            if len(constraint.variables) == 2:
+                other = constraint.variables[0] if constraint.variables[1] == variable else constraint.variables[1]
+                if other != variable:
+                    arcs.setdefault(other, []).append(constraint)
+        return arcs
+
+    # Remove the values of x that have no supporting value in y's domain.
+    def _revise(
+        self,
+        x: V,
+        y: V,
+        constraints: List[Constraint[V, D]],
+        domains: Dict[V, List[D]],
+        removals: Optional[List[Tuple[V, List[D]]]],
+        context: Optional["SearchContext[V, D]"] = None,
+    ) -> bool:
+        if context is not None:
+            kept = [value for value in domains[x] if context.supported(x, value, y, domains[y], constraints)]
+        else:
+            pair: Dict[V, D] = {}
+            kept = []
+            for value in domains[x]:
+                pair[x] = value
+                for other_value in domains[y]:
+                    pair[y] = other_value
+                    if all(constraint.satisfied(pair) for constraint in constraints):
+                        kept.append(value)
+                        break
+        if len(kept) == len(domains[x]):
+            return False
+        if context is not None and domains is context.domains:
+            context.prune(x, kept)  # on the trail, in the MRV counts and told to the hooks
+            return True
+        if removals is not None:
+            removals.append((x, domains[x]))
+        domains[x] = kept
+        return True
+
+    # AC-3: make every binary constraint arc consistent, pruning domains in place.
+    # Returns False as soon as a domain is wiped out. Inside a search the pairs are
+    # checked through the search context, against its assignment and constraint states.
+    def ac3(
+        self,
+        domains: Dict[V, List[D]],
+        arcs: Optional[List[Tuple[V, V]]] = None,
+        removals: Optional[List[Tuple[V, List[D]]]] = None,
+        context: Optional["SearchContext[V, D]"] = None,
+    ) -> bool:
+        neighbours: Dict[V, Dict[V, List[Constraint[V, D]]]] = {}
+
+        def binary_arcs(variable: V) -> Dict[V, List[Constraint[V, D]]]:
+            if variable not in neighbours:
+                neighbours[variable] = self._binary_arcs(variable)
+            return neighbours[variable]
+
+        if arcs is None:
+            arcs = [(x, y) for x in self.variables for y in binary_arcs(x)]
+        queue = deque(arcs)
+        queued = set(queue)
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
+            if self._revise(x, y, binary_arcs(x)[y], domains, removals, context):
+                if not domains[x]:
+                    return False
+                for z in binary_arcs(x):
+                    if z != y and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
+        return True
+
+
+# One backtracking run. The search mutates a single assignment in place and keeps
+# an explicit stack instead of recursing, so its depth is not bounded by Python's
+# recursion limit. Every pruned domain goes on an undo trail; backtracking to a
+# frame pops the trail back to the length it had when the frame was pushed.
+# Incremental constraints get their per-search state here and are told about
+# every assignment and unassignment.
+class SearchContext(Generic[V, D]):
+    def __init__(
+        self,
+        csp: CSP[V, D],
+        assignment: Dict[V, D],
+        select_variable: VariableOrdering,
+        order_values: ValueOrdering,
+        inference: Optional[Inference],
+        arc_consistency: bool,
+        should_stop: Optional[Callable[[], bool]] = None,
+        backjumping: bool = False,
+        max_nogoods: int = 1000,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> None:
+        self.csp = csp
+        self.assignment: Dict[V, D] = {}
+        self.stop = StopCondition(timeout, cancel, should_stop)
+        # The largest consistent assignment reached, returned when the search gives up
+        self.best: Dict[V, D] = {}
+        self.stats = SolverStats()
+        self.hooks = csp.hooks
+        self.backjumping = backjumping
+        self.nogoods: NogoodStore[V, D] = NogoodStore(max_nogoods)
+        # Domains at the root of the search, against which backjumping explains failures
+        self.base: Mapping[V, List[D]] = csp.domains
+        self.select_variable = select_variable
+        self.order_values = order_values
+        self.inference = inference
+        self.arc_consistency = arc_consistency
+        self.trail: List[Tuple[V, List[D]]] = []
+        self.domains: Mapping[V, List[D]] = csp.domains
+        # With inference the domains only ever hold values legal for the assignment
+        self.propagating = inference is not None
+        # Branch and bound: says when the branch just entered cannot beat the incumbent
+        self.cutoff: Optional[Callable[[], bool]] = None
+
+        # Unassigned variables are tracked as the search goes instead of rescanning
+        # csp.variables; the cursor is where the first unassigned one may be found.
+        self.position: Dict[V, int] = {variable: i for i, variable in enumerate(csp.variables)}
+        self.unassigned: Dict[V, None] = dict.fromkeys(csp.variables)
+        self._cursor = 0
+        # Unassigned variables left in each constraint, and for every unassigned variable the
+        # number of its constraints that still reach another one: the degree heuristic.
+        self.open: Dict[Constraint[V, D], int] = {}
+        for variable in csp.variables:
+            for constraint in csp.constraints[variable]:
+                self.open[constraint] = len(constraint.variables)
+        self.degrees: Dict[V, int] = {variable: self._count_degree(variable) for variable in csp.variables}
+        # Legal value counts bucketed by size, kept up to date once an MRV ordering asks for them
+        self._remaining: Optional[Dict[V, int]] = None
+        self._buckets: Dict[int, Dict[V, None]] = {}
+
+        self.states: Dict[IncrementalConstraint[V, D], Any] = {}
+        self.incremental: Dict[V, List[IncrementalConstraint[V, D]]] = {}
+        for variable in csp.variables:
+            for constraint in csp.constraints[variable]:
+                if isinstance(constraint, IncrementalConstraint):
+                    if constraint not in self.states:
+                        self.states[constraint] = constraint.new_state()
+                    self.incremental.setdefault(variable, []).append(constraint)
+        # A caller-supplied assignment is checked value by value like any other;
+        # run() returns None straight away when it is already inconsistent.
+        self.infeasible = False
+        for variable, value in assignment.items():
+            if not self.consistent(variable, value):
+                self.infeasible = True
+            self.assign(variable, value)
+
+    # Set a value where the constraints see it, without the ordering bookkeeping of assign().
+    # Value orderings and AC-3 probe candidate values this way and lift them straight after.
+    def place(self, variable: V, value: D) -> None:
+        self.assignment[variable] = value
+        for constraint in self.incremental.get(variable, ()):
+            constraint.on_assign(self.states[constraint], variable, value)
+
+    def lift(self, variable: V) -> None:
+        value = self.assignment.pop(variable)
+        for constraint in self.incremental.get(variable, ()):
+            constraint.on_unassign(self.states[constraint], variable, value)
+
+    def assign(self, variable: V, value: D) -> None:
+        self.place(variable, value)
+        self.unassigned.pop(variable, None)
+        for linked in self.csp.constraints.get(variable, ()):
+            self.open[linked] -= 1
+            if self.open[linked] == 1:
+                self._shift_degree(linked, variable, -1)
+        if self._remaining is not None:
+            self._drop_remaining(variable)
+            if not self.propagating:
+                self._recount_neighbours(variable)
+
+    def unassign(self, variable: V) -> None:
+        self.lift(variable)
+        self.unassigned[variable] = None
+        if self.position[variable] < self._cursor:
+            self._cursor = self.position[variable]
+        for linked in self.csp.constraints[variable]:
+            self.open[linked] += 1
+            if self.open[linked] == 2:
+                self._shift_degree(linked, variable, 1)
+        self.degrees[variable] = self._count_degree(variable)
+        if self._remaining is not None:
+            self._set_remaining(variable, len(self.legal_values(variable)))
+            if not self.propagating:
+                self._recount_neighbours(variable)
+
+    def first_unassigned(self) -> V:
+        variables, assignment = self.csp.variables, self.assignment
+        while variables[self._cursor] in assignment:
+            self._cursor += 1
+        return variables[self._cursor]
+
+    # Number of constraints linking the unassigned variable to other unassigned variables.
+    def degree(self, variable: V) -> int:
+        return self.degrees[variable]
+
+    def _count_degree(self, variable: V) -> int:
+        open_ = self.open
+        return sum(1 for constraint in self.csp.constraints[variable] if open_[constraint] >= 2)
+
+    # The constraint just closed or reopened for its one other unassigned variable.
+    def _shift_degree(self, constraint: Constraint[V, D], variable: V, step: int) -> None:
+        for other in constraint.variables:
+            if other != variable and other in self.unassigned:
+                self.degrees[other] += step
+                return
+
+    # Unassigned variables with the fewest legal values left. The counts are kept per
+    # variable and only updated where an assignment, prune or undo can change them.
+    def most_constrained(self) -> Dict[V, None]:
+        if self._remaining is None:
+            self._remaining = {}
+            for variable in self.unassigned:
+                self._set_remaining(variable, len(self.legal_values(variable)))
+        return self._buckets[min(self._buckets)]
+
+    def _set_remaining(self, variable: V, count: int) -> None:
+        assert self._remaining is not None
+        previous = self._remaining.get(variable)
+        if previous == count:
+            return
+        if previous is not None:
+            self._discard_from_bucket(variable, previous)
+        self._remaining[variable] = count
+        self._buckets.setdefault(count, {})[variable] = None
+
+    def _drop_remaining(self, variable: V) -> None:
+        assert self._remaining is not None
+        previous = self._remaining.pop(variable, None)
+        if previous is not None:
+            self._discard_from_bucket(variable, previous)
+
+    def _discard_from_bucket(self, variable: V, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[variable]
+        if not bucket:
+            del self._buckets[count]
+
+    # Without inference the legal values of a variable change whenever a neighbour's value does.
+    def _recount_neighbours(self, variable: V) -> None:
+        seen = {variable}
+        for constraint in self.csp.constraints[variable]:
+            for other in constraint.variables:
+                if other not in seen and other in self.unassigned:
+                    seen.add(other)
+                    self._set_remaining(other, len(self.legal_values(other)))
+
+    # Values the variable can still take without violating a constraint against the assignment.
+    def legal_values(self, variable: V) -> List[D]:
+        if variable in self.assignment:
+            return [self.assignment[variable]]
+        if self.propagating:
+            return self.domains[variable]
+        return [value for value in self.domains[variable] if self.consistent(variable, value)]
+
+    def emit(self, event: str, variable: Optional[V], value: Any) -> None:
+        for hook in self.hooks:
+            hook(event, variable, value)
+
+    # Whether giving the unassigned variable this value keeps the constraint satisfied.
+    # Every check is counted per constraint class; one in _TIMING_SAMPLE is also timed.
+    def allows(self, constraint: Constraint[V, D], variable: V, value: D) -> bool:
+        stats = self.stats
+        stats.checks += 1
+        timed = not stats.checks % _TIMING_SAMPLE
+        if timed:
+            started = perf_counter()
+        if isinstance(constraint, IncrementalConstraint):
+            allowed = constraint.accepts(self.states[constraint], variable, value)
+        else:
+            assignment = self.assignment
+            assignment[variable] = value
+            try:
+                allowed = constraint.satisfied(assignment)
+            finally:
+                del assignment[variable]
+        counts = stats.check_counts
+        kind = type(constraint)
+        counts[kind] = counts.get(kind, 0) + 1
+        if timed:
+            stats.record_time(kind, (perf_counter() - started) * _TIMING_SAMPLE)
+        return allowed
+
+    def consistent(self, variable: V, value: D) -> bool:
+        return all(self.allows(constraint, variable, value) for constraint in self.csp.constraints[variable])
+
+    # AC-3 support: whether some value of y is allowed by the constraints once x takes value.
+    def supported(self, x: V, value: D, y: V, candidates: List[D], constraints: List[Constraint[V, D]]) -> bool:
+        if x in self.assignment:
+            return value == self.assignment[x]
+        if y in self.assignment:
+            return all(self.allows(constraint, x, value) for constraint in constraints)
+        self.place(x, value)
+        try:
+            return any(all(self.allows(constraint, y, other) for constraint in constraints) for other in candidates)
+        finally:
+            self.lift(x)
 
-            # Restore the original domain after exploring a subdomain
-            self.domains[first] = original_domain
+    # Replace a domain for the rest of the current branch.
+    def prune(self, variable: V, values: List[D]) -> None:
+        self.emit("prune", variable, values)
+        self.trail.append((variable, self.domains[variable]))
+        self.domains[variable] = values  # type: ignore[index]
+        if self._remaining is not None and variable in self.unassigned:
+            self._set_remaining(variable, len(values))
 
+    # Starting domains: the CSP's own, AC-3 pruned copies, or, when propagating,
+    # private copies holding only the values legal for the initial assignment.
+    def _initial_domains(self) -> Optional[Mapping[V, List[D]]]:
+        if self.infeasible:
+            return None
+        if self.inference is None and not self.arc_consistency:
+            return self.csp.domains
+        self.propagating = False
+        domains: Dict[V, List[D]] = {variable: self.legal_values(variable) for variable in self.csp.variables}
+        self.propagating = self.inference is not None
+        if any(not values for values in domains.values()):
+            return None
+        if self.arc_consistency and not self.csp.ac3(domains, context=self):
+            return None
+        return domains
+
+    def _undo(self, mark: int) -> None:
+        trail, domains = self.trail, self.domains
+        while len(trail) > mark:
+            variable, previous = trail.pop()
+            domains[variable] = previous  # type: ignore[index]
+            if self._remaining is not None and variable in self.unassigned:
+                self._set_remaining(variable, len(previous))
+
+    # Choose the next variable and push a frame iterating over its ordered legal values.
+    def _frame(self) -> Tuple[V, Iterator[D], int]:
+        variable = self.select_variable(self)
+        values = self.order_values(self, variable)
+        return variable, iter(values), len(self.trail)
+
+    # The variable to branch on next and its ordered legal values, (None, []) when the
+    # assignment is already complete, or None when propagation shows it is a dead end.
+    def branches(self) -> Optional[Tuple[Optional[V], List[D]]]:
+        domains = self._initial_domains()
+        if domains is None:
+            return None
+        self.domains = domains
+        if len(self.assignment) == len(self.csp.variables):
+            return None, []
+        variable, values, _ = self._frame()
+        return variable, list(values)
+
+    def run(self) -> Optional[Dict[V, D]]:
+        for solution in self.leaves():
+            return dict(solution)
         return None  # No solution found
 
+    def result(self, solution: Optional[Dict[V, D]]) -> SolveResult[V, D]:
+        return solve_result(solution, self.stop, dict(self.best), self.stats)
+
+    # "timeout" or "cancelled" when the search gave up before exhausting its tree
+    @property
+    def stopped(self) -> Optional[str]:
+        return self.stop.reason
+
+    # Every complete assignment below the starting one, in search order. The live
+    # assignment is yielded, not a copy: it changes as soon as the search resumes.
+    def leaves(self) -> Iterator[Dict[V, D]]:
+        return timed_search(self._search(), self.stats)
+
+    def _search(self) -> Iterator[Dict[V, D]]:
+        csp, assignment, inference = self.csp, self.assignment, self.inference
+        self.stop.resume()
+        domains = self._initial_domains()
+        if domains is None:
+            return
+        self.domains = domains
+        self.best = dict(assignment)
+        total = len(csp.variables)
+        if len(assignment) == total:
+            self.emit("solution", None, assignment)
+            yield assignment
+            return
+        if self.backjumping:
+            yield from self._backjumping_leaves()
+            return
+
+        stop = self.stop if self.stop.active else None
+        cutoff = self.cutoff
+        nodes = 0
+        stack: List[Tuple[V, Iterator[D], int]] = [self._frame()]
+        while stack:
+            nodes += 1
+            if stop is not None and nodes % STOP_CHECK_INTERVAL == 0 and stop():
+                return
+            variable, values, mark = stack[-1]
+            # Take back the value tried last in this frame
+            if variable in assignment:
+                self.unassign(variable)
+            self._undo(mark)
+
+            value = next(values, _EXHAUSTED)
+            if value is _EXHAUSTED:
+                stack.pop()
+                self.stats.backtracks += 1
+                self.emit("backtrack", variable, None)
+                continue
+
+            # Every value comes from the legal domain; prune the neighbours before going deeper
+            self.assign(variable, value)  # type: ignore[arg-type]
+            self.stats.nodes += 1
+            self.emit("node", variable, value)
+            if (inference is None or inference(self, variable)) and (cutoff is None or not cutoff()):
+                if len(assignment) > len(self.best):
+                    self.best = dict(assignment)
+                if len(assignment) == total:
+                    self.emit("solution", None, assignment)
+                    self.stop.pause()
+                    yield assignment
+                    self.stop.resume()
+                else:
+                    stack.append(self._frame())
+
+    # Conflict-directed backjumping. Every frame keeps a conflict set: the earlier
+    # variables that explain why its values failed. When a frame runs out of values
+    # the search jumps straight back to the deepest variable in that set, skipping the
+    # frames in between, and the failing partial assignment is stored as a nogood.
+    # After a solution has been found below a frame it backtracks chronologically,
+    # so enumeration still visits every solution.
+    def _backjumping_leaves(self) -> Iterator[Dict[V, D]]:
+        assignment, inference, nogoods = self.assignment, self.inference, self.nogoods
+        total = len(self.csp.variables)
+        self.base = dict(self.domains)
+        # Frames hold [variable, values, trail mark, conflict set, solution found below]
+        stack: List[List[Any]] = []
+        level: Dict[V, int] = {}
+
+        def push() -> None:
+            variable, ordered, mark = self._frame()
+            values = list(ordered)
+            level[variable] = len(stack)
+            stack.append([variable, iter(values), mark, self._excluded_culprits(variable, values), False])
+
+        stop = self.stop if self.stop.active else None
+        nodes = 0
+        push()
+        while stack:
+            nodes += 1
+            if stop is not None and nodes % STOP_CHECK_INTERVAL == 0 and stop():
+                return
+            frame = stack[-1]
+            variable, values, mark, conflicts = frame[0], frame[1], frame[2], frame[3]
+            if variable in assignment:
+                self.unassign(variable)
+            self._undo(mark)
+
+            value = next(values, _EXHAUSTED)
+            if value is _EXHAUSTED:
+                stack.pop()
+                del level[variable]
+                self.stats.backtracks += 1
+                self.emit("backtrack", variable, None)
+                if frame[4]:
+                    continue  # chronological once a solution was found below
+                nogoods.add([(culprit, assignment[culprit]) for culprit in conflicts])
+                target = max((level[culprit] for culprit in conflicts if culprit in level), default=-1)
+                if target < 0:
+                    return  # the failure does not depend on any choice of this search
+                while len(stack) > target + 1:
+                    skipped = stack.pop()
+                    del level[skipped[0]]
+                    self.unassign(skipped[0])
+                    self._undo(skipped[2])
+                jumped_to = stack[-1]
+                jumped_to[3].update(dict.fromkeys(culprit for culprit in conflicts if culprit != jumped_to[0]))
+                continue
+
+            clash = nogoods.clash(variable, value, assignment)  # type: ignore[arg-type]
+            if clash is not None:
+                conflicts.update(dict.fromkeys(clash))
+                continue
+            self.assign(variable, value)  # type: ignore[arg-type]
+            self.stats.nodes += 1
+            self.emit("node", variable, value)
+            trail_mark = len(self.trail)
+            if inference is not None and not inference(self, variable):
+                conflicts.update(self._wipeout_culprits(variable, trail_mark))
+                continue
+            if len(assignment) > len(self.best):
+                self.best = dict(assignment)
+            if len(assignment) == total:
+                for solved in stack:
+                    solved[4] = True
+                self.emit("solution", None, assignment)
+                self.stop.pause()
+                yield assignment
+                self.stop.resume()
+            else:
+                push()
+
+    # Earlier variables explaining why the values left out of a new frame are illegal.
+    def _excluded_culprits(self, variable: V, values: List[D]) -> Dict[V, None]:
+        culprits: Dict[V, None] = {}
+        if len(values) == len(self.base[variable]):
+            return culprits
+        for value in self.base[variable]:
+            if value not in values:
+                culprits.update(self._value_culprits(variable, value))
+        return culprits
+
+    # The assigned variables of the first constraint the value violates, or every
+    # assigned variable when it was ruled out by propagation rather than directly.
+    def _value_culprits(self, variable: V, value: D) -> Dict[V, None]:
+        assignment = self.assignment
+        for constraint in self.csp.constraints[variable]:
+            if not self.allows(constraint, variable, value):
+                return {other: None for other in constraint.variables if other != variable and other in assignment}
+        return {other: None for other in assignment if other != variable}
+
+    # After inference from `variable` failed: why the emptied domain lost its values.
+    def _wipeout_culprits(self, variable: V, mark: int) -> Dict[V, None]:
+        domains = self.domains
+        for wiped, _ in self.trail[mark:]:
+            if not domains[wiped] and wiped not in self.assignment:
+                culprits: Dict[V, None] = {}
+                for value in self.base[wiped]:
+                    culprits.update(self._value_culprits(wiped, value))
+                culprits.pop(variable, None)
+                return culprits
+        return {other: None for other in self.assignment if other != variable}
+
+
+# Failing partial assignments learnt by backjumping, at most `capacity` of them; the
+# least recently used one is dropped first. Nogoods are indexed by each of their
+# (variable, value) pairs, so checking a value only looks at the nogoods that contain it.
+# Values that cannot be hashed are not learnt.
+class NogoodStore(Generic[V, D]):
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.nogoods: "OrderedDict[frozenset, None]" = OrderedDict()
+        self.index: Dict[Tuple[V, D], Dict[frozenset, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self.nogoods)
+
+    def add(self, pairs: List[Tuple[V, D]]) -> None:
+        if not self.capacity or not pairs:
+            return
+        try:
+            nogood = frozenset(pairs)
+        except TypeError:
+            return
+        if nogood in self.nogoods:
+            self.nogoods.move_to_end(nogood)
+            return
+        self.nogoods[nogood] = None
+        for pair in nogood:
+            self.index.setdefault(pair, {})[nogood] = None
+        if len(self.nogoods) > self.capacity:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for pair in evicted:
+                del self.index[pair][evicted]
+                if not self.index[pair]:
+                    del self.index[pair]
+
+    # The other variables of a stored nogood that variable = value would complete.
+    def clash(self, variable: V, value: D, assignment: Dict[V, D]) -> Optional[List[V]]:
+        if not self.nogoods:
+            return None
+        try:
+            candidates = self.index.get((variable, value))
+        except TypeError:
+            return None
+        if not candidates:
+            return None
+        for nogood in candidates:
+            if all(other == variable or assignment.get(other, _EXHAUSTED) == taken for other, taken in nogood):
+                self.nogoods.move_to_end(nogood)
+                return [other for other, _ in nogood if other != variable]
+        return None
+
+
+# One min-conflicts run. Every variable holds a value at all times. Incremental
+# constraints keep their state and count conflicts in O(1) per value; the others are
+# checked with satisfied() on the live assignment. `conflicted` holds every variable
+# in a clash: a variable that moves to a value with conflicts joins it together with
+# the variables it clashes with, and a variable leaves once it is found to have none.
+class LocalSearch(Generic[V, D]):
+    def __init__(self, csp: CSP[V, D], rng: random.Random, tabu: int, stats: SolverStats) -> None:
+        self.csp = csp
+        self.rng = rng
+        self.stats = stats
+        self.assignment: Dict[V, D] = {}
+        self.states: Dict[IncrementalConstraint[V, D], Any] = {}
+        self.incremental: Dict[V, List[IncrementalConstraint[V, D]]] = {}
+        self.plain: Dict[V, List[Constraint[V, D]]] = {}
+        for variable in csp.variables:
+            for constraint in csp.constraints[variable]:
+                if isinstance(constraint, IncrementalConstraint):
+                    if constraint not in self.states:
+                        self.states[constraint] = constraint.new_state()
+                    self.incremental.setdefault(variable, []).append(constraint)
+                else:
+                    self.plain.setdefault(variable, []).append(constraint)
+        self.conflicted: List[V] = []
+        self.slots: Dict[V, int] = {}
+        self.tabu: deque = deque(maxlen=tabu or None)
+        self.tabu_size = tabu
+
+    def place(self, variable: V, value: D) -> None:
+        self.assignment[variable] = value
+        for constraint in self.incremental.get(variable, ()):
+            constraint.on_assign(self.states[constraint], variable, value)
+
+    def lift(self, variable: V) -> D:
+        value = self.assignment.pop(variable)
+        for constraint in self.incremental.get(variable, ()):
+            constraint.on_unassign(self.states[constraint], variable, value)
+        return value
+
+    # Conflicts of the (lifted) variable taking value against everything else assigned.
+    def conflicts(self, variable: V, value: D) -> int:
+        count = 0
+        incremental = self.incremental.get(variable, ())
+        for constraint in incremental:
+            count += constraint.conflicts(self.states[constraint], variable, value)
+        plain = self.plain.get(variable, ())
+        if plain:
+            assignment = self.assignment
+            assignment[variable] = value
+            try:
+                count += sum(1 for constraint in plain if not constraint.satisfied(assignment))
+            finally:
+                del assignment[variable]
+        self.stats.checks += len(incremental) + len(plain)
+        return count
+
+    # Value of the lifted variable with the fewest conflicts, ties broken at random;
+    # the scan starts at a random value and stops at the first one without conflicts.
+    def best_value(self, variable: V) -> Tuple[D, int]:
+        domain = self.csp.domains[variable]
+        start = self.rng.randrange(len(domain))
+        best: List[D] = []
+        fewest = -1
+        for k in range(len(domain)):
+            value = domain[(start + k) % len(domain)]
+            count = self.conflicts(variable, value)
+            if count and self.tabu_size and (variable, value) in self.tabu:
+                continue
+            if not count:
+                return value, 0
+            if fewest < 0 or count < fewest:
+                best, fewest = [value], count
+            elif count == fewest:
+                best.append(value)
+        if not best:  # every value is tabu
+            return domain[start], self.conflicts(variable, domain[start])
+        return self.rng.choice(best), fewest
+
+    def mark(self, variable: V) -> None:
+        if variable not in self.slots:
+            self.slots[variable] = len(self.conflicted)
+            self.conflicted.append(variable)
+
+    # Mark what the (lifted) variable would clash with when it takes value.
+    def mark_clashes(self, variable: V, value: D) -> None:
+        for constraint in self.incremental.get(variable, ()):
+            for other in constraint.clashing(self.states[constraint], variable, value):
+                self.mark(other)
+        plain = self.plain.get(variable)
+        if plain:
+            assignment = self.assignment
+            assignment[variable] = value
+            try:
+                for violated in plain:
+                    if not violated.satisfied(assignment):
+                        for other in violated.variables:
+                            if other != variable and other in assignment:
+                                self.mark(other)
+            finally:
+                del assignment[variable]
+
+    def unmark(self, variable: V) -> None:
+        slot = self.slots.pop(variable)
+        last = self.conflicted.pop()
+        if last != variable:
+            self.conflicted[slot] = last
+            self.slots[last] = slot
+
+    def run(self, max_steps: int, assignment: Optional[Dict[V, D]]) -> Optional[Dict[V, D]]:
+        start = assignment or {}
+        for variable in self.csp.variables:
+            if variable in start:
+                value, count = start[variable], self.conflicts(variable, start[variable])
+            else:
+                value, count = self.best_value(variable)
+            if count:
+                self.mark(variable)
+                self.mark_clashes(variable, value)
+            self.place(variable, value)
+
+        for _ in range(max_steps):
+            if not self.conflicted:
+                return self.solution()
+            variable = self.conflicted[self.rng.randrange(len(self.conflicted))]
+            current = self.lift(variable)
+            if not self.conflicts(variable, current):
+                self.place(variable, current)
+                self.unmark(variable)
+                continue
+            value, count = self.best_value(variable)
+            self.stats.nodes += 1
+            if count:
+                self.mark_clashes(variable, value)
+            else:
+                self.unmark(variable)
+            self.place(variable, value)
+            if value != current and self.tabu_size:
+                self.tabu.append((variable, current))
+        return self.solution() if not self.conflicted else None
+
+    def solution(self) -> Dict[V, D]:
+        return {variable: self.assignment[variable] for variable in self.csp.variables}
+
+
+_EXHAUSTED = object()
+# Nodes expanded between two polls of the stop condition; kept small because a node
+# under MAC can take milliseconds on a large model.
+STOP_CHECK_INTERVAL = 16
+
+
+# Worker process side of CSP.parallel_search. The model and the search options are
+# sent once per process; each task only carries the partial assignment of its subtree.
+SearchOptions = Tuple[VariableOrdering, ValueOrdering, Optional[Inference], bool]
+_worker: Optional[Tuple[CSP, SearchOptions, Any]] = None
+
+
+def _init_worker(csp: CSP, options: SearchOptions, cancel: Any) -> None:
+    global _worker
+    _worker = (csp, options, cancel)
+
+
+def _solve_partition(partial: Dict) -> Optional[Dict]:
+    assert _worker is not None
+    csp, options, cancel = _worker
+    if cancel.is_set():
+        return None
+    select_variable, order_values, inference, arc_consistency = options
+    context = SearchContext(
+        csp, partial, select_variable, order_values, inference, arc_consistency, should_stop=cancel.is_set
+    )
+    return context.run()
@@ -1,10 +1,13 @@
 import datetime
 from typing import Dict, List, Optional
 
+from business_calendar import business_calendar
 from csp import Constraint, CSP
 
 
 class PublicationDependencyConstraint(Constraint[str, str]):
+    __slots__ = ("docA", "docB")
+
     def __init__(self, docA: str, docB: str):
         super().__init__([docA, docB])
         self.docA = docA
@@ -18,15 +21,9 @@ class PublicationDependencyConstraint(Constraint[str, str]):
         return assignment[self.docA] < assignment[self.docB]
 
 
+# 시작일과 마감일 사이(양 끝 포함)의 영업일 목록. 주말과 공휴일을 뺀다.
 def date_range(start_date, end_date, holidays):
-    delta: datetime.timedelta = datetime.timedelta(days=1)
-    current_date: datetime.date = start_date
-    while current_date <= end_date:
-        if current_date.weekday() >= 5 or current_date in holidays:
-            pass
-        else:
-            yield current_date
-        current_date += delta
+    return business_calendar(holidays).days(start_date, end_date)
 
 if __name__ == "__main__":
     variables: List[str] = ["요구사항 명세서", "요구사항 명세 검증보고서", "시스템 시험 계획서","요구사항 안전성 분석 보고서", "설계 명세서"]
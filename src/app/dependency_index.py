@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Dependency graph of the publication documents, built once per version of the sheet
+# and then only read: adjacency lists, a topological order, the transitive reduction
+# and the weakly connected components.
+#
+#   index = DependencyIndex(documents, dependencies)
+#   index.order          documents, each after every document it depends on
+#   index.reduction      the dependencies not implied by others
+#   index.components     groups of documents no dependency links to one another
+#
+# A dependency (before, after) means `after` is published after `before`.
+
+
+class DependencyIndex:
+    def __init__(self, documents: Sequence[str], dependencies: Iterable[Sequence[str]]) -> None:
+        self.documents: List[str] = list(documents)
+        self.successors: Dict[str, List[str]] = {doc: [] for doc in self.documents}
+        self.predecessors: Dict[str, List[str]] = {doc: [] for doc in self.documents}
+        # Every distinct dependency, in the order given; a document may have any number
+        self.edges: List[Tuple[str, str]] = []
+        seen = set()
+        for before, after in dependencies:
+            if before not in self.successors or after not in self.successors:
+                raise LookupError("문서 목록에 없는 문서입니다.")
+            if (before, after) not in seen:
+                seen.add((before, after))
+                self.edges.append((before, after))
+                self.successors[before].append(after)
+                self.predecessors[after].append(before)
+        self.order = self._topological_order()
+        self.reduction = self._transitive_reduction()
+        self.components = self._components()
+
+    def __repr__(self) -> str:
+        return f"DependencyIndex({len(self.documents)} documents, {len(self.edges)} dependencies)"
+
+    # Kahn's algorithm; ties go to the document listed first.
+    def _topological_order(self) -> List[str]:
+        incoming = {doc: len(self.predecessors[doc]) for doc in self.documents}
+        ready = deque(doc for doc in self.documents if not incoming[doc])
+        order: List[str] = []
+        while ready:
+            doc = ready.popleft()
+            order.append(doc)
+            for after in self.successors[doc]:
+                incoming[after] -= 1
+                if not incoming[after]:
+                    ready.append(after)
+        if len(order) < len(self.documents):
+            raise ValueError("문서 의존성에 순환이 있습니다.")
+        return order
+
+    # A dependency is implied when its later document is also reached through another
+    # successor. Descendant sets are bitmasks over the topological order, built from the
+    # last document back, so the whole reduction takes O(V * E / wordsize).
+    def _transitive_reduction(self) -> List[Tuple[str, str]]:
+        position = {doc: i for i, doc in enumerate(self.order)}
+        below: Dict[str, int] = {}
+        implied = set()
+        for doc in reversed(self.order):
+            reached = 0
+            for after in self.successors[doc]:
+                reached |= below[after]
+            for after in self.successors[doc]:
+                if reached >> position[after] & 1:
+                    implied.add((doc, after))
+            for after in self.successors[doc]:
+                reached |= 1 << position[after]
+            below[doc] = reached
+        return [edge for edge in self.edges if edge not in implied]
+
+    # Weakly connected components, each in topological order, largest first.
+    def _components(self) -> List[List[str]]:
+        group: Dict[str, int] = {}
+        sizes: List[int] = []
+        for doc in self.documents:
+            if doc in group:
+                continue
+            group[doc] = len(sizes)
+            pending, size = [doc], 0
+            while pending:
+                current = pending.pop()
+                size += 1
+                for other in self.successors[current] + self.predecessors[current]:
+                    if other not in group:
+                        group[other] = len(sizes)
+                        pending.append(other)
+            sizes.append(size)
+        components: List[List[str]] = [[] for _ in sizes]
+        for doc in self.order:
+            components[group[doc]].append(doc)
+        return sorted(components, key=len, reverse=True)
@@ -0,0 +1,56 @@
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# The document dependency sheet, parsed from Excel once per version of the file. The
+# cleaned frame is stored next to the sheet as a Parquet sidecar that records which
+# version of the sheet it came from; later loads memory-map the sidecar instead of
+# parsing the workbook again, until the sheet is saved anew.
+
+# Schema metadata key holding the version stamp of the sheet a sidecar was made from
+SOURCE_KEY = b"source"
+
+
+def sidecar_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.parquet")
+
+
+# Modification time and size of the sheet: a new stamp whenever the file is saved.
+def sheet_stamp(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+# Non-breaking spaces from the workbook become plain spaces, so document names match.
+def clean_sheet(df: pd.DataFrame) -> pd.DataFrame:
+    return df.replace("\xa0", " ", regex=True)
+
+
+def read_dependency_sheet(path: str) -> pd.DataFrame:
+    stamp = sheet_stamp(path)
+    sidecar = sidecar_path(path)
+    try:
+        table = pq.read_table(sidecar, memory_map=True)
+        if (table.schema.metadata or {}).get(SOURCE_KEY) == stamp.encode():
+            return table.to_pandas()
+    except (OSError, ValueError):
+        pass  # missing or unreadable sidecar: parse the sheet
+    df = clean_sheet(pd.read_excel(path))
+    try:
+        _write_sidecar(df, sidecar, stamp)
+    except OSError:
+        pass  # a read-only directory only costs the next start a parse
+    return df
+
+
+# Written to a temporary file and renamed, so a reader never sees half a file.
+def _write_sidecar(df: pd.DataFrame, sidecar: str, stamp: str) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_KEY: stamp.encode()})
+    temporary = f"{sidecar}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(table, temporary)
+    os.replace(temporary, sidecar)
@@ -1,44 +1,60 @@
 import datetime
+import threading
+import time
+from functools import partial
+from itertools import chain, islice
 
-import networkx as nx
+import altair as alt
 import pandas as pd
 import streamlit as st
 from st_aggrid import AgGrid
-
-from csp import CSP
-from date_generation import PublicationDependencyConstraint, date_range
-
-# Load the Excel data and clean it
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from compiled_csp import CompiledCSP
+from csp import forward_checking, least_constraining_value, mrv_degree
+from date_generation import date_range
+from dependency_index import DependencyIndex
+from dependency_sheet import read_dependency_sheet, sheet_stamp
+from publication_schedule import (
+    allocate_dates_with_csp,
+    build_publication_csp,
+    filter_documents,
+    schedule_windows,
+    select_publication_stages,
+)
+from scenario_sweep import STAGES, ScenarioSweep
+from schedule_objectives import earliest_finish, even_spacing, review_gap_violations
+from solution_cache import SolutionCache
+from solve_service import SolveService
+from temporal_network import schedule_dependencies
+
+SHEET_PATH = "./resource/문서의존성.xlsx"
+
+
+# Load the Excel data and clean it. The cleaned sheet is kept across reruns and sessions
+# until the file changes, and across restarts in its Parquet sidecar.
 def load_data():
-    df = pd.read_excel("./resource/문서의존성.xlsx")
-    df.replace("\xa0", " ", regex=True, inplace=True)
-    return df
+    return cached_sheet(SHEET_PATH, sheet_stamp(SHEET_PATH))
 
 
-# Create dependency edges from the dataframe
-def create_dependency_edges_reserved(dependency_list, configs):
-    dependencies = [[elem, lst[0], 1] for lst in dependency_list for elem in lst[1:] if not pd.isna(elem)]
-    return dependencies
+# The stamp is only there to key the cache: a saved sheet gets a new one
+@st.cache_data
+def cached_sheet(path, stamp):
+    return read_dependency_sheet(path)
 
-def create_dependency_edges(dependency_list, configs):
-    dependencies = [[elem, lst[0]] for lst in dependency_list for elem in lst[1:] if not pd.isna(elem)]
-    return dependencies
 
-# Sort the documents based on their dependencies
+# Sort the documents based on their dependencies; every dependency is kept, however
+# many a document has.
 def sort_ordered_docs(documents, dependencies):
-    G = nx.DiGraph()
-    G.add_nodes_from(documents)
-    G.add_edges_from(dependencies)
-    ordered_docs = list(nx.topological_sort(G))
-    date_dependencies = {docA: docB for docA, docB in dependencies}
-    return ordered_docs, date_dependencies
+    index = DependencyIndex(documents, dependencies)
+    return index.order, index.edges
 
 
-# Select the publication stages from the dataframe
-def select_publication_stages(stage, configs):
-    dependency_list = stage.loc[:, "문서명":].values.tolist()
-    documents, dependencies = stage["문서명"].values.tolist(), create_dependency_edges(dependency_list, configs)
-    return (documents, dependencies)
+# Dependency graph of the documents the filters keep, built once per version of the sheet.
+# The documents and dependencies are not hashed: the stamp and the filters determine them.
+@st.cache_resource
+def dependency_index(stamp, safety_analysis_included, cyber_security_included, _documents, _dependencies):
+    return DependencyIndex(_documents, _dependencies)
 
 
 # Allocate publication dates for documents between start_date and end_date.
@@ -46,35 +62,314 @@ def select_publication_stages(stage, configs):
 def allocate_dates(start_date, end_date, holidays, acc_docs):
     pass
 
-def allocate_dates_with_csp(spec, design, impl, end, holidays, documents, constraints):
-    spec_date_list = list(date_range(spec, design, holidays))
-    design_date_list = list(date_range(design, impl, holidays))
-    remaining_date_list = list(date_range(impl, end, holidays))
-
-    variables = documents
-    domains = {}
-
-    for variable in variables:
-        if variable == "요구사항 명세서":
-            domains[variable] = [spec]
-        elif variable == "설계 명세서":
-            domains[variable] = [design]
-        elif variable == "소스코드 구현명세서":
-            domains[variable] = [impl]
-        elif variable in ["요구사항 명세 검증보고서", "시스템 시험 계획서", "요구사항 안전성 분석 보고서", "요건단계 사이버보안 평가 보고서"]:
-            domains[variable] = spec_date_list
-        elif variable in ["설계 명세 검증보고서", "컴포넌트 시험 계획서", "통합시험 계획서", "설계 안전성 분석 보고서", "설계단계 사이버보안 평가 보고서"]:
-            domains[variable] = design_date_list
-        else:
-            domains[variable] = remaining_date_list
-
-    csp = CSP[str, datetime.date](variables, domains)
-
-    for docA, docB in constraints:
-        csp.add_constraint(PublicationDependencyConstraint(docA, docB))
-    
-    return csp.backtracking_search()
 
+# First schedules of the configurations submitted so far, shared by every session and
+# kept on disk across restarts.
+@st.cache_resource
+def solution_cache():
+    return SolutionCache(capacity=256, directory=".solution_cache")
+
+
+# Seconds of search allowed for one set of inputs, over every page of schedules
+SEARCH_TIMEOUT = 10
+
+
+# Earliest and latest dates of every document in one pass over the dependencies, or the
+# chain of documents that cannot fit their stages.
+def schedule_timeline(spec, design, impl, end, holidays, documents, constraints):
+    windows = schedule_windows(spec, design, impl, end, documents)
+    return schedule_dependencies(documents, constraints, windows, holidays)
+
+
+# Alternative schedules, found lazily: the search resumes where the last page stopped.
+# The solver is returned too, for its stats and, when the search gives up, its best partial schedule.
+# A configuration submitted before, by any session, starts with its cached first schedule;
+# otherwise, given the schedule shown before the inputs changed, the first one is that
+# schedule repaired: only the documents the change affects get new dates. Given the
+# timeline, an infeasible configuration is not searched at all, and a feasible one
+# starts with every document on its earliest date unless a cached or repaired schedule comes first.
+def iter_dates_with_csp(
+    spec, design, impl, end, holidays, documents, constraints, cancel=None, previous=None, cache=None, timeline=None
+):
+    csp = build_publication_csp(spec, design, impl, end, holidays, documents, constraints)
+    solver = CompiledCSP(csp)
+    if timeline is not None and not timeline.feasible:
+        return iter([]), solver
+    schedules = solver.iter_solutions(timeout=SEARCH_TIMEOUT, cancel=cancel)
+    if cache is not None:
+        key = csp.fingerprint()
+        found, first = cache.get(key)
+        if found:
+            if first is None:
+                return iter([]), solver
+            return chain([first], (schedule for schedule in schedules if schedule != first)), solver
+        schedules = remember_first(schedules, solver, cache, key)
+    if previous:
+        repaired = csp.repair(
+            previous, mrv_degree, least_constraining_value, forward_checking, timeout=SEARCH_TIMEOUT, cancel=cancel
+        )
+        if repaired.solved:
+            first = repaired.assignment
+            return chain([first], (schedule for schedule in schedules if schedule != first)), solver
+    if timeline is not None:
+        first = timeline.earliest
+        schedules = chain([first], (schedule for schedule in schedules if schedule != first))
+    return schedules, solver
+
+
+# What the first schedule shown should be best at; the first one is whatever the search
+# reaches first, which bunches documents onto the first days of their stages.
+SCHEDULE_GOALS = ["첫 번째 일정", "가장 빠른 완료", "고른 검토 분포", "검토 기간 확보"]
+# Business days a document needs to review the one it depends on, for "검토 기간 확보"
+REVIEW_DAYS = 2
+
+
+# The best schedule for the goal by branch and bound, or, when SEARCH_TIMEOUT runs out,
+# the best one found so far. Every improvement is passed to `on_improve` as it is found.
+def optimize_dates_with_csp(
+    spec, design, impl, end, holidays, documents, constraints, goal, cancel=None, on_improve=None, watch=None
+):
+    csp = build_publication_csp(spec, design, impl, end, holidays, documents, constraints)
+    if watch is not None:
+        watch(csp)
+    if goal == "가장 빠른 완료":
+        objective, bound = earliest_finish()
+    elif goal == "고른 검토 분포":
+        objective, bound = even_spacing()
+    else:
+        objective, bound = review_gap_violations(constraints, REVIEW_DAYS, holidays)
+    return csp.optimize(
+        objective,
+        bound,
+        select_variable=mrv_degree,
+        inference=forward_checking,
+        on_improve=on_improve,
+        timeout=SEARCH_TIMEOUT,
+        cancel=cancel,
+    )
+
+
+# Solves run on worker threads shared by every session of the server, so a page never
+# blocks on one and concurrent users take turns (see SolveService).
+SOLVE_WORKERS = 2
+SOLVES_PER_USER = 2
+
+
+@st.cache_resource
+def solve_service():
+    return SolveService(workers=SOLVE_WORKERS, per_user=SOLVES_PER_USER)
+
+
+def session_id():
+    return get_script_run_ctx().session_id
+
+
+# Everything a submitted configuration needs before its first page is shown; runs on a
+# solve worker, so it must not touch the page or the session state.
+def search_schedules(job, spec, design, impl, end, holidays, documents, constraints, goal, previous, cache):
+    timeline = schedule_timeline(spec, design, impl, end, holidays, documents, constraints)
+    optimized = None
+    if goal != SCHEDULE_GOALS[0] and timeline.feasible:
+
+        def improved(schedule, cost):
+            job.note = f"{goal}: 비용 {cost:g}인 일정을 찾았습니다. 더 나은 일정을 찾는 중..."
+
+        optimized = optimize_dates_with_csp(
+            spec, design, impl, end, holidays, documents, constraints, goal, job.cancel, improved, job.watch
+        )
+    schedules, solver = iter_dates_with_csp(
+        spec, design, impl, end, holidays, documents, constraints, job.cancel, previous, cache, timeline
+    )
+    job.watch(solver)
+    if optimized is not None and optimized.found:
+        best = optimized.assignment
+        schedules = chain([best], (schedule for schedule in schedules if schedule != best))
+    return {
+        "timeline": timeline,
+        "windows": schedule_windows(spec, design, impl, end, documents),
+        "schedules": schedules,
+        "solver": solver,
+        "optimized": (goal, optimized) if optimized is not None and optimized.found else None,
+        "page": list(islice(schedules, SCHEDULES_PER_PAGE)),
+    }
+
+
+# Hand the finished search over to the session: its first page and the schedules after it.
+def receive_schedules(result):
+    for name in ["timeline", "windows", "schedules", "solver"]:
+        st.session_state[name] = result[name]
+    st.session_state.pop("optimized", None)
+    if result["optimized"] is not None:
+        st.session_state["optimized"] = result["optimized"]
+    st.session_state["schedule_offset"] = 0
+    st.session_state["schedule_page"] = result["page"]
+
+
+# Queue position or search counters of a job still on the solve workers; the bar
+# measures its time against SEARCH_TIMEOUT.
+def show_search_progress(job):
+    if job.status == "queued":
+        st.info(f"다른 요청을 처리하는 중입니다. 대기 중인 요청 {solve_service().queued()}건")
+        return
+    stats = job.progress()
+    text = f"일정을 찾는 중: {stats.get('nodes', 0)}개 노드, {stats.get('backtracks', 0)}번 되돌림"
+    st.progress(min(1.0, job.elapsed() / SEARCH_TIMEOUT), text=text)
+    if job.note:
+        st.write(job.note)
+
+
+# Cache the first schedule once the search finds it, or None once it proves there is none.
+def remember_first(schedules, solver, cache, key):
+    found = False
+    for schedule in schedules:
+        if not found:
+            cache.put(key, schedule)
+            found = True
+        yield schedule
+    if not found and solver.stop.reason is None:
+        cache.put(key, None)
+
+
+# Streamlit reruns the script on every widget change while an earlier run may still be
+# searching; that search is cancelled as soon as a run sees different inputs.
+def cancel_stale_search(inputs):
+    if st.session_state.get("search_inputs") != inputs and "search_cancel" in st.session_state:
+        st.session_state["search_cancel"].set()
+
+
+def new_search_token(inputs):
+    cancel_stale_search(inputs)
+    st.session_state["search_inputs"] = inputs
+    st.session_state["search_cancel"] = threading.Event()
+    return st.session_state["search_cancel"]
+
+
+# Why the search ended without another schedule, with the partial schedule it got furthest with.
+def show_stopped_search(solver):
+    if solver.stop.reason == "cancelled":
+        st.write("## 입력이 바뀌어 탐색을 중단했습니다. 다시 확인을 눌러 주세요.")
+        return
+    st.write(f"## {SEARCH_TIMEOUT}초 안에 일정을 찾지 못했습니다.")
+    partial = solver.decode(solver.best)
+    if partial:
+        st.write(f"{len(partial)}/{len(solver.variables)}개 문서까지 배정한 일정")
+        st.table(pd.DataFrame(list(partial.items()), columns=["문서명", "날짜"]))
+
+
+# Why no schedule exists: the documents that push one another past the end of a stage
+def show_infeasible_timeline(timeline, windows):
+    if timeline.reason == "cycle":
+        st.write("## 문서 의존성에 순환이 있습니다.")
+        st.write(" → ".join(timeline.chain))
+        return
+    st.write("## 발행 기간 안에 끝낼 수 없는 의존 관계")
+    rows = [(doc, windows[doc][0], windows[doc][1]) for doc in timeline.chain]
+    st.table(pd.DataFrame(rows, columns=["문서명", "발행 시작일", "발행 마감일"]))
+
+
+# Search counters and constraint checks per class, compile time included
+def show_solver_stats(solver):
+    with st.expander("탐색 통계"):
+        st.table(pd.DataFrame([solver.stats.summary()]))
+        rows = solver.compile_stats.by_constraint() + solver.stats.by_constraint()
+        checks = pd.DataFrame(rows, columns=["제약 조건", "검사 횟수", "시간(초)"])
+        st.table(checks.groupby("제약 조건", as_index=False).sum())
+
+
+# Scenarios of a sweep that passed the screen and are solved with the CSP, at most
+SWEEP_SOLVES = 200
+STAGE_LABELS = {"spec": "요구사항 명세서", "design": "설계 명세서", "impl": "구현 명세서", "end": "발행 마감일"}
+
+
+# Every combination of the business days given for each stage, screened at once; the
+# scenarios that pass are then solved, up to SWEEP_SOLVES. Runs on a solve worker.
+def sweep_scenarios(job, ranges, holidays, documents, constraints):
+    sweep = ScenarioSweep(documents, constraints, schedule_windows(*STAGES, documents), holidays)
+    solved = []
+
+    def solve(stages):
+        solved.append(stages)
+        job.note = f"조건을 통과한 시나리오를 확인하는 중: {len(solved)}번째"
+        dates = [stages[stage] for stage in STAGES]
+        return allocate_dates_with_csp(*dates, holidays, documents, constraints)
+
+    return sweep.run(ranges, solve, limit=SWEEP_SOLVES, cancel=job.cancel)
+
+
+# Share of feasible scenarios for every pair of dates on the two stages chosen, over the
+# dates of the other two
+def show_sweep_heatmap(result, x, y):
+    frame = pd.DataFrame({stage: result.stages[stage] for stage in STAGES})
+    frame["가능"] = result.passed & (result.status != "unsatisfied")
+    cells = frame.groupby([x, y], as_index=False)["가능"].mean()
+    for stage in [x, y]:
+        cells[stage] = cells[stage].dt.strftime("%y.%m.%d")
+    chart = alt.Chart(cells).mark_rect().encode(
+        x=alt.X(f"{x}:O", title=STAGE_LABELS[x]),
+        y=alt.Y(f"{y}:O", title=STAGE_LABELS[y]),
+        color=alt.Color("가능:Q", title="가능한 비율", scale=alt.Scale(domain=[0, 1], scheme="redyellowgreen")),
+        tooltip=[x, y, alt.Tooltip("가능:Q", format=".0%")],
+    )
+    st.altair_chart(chart, use_container_width=True)
+    counts = result.counts()
+    st.write(
+        f"시나리오 {len(result)}개 중 {int(result.passed.sum())}개가 조건을 통과했고 "
+        f"({result.screen_seconds:.2f}초), 그중 {counts.get('solved', 0)}개를 CSP로 풀었습니다 "
+        f"({result.solve_seconds:.1f}초)."
+    )
+    if counts.get("unsatisfied"):
+        st.warning(f"조건을 통과했지만 일정이 없는 시나리오 {counts['unsatisfied']}개")
+
+
+# Ranges of dates for every stage, swept on the solve workers; shown as a heat map.
+def scenario_sweep_section(spec, design, impl, end, holidays, documents, constraints):
+    with st.expander("시나리오 분석"):
+        with st.form("시나리오 분석"):
+            defaults = {"spec": spec, "design": design, "impl": impl, "end": end}
+            ranges = {}
+            for stage in STAGES:
+                first = defaults[stage]
+                chosen = st.date_input(STAGE_LABELS[stage], value=(first, first + datetime.timedelta(days=13)))
+                ranges[stage] = date_range(chosen[0], chosen[-1], holidays)
+            x = st.selectbox("가로축", STAGES, index=1, format_func=STAGE_LABELS.get)
+            y = st.selectbox("세로축", STAGES, index=2, format_func=STAGE_LABELS.get)
+            swept = st.form_submit_button("분석")
+        if swept:
+            sweep = partial(
+                sweep_scenarios,
+                ranges=ranges,
+                holidays=holidays,
+                documents=documents,
+                constraints=constraints,
+            )
+            key = (session_id(), "sweep", tuple(tuple(ranges[stage]) for stage in STAGES), tuple(documents))
+            try:
+                st.session_state["sweep_job"] = solve_service().submit(session_id(), key, sweep)
+                st.session_state["sweep_axes"] = (x, y)
+            except RuntimeError as error:
+                st.warning(str(error))
+        if "sweep_job" in st.session_state:
+            job = st.session_state["sweep_job"]
+            if not job.finished:
+                st.info(job.note or "시나리오를 분석하는 중입니다.")
+                time.sleep(0.5)
+                st.experimental_rerun()
+            x, y = st.session_state["sweep_axes"]
+            if job.status == "done" and x == y:
+                st.warning("가로축과 세로축에 서로 다른 단계를 골라 주세요.")
+            elif job.status == "done":
+                show_sweep_heatmap(job.result, x, y)
+            elif job.status == "failed":
+                st.error(f"시나리오를 분석하다가 오류가 났습니다: {job.error}")
+
+
+SCHEDULES_PER_PAGE = 10
+
+
+# Pull the next page of schedules from the search kept in the session.
+def next_schedule_page():
+    st.session_state["schedule_offset"] += len(st.session_state["schedule_page"])
+    st.session_state["schedule_page"] = list(islice(st.session_state["schedules"], SCHEDULES_PER_PAGE))
 
 
 # Main Streamlit app
@@ -89,13 +384,7 @@ def app():
     safety_analysis_included = st.sidebar.checkbox("안전성 분석 보고서 포함", value=True)
     cyber_security_included = st.sidebar.checkbox("사이버보안 평가 보고서 포함", value=True)
 
-    if not safety_analysis_included:
-        df = df[~df['문서명'].str.contains('안전성')]
-
-    if not cyber_security_included:
-        df = df[~df['문서명'].str.contains('사이버보안')]
-    
-    filtered_df = df
+    filtered_df = filter_documents(df, safety_analysis_included, cyber_security_included)
     # Sample holidays list
     holidays = [pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-02")]
 
@@ -105,6 +394,7 @@ def app():
         design_date = st.date_input("설계 명세서 발행일", value=datetime.date.today()+datetime.timedelta(days=7))
         impl_date = st.date_input("구현 명세서 발행일", value=datetime.date.today()+datetime.timedelta(days=14))
         end_date = st.date_input("발행 마감일", value=datetime.date.today()+datetime.timedelta(days=21))
+        goal = st.selectbox("일정 기준", SCHEDULE_GOALS)
         expander = st.expander("시험 수행 소요일자")
         with expander:
             ct_dates = st.number_input("CT 시험", min_value=1, value=3)
@@ -112,22 +402,100 @@ def app():
             st_dates = st.number_input("ST 시험", min_value=1, value=3)
         submitted = st.form_submit_button('확인')
 
-    ordered_docs, date_dependencies = select_publication_stages(filtered_df, None)
-    
+    documents, dependencies = select_publication_stages(filtered_df, None)
+    index = dependency_index(
+        sheet_stamp(SHEET_PATH), safety_analysis_included, cyber_security_included, documents, dependencies
+    )
+    # Dependencies implied by others add nothing to the schedule but constraint checks
+    ordered_docs, date_dependencies = index.order, index.reduction
+    inputs = (safety_analysis_included, cyber_security_included, spec_date, design_date, impl_date, end_date, goal)
+    cancel_stale_search(inputs)
+
     if submitted:
-        allocated_dates = allocate_dates_with_csp(spec_date, design_date, impl_date, end_date, holidays, documents=ordered_docs, constraints=date_dependencies)
-        if allocate_dates is None:
+        cancel = new_search_token(inputs)
+        previous = st.session_state.get("shown_schedule")
+        fingerprint = build_publication_csp(
+            spec_date, design_date, impl_date, end_date, holidays, ordered_docs, date_dependencies
+        ).fingerprint()
+        search = partial(
+            search_schedules,
+            spec=spec_date,
+            design=design_date,
+            impl=impl_date,
+            end=end_date,
+            holidays=holidays,
+            documents=ordered_docs,
+            constraints=date_dependencies,
+            goal=goal,
+            previous=previous,
+            cache=solution_cache(),
+        )
+        try:
+            st.session_state["job"] = solve_service().submit(
+                session_id(),
+                (session_id(), fingerprint, goal),
+                search,
+                cancel=cancel,
+                refresh=True,
+            )
+        except RuntimeError as error:
+            st.warning(str(error))
+
+    # Wait for the search on the solve workers, rerunning the page to show its progress
+    if "job" in st.session_state:
+        job = st.session_state["job"]
+        if not job.finished:
+            show_search_progress(job)
+            time.sleep(0.5)
+            st.experimental_rerun()
+        del st.session_state["job"]
+        if job.status == "done":
+            receive_schedules(job.result)
+        elif job.status == "failed":
+            st.error(f"일정을 찾다가 오류가 났습니다: {job.error}")
+        else:
+            st.write("## 입력이 바뀌어 탐색을 중단했습니다. 다시 확인을 눌러 주세요.")
+
+    if "schedule_page" in st.session_state:
+        page = st.session_state["schedule_page"]
+        offset = st.session_state["schedule_offset"]
+        solver = st.session_state["solver"]
+        if not page and solver.stop.reason is not None:
+            show_stopped_search(solver)
+            show_solver_stats(solver)
+        elif not page and offset == 0:
             st.write("## Unsatisfied")
+            timeline = st.session_state["timeline"]
+            if not timeline.feasible:
+                show_infeasible_timeline(timeline, st.session_state["windows"])
+            show_solver_stats(solver)
+        elif not page:
+            st.write("## 더 이상 다른 일정이 없습니다.")
         else:
+            choice = st.selectbox("일정", range(len(page)), format_func=lambda k: f"일정 {offset + k + 1}")
+            if len(page) == SCHEDULES_PER_PAGE:
+                st.button("다음 일정", on_click=next_schedule_page)
+            allocated_dates = page[choice]
+            if "optimized" in st.session_state and offset + choice == 0:
+                optimized_goal, optimized = st.session_state["optimized"]
+                verdict = "최적" if optimized.solved else f"{SEARCH_TIMEOUT}초 안에 찾은 가장 좋은"
+                st.write(f"{verdict} 일정 ({optimized_goal}, 비용 {optimized.cost:g})")
+            st.session_state["shown_schedule"] = allocated_dates
             st.write("## dates_df")
             dates_df = pd.DataFrame(list(allocated_dates.items()), columns=["문서명", "날짜"])
             dates_df['날짜'] = pd.to_datetime(dates_df['날짜']).dt.strftime('%y.%m.%d')
-            grid_response = AgGrid(dates_df, editable=True, height=600, width=400, fit_columns_on_grid_load=True)
+            grid_column, stats_column = st.columns([2, 1])
+            with grid_column:
+                grid_response = AgGrid(dates_df, editable=True, height=600, width=400, fit_columns_on_grid_load=True)
+            with stats_column:
+                show_solver_stats(st.session_state["solver"])
             updated_df = pd.DataFrame(grid_response["data"])
 
             st.subheader("Updated DataFrame:")
             st.write(updated_df)
 
+    scenario_sweep_section(spec_date, design_date, impl_date, end_date, holidays, ordered_docs, date_dependencies)
+
     #allocated_dates = {}
 
     # Display the dates in AgGrid
@@ -1,7 +1,11 @@
+import sys
 from csp import Constraint, CSP
+from solution_cache import SolutionCache
 from typing import Dict, List, Optional
 
 class MapColoringConstraint(Constraint[str, str]):
+    __slots__ = ("place1", "place2")
+
     def __init__(self, place1: str, place2: str):
         super().__init__([place1, place2])
         self.place1: str = place1
@@ -14,7 +18,24 @@ class MapColoringConstraint(Constraint[str, str]):
         return assignment[self.place1] != assignment[self.place2]
     
 
+# method가 "min_conflicts"이면 지역 탐색으로 칠한다. 수천 개 지역의 지도도 칠할 수 있다.
+# cache가 주어지면 같은 지도를 다시 칠하지 않는다.
+def color_map(
+    csp: CSP[str, str], method: str = "backtracking", seed: Optional[int] = None, cache: Optional[SolutionCache] = None
+) -> Optional[Dict[str, str]]:
+    if method == "backtracking":
+        solve = csp.backtracking_search
+    elif method == "min_conflicts":
+        solve = lambda: csp.min_conflicts(seed=seed)  # noqa: E731
+    else:
+        raise ValueError("알 수 없는 풀이 방법입니다.")
+    if cache is None:
+        return solve()
+    return cache.cached(csp, solve, complete=method == "backtracking")
+
+
 if __name__ == "__main__":
+    method: str = sys.argv[1] if len(sys.argv) > 1 else "backtracking"
     variables: List[str] = ["WA", "NO", "SA", "QL", "NSW", "VIC", "TM"]
     domains: Dict[str, List[str]] = {}
     for variable in variables:
@@ -32,7 +53,7 @@ if __name__ == "__main__":
     csp.add_constraint(MapColoringConstraint("VIC", "NSW"))
     csp.add_constraint(MapColoringConstraint("VIC", "TM"))
 
-    solution: Optional[Dict[str, str]] = csp.backtracking_search()
+    solution: Optional[Dict[str, str]] = color_map(csp, method)
     if solution is None:
         print("There is no Answer!")
     else:
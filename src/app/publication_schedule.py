@@ -0,0 +1,97 @@
+import datetime
+
+import pandas as pd
+
+from compiled_csp import CompiledCSP
+from csp import CSP
+from date_generation import PublicationDependencyConstraint, date_range
+
+# Publication schedules from the document dependency sheet, without the page: the
+# Streamlit app (main.py) and the batch runner (batch.py) both build and solve them here.
+
+
+# Drop the safety analysis and cyber security documents the project does not publish
+def filter_documents(df, safety_analysis_included, cyber_security_included):
+    if not safety_analysis_included:
+        df = df[~df['문서명'].str.contains('안전성')]
+    if not cyber_security_included:
+        df = df[~df['문서명'].str.contains('사이버보안')]
+    return df
+
+
+# Create dependency edges from the dataframe
+def create_dependency_edges_reserved(dependency_list, configs):
+    dependencies = [[elem, lst[0], 1] for lst in dependency_list for elem in lst[1:] if not pd.isna(elem)]
+    return dependencies
+
+def create_dependency_edges(dependency_list, configs):
+    dependencies = [[elem, lst[0]] for lst in dependency_list for elem in lst[1:] if not pd.isna(elem)]
+    return dependencies
+
+
+# Select the publication stages from the dataframe
+def select_publication_stages(stage, configs):
+    dependency_list = stage.loc[:, "문서명":].values.tolist()
+    documents, dependencies = stage["문서명"].values.tolist(), create_dependency_edges(dependency_list, configs)
+    return (documents, dependencies)
+
+
+# First and last allowed publication date of every document, from the stage it belongs to
+def schedule_windows(spec, design, impl, end, documents):
+    windows = {}
+    for variable in documents:
+        if variable == "요구사항 명세서":
+            windows[variable] = (spec, spec)
+        elif variable == "설계 명세서":
+            windows[variable] = (design, design)
+        elif variable == "소스코드 구현명세서":
+            windows[variable] = (impl, impl)
+        elif variable in ["요구사항 명세 검증보고서", "시스템 시험 계획서", "요구사항 안전성 분석 보고서", "요건단계 사이버보안 평가 보고서"]:
+            windows[variable] = (spec, design)
+        elif variable in ["설계 명세 검증보고서", "컴포넌트 시험 계획서", "통합시험 계획서", "설계 안전성 분석 보고서", "설계단계 사이버보안 평가 보고서"]:
+            windows[variable] = (design, impl)
+        else:
+            windows[variable] = (impl, end)
+    return windows
+
+
+def build_publication_csp(spec, design, impl, end, holidays, documents, constraints):
+    variables = documents
+    domains = {}
+    stage_dates = {}
+
+    for variable, (first, last) in schedule_windows(spec, design, impl, end, documents).items():
+        if first == last:
+            domains[variable] = [first]
+        else:
+            if (first, last) not in stage_dates:
+                stage_dates[first, last] = list(date_range(first, last, holidays))
+            domains[variable] = stage_dates[first, last]
+
+    csp = CSP[str, datetime.date](variables, domains)
+
+    for docA, docB in constraints:
+        csp.add_constraint(PublicationDependencyConstraint(docA, docB))
+
+    # Read-only from here on, so the solve workers and the page can share it
+    return csp.freeze()
+
+
+# Publication dependencies are all binary, so solve on the compiled form:
+# AC-3, forward checking, MRV and least-constraining-value ordering run as mask operations.
+def solve_compiled(csp):
+    return CompiledCSP(csp).backtracking_search()
+
+
+# Documents in different components do not constrain one another, so each component is
+# solved on its own, in `workers` processes when there are several. Unless components
+# are given, the fixed dates of 요구사항 명세서, 설계 명세서 and 소스코드 구현명세서 cut the
+# model too (see CSP.components): the documents of one stage only meet those of the next
+# through them, so every stage is searched on its own and the schedules put together.
+def allocate_dates_with_csp(
+    spec, design, impl, end, holidays, documents, constraints, cache=None, components=None, workers=1
+):
+    csp = build_publication_csp(spec, design, impl, end, holidays, documents, constraints)
+    if cache is None:
+        return csp.solve_components(solve_compiled, components, workers)
+    return cache.cached(csp, lambda: csp.solve_components(solve_compiled, components, workers))
@@ -1,7 +1,16 @@
-from csp import Constraint, CSP
-from typing import Dict, List, Optional
+import sys
+from collections import defaultdict
+from csp import CSP, IncrementalConstraint
+from solution_cache import SolutionCache
+from typing import Dict, List, Optional, Set, Tuple
+
+# 탐색 중 행과 두 대각선마다 놓인 퀸의 열
+QueensState = Tuple[Dict[int, Set[int]], Dict[int, Set[int]], Dict[int, Set[int]]]
+
+
+class QueensConstraint(IncrementalConstraint[int, int]):
+    __slots__ = ("columns",)
 
-class QueensConstraint(Constraint[int, int]):
     def __init__(self, columns: List[int]) -> None:
         super().__init__(columns)
         self.columns: List[int] = columns
@@ -17,15 +26,70 @@ class QueensConstraint(Constraint[int, int]):
                         return False
         return True
 
+    def new_state(self) -> QueensState:
+        return defaultdict(set), defaultdict(set), defaultdict(set)
 
-if __name__ == "__main__":
-    columns: List[int] = [1,2,3,4,5,6,7,8]
+    # 행과 대각선 점유만 확인하므로 O(1)이다.
+    def accepts(self, state: QueensState, column: int, row: int) -> bool:
+        rows, diagonals, anti_diagonals = state
+        return not (rows[row] or diagonals[column - row] or anti_diagonals[column + row])
+
+    # 같은 행과 대각선에 놓인 퀸 수가 곧 충돌 수다.
+    def conflicts(self, state: QueensState, column: int, row: int) -> int:
+        rows, diagonals, anti_diagonals = state
+        return len(rows[row]) + len(diagonals[column - row]) + len(anti_diagonals[column + row])
+
+    def clashing(self, state: QueensState, column: int, row: int) -> List[int]:
+        rows, diagonals, anti_diagonals = state
+        return [*rows[row], *diagonals[column - row], *anti_diagonals[column + row]]
+
+    def on_assign(self, state: QueensState, column: int, row: int) -> None:
+        rows, diagonals, anti_diagonals = state
+        rows[row].add(column)
+        diagonals[column - row].add(column)
+        anti_diagonals[column + row].add(column)
+
+    def on_unassign(self, state: QueensState, column: int, row: int) -> None:
+        rows, diagonals, anti_diagonals = state
+        rows[row].discard(column)
+        diagonals[column - row].discard(column)
+        anti_diagonals[column + row].discard(column)
+
+
+# 모든 열이 같은 행 목록 하나를 도메인으로 공유한다. 탐색은 도메인을 바꾸지 않고
+# 새 목록으로 대체하므로 안전하며, 퀸 n개에 n² 대신 n개의 값만 저장한다.
+def queens_csp(n: int) -> CSP[int, int]:
+    columns: List[int] = list(range(1, n + 1))
+    shared_rows: List[int] = list(range(1, n + 1))
     rows: Dict[int, List[int]] = {}
-    for column in columns: 
-        rows[column] = [1,2,3,4,5,6,7,8]
+    for column in columns:
+        rows[column] = shared_rows
     csp: CSP[int, int] = CSP(columns, rows)
     csp.add_constraint(QueensConstraint(columns))
-    solution: Optional[Dict[int, int]] = csp.backtracking_search()
+    return csp
+
+
+# method가 "min_conflicts"이면 지역 탐색으로 푼다. 수천 개의 퀸은 백트래킹으로 풀 수 없다.
+# cache가 주어지면 같은 문제를 다시 풀지 않는다.
+def solve_queens(
+    n: int = 8, method: str = "backtracking", seed: Optional[int] = None, cache: Optional[SolutionCache] = None
+) -> Optional[Dict[int, int]]:
+    csp = queens_csp(n)
+    if method == "backtracking":
+        solve = csp.backtracking_search
+    elif method == "min_conflicts":
+        solve = lambda: csp.min_conflicts(seed=seed)  # noqa: E731
+    else:
+        raise ValueError("알 수 없는 풀이 방법입니다.")
+    if cache is None:
+        return solve()
+    return cache.cached(csp, solve, complete=method == "backtracking")
+
+
+if __name__ == "__main__":
+    n: int = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    method: str = sys.argv[2] if len(sys.argv) > 2 else "backtracking"
+    solution: Optional[Dict[int, int]] = solve_queens(n, method)
     if solution is None:
         print("답을 찾을 수 없습니다!")
     else:
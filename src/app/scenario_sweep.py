@@ -0,0 +1,141 @@
+import datetime
+import threading
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from business_calendar import DateLike, business_calendar
+from dependency_index import DependencyIndex
+
+# What-if sweep over the stage dates: which combinations of spec, design, impl and end
+# dates leave room for every document?
+#
+#   sweep = ScenarioSweep(documents, dependencies, windows, holidays)
+#   result = sweep.run({"spec": [...], "design": [...], "impl": [...], "end": [...]}, solve)
+#
+# `windows` names the stages that open and close each document's window, as
+# schedule_windows gives them for the stage names themselves ("spec", "spec") and so on.
+# Documents sharing a window form a class. The longest dependency chain between any two
+# classes depends only on the graph, so it is found once; a scenario is then feasible
+# exactly when, for every pair of classes, the first date of one plus that chain still
+# fits before the last date of the other. That is a handful of array comparisons over
+# all scenarios at once. Only the scenarios that pass are solved with the CSP.
+
+STAGES = ("spec", "design", "impl", "end")
+
+Window = Tuple[str, str]
+
+
+# Every combination of the stage dates given, one entry per scenario in each array.
+def scenarios(ranges: Dict[str, Sequence[DateLike]]) -> Dict[str, np.ndarray]:
+    axes = [np.asarray(ranges[stage], dtype="datetime64[D]") for stage in STAGES]
+    grids = np.meshgrid(*axes, indexing="ij")
+    return {stage: grid.ravel() for stage, grid in zip(STAGES, grids)}
+
+
+# Scenarios and what became of them: "screened" when no schedule fits the dates,
+# "solved" or "unsatisfied" by the CSP, and "unchecked" when they passed the screen but
+# were not solved, past the limit or after a cancel.
+class SweepResult:
+    def __init__(self, stages: Dict[str, np.ndarray], passed: np.ndarray, screen_seconds: float) -> None:
+        self.stages = stages
+        self.passed = passed
+        self.status = np.where(passed, "unchecked", "screened").astype(object)
+        self.schedules: Dict[int, Dict[str, datetime.date]] = {}
+        self.screen_seconds = screen_seconds
+        self.solve_seconds = 0.0
+
+    def __repr__(self) -> str:
+        return f"SweepResult({len(self.passed)} scenarios, {int(self.passed.sum())} passed)"
+
+    def __len__(self) -> int:
+        return len(self.passed)
+
+    # Stage dates of one scenario
+    def scenario(self, number: int) -> Dict[str, datetime.date]:
+        return {stage: self.stages[stage][number].item() for stage in STAGES}
+
+    def counts(self) -> Dict[str, int]:
+        statuses, counts = np.unique(self.status.astype(str), return_counts=True)
+        return dict(zip(statuses.tolist(), counts.tolist()))
+
+
+class ScenarioSweep:
+    def __init__(
+        self,
+        documents: Sequence[str],
+        dependencies: Iterable[Sequence[str]],
+        windows: Dict[str, Window],
+        holidays: Iterable[DateLike] = (),
+    ) -> None:
+        if any(doc not in windows for doc in documents):
+            raise LookupError("모든 문서에 발행 기간이 있어야 합니다.")
+        self.index = DependencyIndex(documents, dependencies)
+        self.windows = windows
+        self.calendar = business_calendar(holidays)
+        self.classes: List[Window] = sorted({windows[doc] for doc in documents})
+        self.lengths = self._chain_lengths()
+
+    def __repr__(self) -> str:
+        return f"ScenarioSweep({len(self.index.documents)} documents, {len(self.classes)} windows)"
+
+    # Edges on the longest dependency chain from a document of one class to a document of
+    # another (or the same) class, for every pair some chain joins; 0 within a class.
+    def _chain_lengths(self) -> Dict[Tuple[Window, Window], int]:
+        lengths: Dict[Tuple[Window, Window], int] = {}
+        for window in self.classes:
+            reach = {doc: 0 for doc in self.index.documents if self.windows[doc] == window}
+            for doc in self.index.order:
+                if doc in reach:
+                    for after in self.index.successors[doc]:
+                        reach[after] = max(reach.get(after, 0), reach[doc] + 1)
+            for doc, length in reach.items():
+                pair = (window, self.windows[doc])
+                lengths[pair] = max(lengths.get(pair, 0), length)
+        return lengths
+
+    # Whether each scenario leaves room for a schedule. Dates are positions as in
+    # schedule_dependencies: business day k is 2k, and a one-day window that is not a
+    # business day the odd position before the next one. A chain of n dependencies from
+    # position p ends no earlier than p + 2n, or p + 2n - 1 from an odd position.
+    def screen(self, stages: Dict[str, np.ndarray]) -> np.ndarray:
+        dates = {stage: np.asarray(stages[stage], dtype="datetime64[D]") for stage in STAGES}
+        origin = self.calendar.offset(min(days.min() for days in dates.values()), 0)
+        first: Dict[Window, np.ndarray] = {}
+        last: Dict[Window, np.ndarray] = {}
+        for window in self.classes:
+            start, end = dates[window[0]], dates[window[1]]
+            single = (start == end) & ~self.calendar.is_business_day(start)
+            first[window] = 2 * self.calendar.distance(origin, start) - single
+            last[window] = np.where(single, first[window], 2 * self.calendar.distance(origin, end + 1) - 2)
+        passed = np.ones(len(dates[STAGES[0]]), dtype=bool)
+        for (source, target), length in self.lengths.items():
+            reach = first[source] + 2 * length - first[source] % 2 if length else first[source]
+            passed &= reach <= last[target]
+        return passed
+
+    # Screen every combination of the stage dates, then solve the scenarios that pass, in
+    # order, with `solve` (stage dates to a schedule or None), up to `limit` of them.
+    def run(
+        self,
+        ranges: Dict[str, Sequence[DateLike]],
+        solve: Optional[Callable[[Dict[str, datetime.date]], Optional[Dict[str, datetime.date]]]] = None,
+        limit: Optional[int] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> SweepResult:
+        started = perf_counter()
+        stages = scenarios(ranges)
+        result = SweepResult(stages, self.screen(stages), perf_counter() - started)
+        if solve is None:
+            return result
+        started = perf_counter()
+        for number in np.flatnonzero(result.passed)[:limit].tolist():
+            if cancel is not None and cancel.is_set():
+                break
+            schedule = solve(result.scenario(number))
+            result.status[number] = "solved" if schedule is not None else "unsatisfied"
+            if schedule is not None:
+                result.schedules[number] = schedule
+        result.solve_seconds = perf_counter() - started
+        return result
@@ -0,0 +1,93 @@
+import datetime
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from business_calendar import DateLike, business_calendar
+from csp import SearchContext
+
+# Objectives for CSP.optimize on publication schedules, each with an admissible bound:
+#
+#   objective, bound = even_spacing()
+#   result = csp.optimize(objective, bound, inference=forward_checking)
+#
+# Schedules map document names to dates; costs are minimised.
+
+Schedule = Dict[str, datetime.date]
+# An objective and its bound, as CSP.optimize takes them
+Goal = Tuple[Callable[[Schedule], float], Callable[[SearchContext[str, datetime.date]], float]]
+
+
+# The last publication date. No document can end up before the earliest value left in
+# its domain, so the latest of those, and of the dates already given, bounds the finish.
+def earliest_finish() -> Goal:
+    def cost(schedule: Schedule) -> float:
+        return max(day.toordinal() for day in schedule.values())
+
+    def bound(context: SearchContext[str, datetime.date]) -> float:
+        finish = max((day.toordinal() for day in context.assignment.values()), default=0)
+        for document in context.unassigned:
+            values = context.legal_values(document)
+            if not values:
+                return float("inf")
+            finish = max(finish, min(values).toordinal())
+        return finish
+
+    return cost, bound
+
+
+# Review workload: the sum over days of the squared number of documents published that
+# day, least when the documents are spread as evenly as the windows allow. A document
+# dated on a day that already has c documents adds 2c + 1, and days only fill up, so each
+# undated document adds at least 2c + 1 for the emptiest day it can still take.
+def even_spacing() -> Goal:
+    def cost(schedule: Schedule) -> float:
+        return sum(count * count for count in Counter(schedule.values()).values())
+
+    def bound(context: SearchContext[str, datetime.date]) -> float:
+        load = Counter(context.assignment.values())
+        total = sum(count * count for count in load.values())
+        for document in context.unassigned:
+            values = context.legal_values(document)
+            if not values:
+                return float("inf")
+            total += 2 * min(load[day] for day in values) + 1
+        return total
+
+    return cost, bound
+
+
+# Dependencies published less than `gap` business days apart, leaving the later document
+# too little time to review the earlier one. A dependency counts towards the bound once
+# both dates are given, or once every value left to the undated one falls short.
+def review_gap_violations(
+    dependencies: Iterable[Tuple[str, str]], gap: int, holidays: Iterable[DateLike] = ()
+) -> Goal:
+    pairs: List[Tuple[str, str]] = [(before, after) for before, after in dependencies]
+    calendar = business_calendar(holidays)
+    epoch = datetime.date(1970, 1, 1)
+    numbers: Dict[datetime.date, int] = {}
+
+    def number(day: datetime.date) -> int:
+        if day not in numbers:
+            numbers[day] = int(calendar.distance(epoch, day))
+        return numbers[day]
+
+    def short(before: datetime.date, after: datetime.date) -> bool:
+        return number(after) - number(before) < gap
+
+    def cost(schedule: Schedule) -> float:
+        return sum(1 for before, after in pairs if short(schedule[before], schedule[after]))
+
+    def bound(context: SearchContext[str, datetime.date]) -> float:
+        assignment = context.assignment
+        violations = 0
+        for before, after in pairs:
+            if before in assignment and after in assignment:
+                violations += short(assignment[before], assignment[after])
+            elif before in assignment:
+                violations += all(short(assignment[before], day) for day in context.legal_values(after))
+            elif after in assignment:
+                violations += all(short(day, assignment[after]) for day in context.legal_values(before))
+        return violations
+
+    return cost, bound
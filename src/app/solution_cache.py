@@ -0,0 +1,122 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from csp import CSP
+
+V = TypeVar("V")  # Variable Type
+D = TypeVar("D")  # Domain Type
+
+
+# Solutions by CSP fingerprint, shared between sessions: at most `capacity` in memory,
+# least recently used dropped first. With a `directory`, entries are also pickled to
+# disk, where at most `disk_capacity` files are kept, so they outlive the process. A
+# model without a solution is cached too, as None. Safe to share between threads.
+class SolutionCache(Generic[V, D]):
+    def __init__(self, capacity: int = 128, directory: Optional[str] = None, disk_capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self.directory = directory
+        self.disk_capacity = disk_capacity
+        self.entries: "OrderedDict[str, Optional[Dict[V, D]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # (found, solution); the solution is a copy the caller may change.
+    def get(self, key: str) -> Tuple[bool, Optional[Dict[V, D]]]:
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, _copy(self.entries[key])
+        found, solution = self._read(key)
+        with self.lock:
+            if found:
+                self.hits += 1
+                self._remember(key, solution)
+            else:
+                self.misses += 1
+        return found, _copy(solution)
+
+    def put(self, key: str, solution: Optional[Dict[V, D]]) -> None:
+        solution = _copy(solution)
+        with self.lock:
+            self._remember(key, solution)
+        self._write(key, solution)
+
+    # The cached solution of the model, or the one `solve` finds, which is then cached.
+    # A None from a solver that may miss solutions, such as local search, is not cached.
+    def cached(
+        self, csp: CSP[V, D], solve: Callable[[], Optional[Dict[V, D]]], complete: bool = True
+    ) -> Optional[Dict[V, D]]:
+        key = csp.fingerprint()
+        found, solution = self.get(key)
+        if found:
+            return solution
+        solution = solve()
+        if solution is not None or complete:
+            self.put(key, solution)
+        return solution
+
+    def _remember(self, key: str, solution: Optional[Dict[V, D]]) -> None:
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        assert self.directory is not None
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _read(self, key: str) -> Tuple[bool, Optional[Dict[V, D]]]:
+        if self.directory is None:
+            return False, None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as stored:
+                solution = pickle.load(stored)
+            os.utime(path)  # the modification time orders the files for eviction
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+        return True, solution
+
+    # Written to a temporary file and renamed, so a reader never sees half a file.
+    def _write(self, key: str, solution: Optional[Dict[V, D]]) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as stored:
+            pickle.dump(solution, stored)
+        os.replace(temporary, path)
+        self._evict_files()
+
+    def _evict_files(self) -> None:
+        assert self.directory is not None
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".pickle")]
+        if len(paths) <= self.disk_capacity:
+            return
+        paths.sort(key=_modified)
+        for path in paths[: len(paths) - self.disk_capacity]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _modified(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _copy(solution: Optional[Dict[V, D]]) -> Optional[Dict[V, D]]:
+    return None if solution is None else dict(solution)
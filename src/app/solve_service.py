@@ -0,0 +1,171 @@
+import threading
+from collections import OrderedDict, deque
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+# Solves run off the script thread, on a fixed number of worker threads shared by every
+# session of the server. Jobs wait in one queue per user and the workers take them
+# round-robin across users, so one user submitting many solves cannot starve the others;
+# each user may have at most `per_user` jobs queued or running at a time.
+#
+#   job = service.submit(user, key, solve)      solve(job) runs on a worker
+#   job.finished, job.result, job.progress()
+#
+# A job is kept under its key: submitting the same key again, while the job is pending or
+# after it finished, returns that job instead of solving again, unless `refresh` asks for
+# a new solve once the old one finished. Finished jobs beyond `capacity` are forgotten,
+# oldest first.
+
+
+class Job:
+    def __init__(self, key: Hashable, user: Hashable, solve: Callable[["Job"], Any], cancel: threading.Event) -> None:
+        self.key = key
+        self.user = user
+        self.solve = solve
+        self.cancel = cancel
+        # "queued", "running", "done", "failed" (see error) or "cancelled" before it ran
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+        # A solver whose stats the job reports while it runs, and a line on how it is
+        # going; both set by `solve`
+        self.watched: Any = None
+        self.note = ""
+        self.done = threading.Event()
+
+    def __repr__(self) -> str:
+        return f"Job({self.key!r}, {self.status})"
+
+    @property
+    def finished(self) -> bool:
+        return self.done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    # Report the search counters of this solver (anything with SolverStats in `stats`).
+    def watch(self, solver: Any) -> None:
+        self.watched = solver
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.ended or perf_counter()) - self.started
+
+    # The watched solver's counters so far, read without locking: they may be a node behind.
+    def progress(self) -> Dict[str, Any]:
+        if self.watched is None:
+            return {}
+        return self.watched.stats.summary()
+
+
+class SolveService:
+    def __init__(self, workers: int = 2, per_user: int = 2, capacity: int = 64) -> None:
+        self.per_user = per_user
+        self.capacity = capacity
+        self.jobs: "OrderedDict[Hashable, Job]" = OrderedDict()
+        # Users with queued jobs, in the order they are served next
+        self.queues: "OrderedDict[Hashable, Deque[Job]]" = OrderedDict()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.threads: List[threading.Thread] = []
+        for number in range(workers):
+            thread = threading.Thread(target=self._work, name=f"solve-worker-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def __repr__(self) -> str:
+        return f"SolveService({len(self.threads)} workers, {self.queued()} queued)"
+
+    def queued(self) -> int:
+        with self.condition:
+            return sum(len(queue) for queue in self.queues.values())
+
+    # Jobs of the user queued or running and not cancelled.
+    def active(self, user: Hashable) -> int:
+        with self.condition:
+            return self._active(user)
+
+    def _active(self, user: Hashable) -> int:
+        return sum(1 for job in self.jobs.values() if job.user == user and not job.finished and not job.cancel.is_set())
+
+    # The job solving `key`, submitted now unless one is pending or done. Raises
+    # RuntimeError when the user already has `per_user` jobs queued or running.
+    def submit(
+        self,
+        user: Hashable,
+        key: Hashable,
+        solve: Callable[[Job], Any],
+        cancel: Optional[threading.Event] = None,
+        refresh: bool = False,
+    ) -> Job:
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("작업 풀이 닫혔습니다.")
+            job = self.jobs.get(key)
+            reusable = job is not None and job.status not in ("failed", "cancelled") and not job.cancel.is_set()
+            if job is not None and reusable and not (refresh and job.finished):
+                self.jobs.move_to_end(key)
+                return job
+            if self._active(user) >= self.per_user:
+                raise RuntimeError("처리 중인 요청이 너무 많습니다. 잠시 후 다시 시도해 주세요.")
+            job = Job(key, user, solve, cancel or threading.Event())
+            self.jobs[key] = job
+            self.jobs.move_to_end(key)
+            self.queues.setdefault(user, deque()).append(job)
+            self._forget_finished()
+            self.condition.notify()
+            return job
+
+    # Let the running jobs finish and stop the workers; queued jobs are cancelled.
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            for queue in self.queues.values():
+                for job in queue:
+                    job.status = "cancelled"
+                    job.done.set()
+            self.queues.clear()
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+
+    def _forget_finished(self) -> None:
+        finished = [key for key, job in self.jobs.items() if job.finished]
+        for key in finished[: max(0, len(self.jobs) - self.capacity)]:
+            del self.jobs[key]
+
+    # The first job of the user served longest ago; that user then goes to the back.
+    def _next(self) -> Optional[Job]:
+        while not self.queues and not self.closed:
+            self.condition.wait()
+        if self.closed:
+            return None
+        user, queue = self.queues.popitem(last=False)
+        job = queue.popleft()
+        if queue:
+            self.queues[user] = queue
+        return job
+
+    def _work(self) -> None:
+        while True:
+            with self.condition:
+                job = self._next()
+                if job is None:
+                    return
+                if job.cancel.is_set():
+                    job.status = "cancelled"
+                    job.done.set()
+                    continue
+                job.status = "running"
+                job.started = perf_counter()
+            try:
+                job.result = job.solve(job)
+                job.status = "done"
+            except Exception as error:  # reported to whoever waits on the job
+                job.error = error
+                job.status = "failed"
+            job.ended = perf_counter()
+            job.done.set()
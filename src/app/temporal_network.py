@@ -0,0 +1,167 @@
+import datetime
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from business_calendar import BusinessCalendar, DateLike, business_calendar
+
+# (before, after) or (before, after, lag): `after` is published at least `lag` business
+# days after `before`. Without a lag it is 1, the next business day at the earliest,
+# as PublicationDependencyConstraint requires.
+Dependency = Tuple
+
+
+# Earliest and latest business day of every document. With no chain, publishing every
+# document on its earliest (or every one on its latest) date satisfies all dependencies
+# and windows. Otherwise `chain` lists the documents from the one whose window start
+# forces the rest, through the dependencies, to the one pushed past its window end;
+# `reason` is "window", or "cycle" when the chain is a dependency cycle.
+class TemporalSchedule:
+    def __init__(
+        self,
+        earliest: Dict[str, datetime.date],
+        latest: Dict[str, datetime.date],
+        chain: List[str],
+        reason: Optional[str],
+        calendar: BusinessCalendar,
+    ) -> None:
+        self.earliest = earliest
+        self.latest = latest
+        self.chain = chain
+        self.reason = reason
+        self.calendar = calendar
+
+    def __repr__(self) -> str:
+        if self.feasible:
+            return f"TemporalSchedule({len(self.earliest)} documents)"
+        return f"TemporalSchedule({self.reason}: {' -> '.join(self.chain)})"
+
+    @property
+    def feasible(self) -> bool:
+        return self.reason is None
+
+    # Business days each document can move without moving any other past its window
+    def slack(self) -> Dict[str, int]:
+        documents = list(self.earliest)
+        earliest = [self.earliest[doc] for doc in documents]
+        latest = [self.latest[doc] for doc in documents]
+        return dict(zip(documents, self.calendar.distance(earliest, latest).tolist()))
+
+
+# Simple temporal network over precedence constraints with lags and per-document windows
+# (first, last) of allowed dates. Earliest dates come from one pass over a topological
+# order and latest dates from one pass back, in O(V + E); no search is needed.
+# `order` may be a topological order computed elsewhere, such as networkx's.
+def schedule_dependencies(
+    documents: Sequence[str],
+    dependencies: Iterable[Dependency],
+    windows: Dict[str, Tuple[DateLike, DateLike]],
+    holidays: Iterable[DateLike] = (),
+    order: Optional[Sequence[str]] = None,
+) -> TemporalSchedule:
+    index = {doc: i for i, doc in enumerate(documents)}
+    if any(doc not in windows for doc in documents):
+        raise LookupError("모든 문서에 발행 기간이 있어야 합니다.")
+    successors: List[List[Tuple[int, int]]] = [[] for _ in documents]
+    predecessors: List[List[Tuple[int, int]]] = [[] for _ in documents]
+    for dependency in dependencies:
+        before, after = dependency[0], dependency[1]
+        lag = int(dependency[2]) if len(dependency) > 2 else 1
+        if before not in index or after not in index:
+            raise LookupError("문서 목록에 없는 문서입니다.")
+        successors[index[before]].append((index[after], lag))
+        predecessors[index[after]].append((index[before], lag))
+
+    calendar = business_calendar(holidays)
+    if order is None:
+        positions = _topological_order(successors)
+        if len(positions) < len(documents):
+            cycle = _find_cycle(predecessors, set(range(len(documents))) - set(positions))
+            return TemporalSchedule({}, {}, [documents[i] for i in cycle], "cycle", calendar)
+    else:
+        positions = [index[doc] for doc in order]
+    if not documents:
+        return TemporalSchedule({}, {}, [], None, calendar)
+
+    # Dates as positions counted from a business day on or before every window: business
+    # day k is 2k. A window of one day that is not a business day, such as a fixed
+    # publication date on a weekend, is the odd position between the business days
+    # around it; any other window keeps only its business days.
+    starts = np.array([windows[doc][0] for doc in documents], dtype="datetime64[D]")
+    ends = np.array([windows[doc][1] for doc in documents], dtype="datetime64[D]")
+    origin = calendar.offset(starts.min(), 0)
+    single = (starts == ends) & ~calendar.is_business_day(starts)
+    first = (2 * calendar.distance(origin, starts) - single).tolist()
+    last = np.where(single, first, 2 * calendar.distance(origin, ends + 1) - 2).tolist()
+
+    # `lag` business days after position p, and before position q
+    earliest = list(first)
+    cause = [-1] * len(documents)
+    for v in positions:
+        for w, lag in successors[v]:
+            bound = earliest[v] + 2 * lag - earliest[v] % 2
+            if bound > earliest[w]:
+                earliest[w] = bound
+                cause[w] = v
+    # A document on an odd position cannot move: it keeps its day while the successor
+    # still fits, p + 2 * lag - 1 <= latest, as the forward pass counts
+    latest = list(last)
+    for v in reversed(positions):
+        for u, lag in predecessors[v]:
+            if first[u] % 2:
+                bound = first[u] if first[u] + 2 * lag - 1 <= latest[v] else first[u] - 1
+            else:
+                bound = latest[v] - 2 * lag + latest[v] % 2
+            if bound < latest[u]:
+                latest[u] = bound
+
+    chain: List[str] = []
+    for v in positions:
+        if earliest[v] > last[v]:
+            while v >= 0:
+                chain.append(documents[v])
+                v = cause[v]
+            chain.reverse()
+            break
+
+    # Odd positions only arise on the single days they stand for
+    def to_dates(numbers: List[int]) -> Dict[str, datetime.date]:
+        days = np.where(np.array(numbers) % 2, starts, calendar.offset(origin, np.array(numbers) // 2))
+        return dict(zip(documents, days.tolist()))
+
+    return TemporalSchedule(to_dates(earliest), to_dates(latest), chain, "window" if chain else None, calendar)
+
+
+# Kahn's algorithm; nodes on a cycle are left out.
+def _topological_order(successors: List[List[Tuple[int, int]]]) -> List[int]:
+    incoming = [0] * len(successors)
+    for edges in successors:
+        for w, _ in edges:
+            incoming[w] += 1
+    ready = deque(v for v, count in enumerate(incoming) if count == 0)
+    order: List[int] = []
+    while ready:
+        v = ready.popleft()
+        order.append(v)
+        for w, _ in successors[v]:
+            incoming[w] -= 1
+            if incoming[w] == 0:
+                ready.append(w)
+    return order
+
+
+# A cycle among the nodes Kahn's algorithm could not order. Each of them still has a
+# predecessor among them, so walking back from predecessor to predecessor must come
+# round to a node already seen. The cycle is returned in dependency order, closed.
+def _find_cycle(predecessors: List[List[Tuple[int, int]]], remaining: Set[int]) -> List[int]:
+    seen: Dict[int, int] = {}
+    path: List[int] = []
+    v = min(remaining)
+    while v not in seen:
+        seen[v] = len(path)
+        path.append(v)
+        v = next(u for u, _ in predecessors[v] if u in remaining)
+    cycle = path[seen[v] :] + [v]
+    cycle.reverse()
+    return cycle
@@ -1,7 +1,8 @@
-from typing import NamedTuple, List, Dict, Optional
+from typing import NamedTuple, List, Dict, Optional, Tuple
+from collections import Counter
 from random import choice
 from string import ascii_uppercase
-from csp import CSP , Constraint
+from csp import CSP , IncrementalConstraint
 Grid = List[List[str]]
 
 
@@ -10,16 +11,58 @@ class GridLocation(NamedTuple):
     column: int
 
 
-class WordSearchConstraint(Constraint[str, List[GridLocation]]):
+# 배치 방향별 (행, 열) 증분: 오른쪽, 오른쪽 아래 대각선, 아래, 왼쪽 아래 대각선
+DIRECTIONS: List[Tuple[int, int]] = [(0, 1), (1, 1), (1, 0), (1, -1)]
+
+
+# 단어 하나의 배치. 격자 위치 목록 대신 시작 위치, 방향, 길이만 저장하고
+# 위치는 필요할 때 계산한다. 큰 격자에서도 배치 하나가 작은 튜플 하나다.
+class Placement(NamedTuple):
+    row: int
+    column: int
+    direction: int
+    length: int
+
+    def locations(self) -> List[GridLocation]:
+        return [GridLocation(row, column) for row, column in self.cells()]
+
+    # 탐색용: GridLocation과 같은 해시를 갖는 (행, 열) 튜플. 만들기가 더 싸다.
+    def cells(self) -> List[Tuple[int, int]]:
+        row, column = self.row, self.column
+        row_step, column_step = DIRECTIONS[self.direction]
+        return [(row + k * row_step, column + k * column_step) for k in range(self.length)]
+
+
+class WordSearchConstraint(IncrementalConstraint[str, Placement]):
+    __slots__ = ("words",)
+
     def __init__(self, words: List[str]) -> None:
         super().__init__(words)
         self.words: List[str] = words
 
-    def satisfied(self, assignment: Dict[str, List[GridLocation]]) -> bool:
+    def satisfied(self, assignment: Dict[str, Placement]) -> bool:
         #중복된 격자 위치가 있다면 그 위치는 겹치는 부분이다. 
-        all_locations = [locs for values in assignment.values() for locs in values]
+        all_locations = [cell for placement in assignment.values() for cell in placement.cells()]
         return len(set(all_locations)) == len(all_locations)
 
+    #탐색 중에는 이미 배치된 단어가 차지한 격자 위치만 센다. 지역 탐색에서는 단어가 겹칠 수 있다.
+    def new_state(self) -> Counter:
+        return Counter()
+
+    def accepts(self, state: Counter, word: str, placement: Placement) -> bool:
+        occupied = state.get
+        return not any(occupied(cell) for cell in placement.cells())
+
+    def conflicts(self, state: Counter, word: str, placement: Placement) -> int:
+        occupied = state.get
+        return sum(occupied(cell, 0) for cell in placement.cells())
+
+    def on_assign(self, state: Counter, word: str, placement: Placement) -> None:
+        state.update(placement.cells())
+
+    def on_unassign(self, state: Counter, word: str, placement: Placement) -> None:
+        state.subtract(placement.cells())
+
 
 def generate_grid(rows:int, columns:int) -> Grid:
     #임의 문자로 격자를 초기화한다.
@@ -29,48 +72,38 @@ def display_grid(grid: Grid) -> None:
     for row in grid:
         print("".join(row))
 
-def generate_domain(word:str, grid:Grid)-> List[List[GridLocation]]:
-    domain: List[List[GridLocation]] = []
+def generate_domain(word:str, grid:Grid)-> List[Placement]:
+    domain: List[Placement] = []
     height: int = len(grid)
     width: int = len(grid[0])
     length: int = len(word)
     for row in range(height):
         for col in range(width):
-            columns: range = range(col, col+length+1)
-            rows: range = range(row, row+length+1)
-            if col+length <= width:
-                #왼쪽에서 오른쪽으로
-                domain.append([GridLocation(row,c) for c in columns])
-                #대각선 오른쪽 아래로
-                if row+length <= height:
-                    domain.append([GridLocation(r, col+(r-row)) for r in rows])
-            if row+length <= height:
-                #위에[서 아래로
-                domain.append([GridLocation(r, col) for r in rows])
-                #대각선 왼쪽 아래로
-                if col-length >=0:
-                    domain.append([GridLocation(r, col- (r- row)) for r in rows])
-    
+            for direction, (row_step, column_step) in enumerate(DIRECTIONS):
+                #마지막 글자도 격자 안에 있어야 한다.
+                last_row, last_col = row + (length - 1) * row_step, col + (length - 1) * column_step
+                if last_row < height and 0 <= last_col < width:
+                    domain.append(Placement(row, col, direction, length))
     return domain
 
 if __name__ == "__main__":
     grid: Grid = generate_grid(9,9)
     words: List[str] = ["MATTHEW", "JOE", "MARY", "SARAH", "SALLY"]
-    locations: Dict[str, List[List[GridLocation]]] = {}
+    locations: Dict[str, List[Placement]] = {}
     for word in words:
         locations[word] = generate_domain(word, grid)
-    csp: CSP[str, List[GridLocation]] = CSP(words, locations)
+    csp: CSP[str, Placement] = CSP(words, locations)
     csp.add_constraint(WordSearchConstraint(words))
-    solution: Optional[Dict[str, List[GridLocation]]
-                       ] = csp.backtracking_search()
+    solution: Optional[Dict[str, Placement]] = csp.backtracking_search()
     if solution is None:
         print("답을 찾을 수 없습니다.")
     else:
-        for word, grid_locations in solution.items():
+        for word, placement in solution.items():
+            grid_locations = placement.locations()
             #50% 확률로 grid_locations를 반전한다.
             if choice([True, False]):
                 grid_locations.reverse()
             for index, letter in enumerate(word):
                 (row, col) = (grid_locations[index].row, grid_locations[index].column)
                 grid[row][col] = letter
-        display_grid(grid)
\ No newline at end of file
+        display_grid(grid)
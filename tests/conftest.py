@@ -0,0 +1,22 @@
+import os
+import sys
+from typing import Tuple
+
+# The app modules import each other as top-level modules (`from csp import CSP`),
+# the same way they are run with `streamlit run src/app/main.py`.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src", "app"))
+
+from csp import CSP  # noqa: E402
+from map_coloring import MapColoringConstraint  # noqa: E402
+
+
+# Square grid of cells, each bordering the cells above, below and beside it
+def grid_map(size: int, colours: int = 3) -> CSP[Tuple[int, int], int]:
+    cells = [(row, column) for row in range(size) for column in range(size)]
+    problem: CSP[Tuple[int, int], int] = CSP(cells, {cell: list(range(colours)) for cell in cells})
+    for row, column in cells:
+        if row + 1 < size:
+            problem.add_constraint(MapColoringConstraint((row, column), (row + 1, column)))  # type: ignore[arg-type]
+        if column + 1 < size:
+            problem.add_constraint(MapColoringConstraint((row, column), (row, column + 1)))  # type: ignore[arg-type]
+    return problem
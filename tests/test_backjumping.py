@@ -0,0 +1,71 @@
+import random
+import time
+from typing import List
+
+import pytest
+
+from compiled_csp import CompiledCSP
+from csp import CSP, NogoodStore, first_unassigned, forward_checking, mac, minimum_remaining_values
+from date_generation import PublicationDependencyConstraint
+from map_coloring import MapColoringConstraint
+from queens import queens_csp
+
+
+# spec < review < approval, with approval possible only on the first two days, and eight
+# unrelated documents ordered in between: chronological backtracking would try all 10^8
+# of their dates before giving up on the chain.
+def infeasible_chain() -> CSP[str, int]:
+    documents: List[str] = ["spec"] + [f"unrelated {k}" for k in range(8)] + ["review", "approval"]
+    domains = {document: list(range(10)) for document in documents}
+    domains["approval"] = [0, 1]
+    problem: CSP[str, int] = CSP(documents, domains)
+    problem.add_constraint(PublicationDependencyConstraint("spec", "review"))
+    problem.add_constraint(PublicationDependencyConstraint("review", "approval"))
+    return problem
+
+
+@pytest.mark.parametrize("inference", [None, forward_checking, mac])
+def test_infeasible_chain_is_refuted_by_jumping_over_unrelated_documents(inference) -> None:
+    started = time.perf_counter()
+    assert infeasible_chain().backtracking_search(inference=inference, backjumping=True) is None
+    assert time.perf_counter() - started < 1
+
+
+def test_compiled_solver_refutes_the_chain_before_search() -> None:
+    started = time.perf_counter()
+    assert CompiledCSP(infeasible_chain()).backtracking_search() is None
+    assert time.perf_counter() - started < 1
+
+
+@pytest.mark.parametrize("inference", [None, forward_checking, mac])
+@pytest.mark.parametrize("select", [first_unassigned, minimum_remaining_values])
+@pytest.mark.parametrize("max_nogoods", [0, 4, 1000])
+def test_backjumping_finds_the_same_solutions(select, inference, max_nogoods) -> None:
+    rng = random.Random(0)
+    for _ in range(5):
+        regions = list(range(9))
+        problem: CSP[int, int] = CSP(regions, {region: [0, 1, 2] for region in regions})
+        for first in regions:
+            for second in regions[first + 1 :]:
+                if rng.random() < 0.35:
+                    problem.add_constraint(MapColoringConstraint(first, second))  # type: ignore[arg-type]
+        options = dict(select_variable=select, inference=inference)
+        expected = problem.count_solutions()
+        assert problem.count_solutions(**options, backjumping=True, max_nogoods=max_nogoods) == expected
+        solution = problem.backtracking_search(**options, backjumping=True, max_nogoods=max_nogoods)
+        assert (solution is None) == (expected == 0)
+    assert queens_csp(8).count_solutions(inference=inference, backjumping=True, max_nogoods=max_nogoods) == 92
+
+
+def test_nogood_store_evicts_the_least_recently_used() -> None:
+    store: NogoodStore[str, int] = NogoodStore(2)
+    store.add([("a", 1), ("b", 2)])
+    store.add([("c", 3)])
+    assert store.clash("b", 2, {"a": 1}) == ["a"]  # touches the first nogood
+    store.add([("d", 4)])
+    assert len(store) == 2
+    assert store.clash("c", 3, {}) is None
+    assert store.clash("a", 1, {"b": 2}) == ["b"]
+    assert store.clash("a", 1, {"b": 3}) is None
+    store.add([("e", [1, 2])])  # type: ignore[list-item]
+    assert len(store) == 2
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("openpyxl")
+
+from batch import main, read_manifest  # noqa: E402
+
+DOCUMENTS = {
+    "요구사항 명세서": None,
+    "요구사항 명세 검증보고서": "요구사항 명세서",
+    "요구사항 안전성 분석 보고서": "요구사항 명세서",
+    "설계 명세서": "요구사항 명세 검증보고서",
+}
+
+
+def write_project(tmp_path, projects) -> str:
+    sheet = tmp_path / "문서의존성.xlsx"
+    sheet_frame = pd.DataFrame({"문서명": list(DOCUMENTS), "의존 문서#1": list(DOCUMENTS.values())})
+    sheet_frame.to_excel(sheet, index=False)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({"holidays": ["2023-01-04"], "projects": projects}), encoding="utf-8")
+    return str(manifest)
+
+
+def project(name: str, spec: str, design: str, **options):
+    dates = {"spec": spec, "design": design, "impl": "2023-01-16", "end": "2023-01-20"}
+    return {"name": name, "sheet": "문서의존성.xlsx", **dates, **options}
+
+
+def test_manifest_resolves_sheets_and_holidays(tmp_path) -> None:
+    manifest = write_project(tmp_path, [project("A", "2023-01-02", "2023-01-09", holidays=["2023-01-05"])])
+    (loaded,) = read_manifest(manifest)
+    assert loaded.sheet == str(tmp_path / "문서의존성.xlsx")
+    assert loaded.holidays == ("2023-01-04", "2023-01-05") and loaded.safety_analysis
+    with pytest.raises(ValueError):
+        read_manifest(write_project(tmp_path, [project("A", "2023-01-02", "2023-01-09")] * 2))
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".csv"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_projects_are_written_with_a_summary(tmp_path, suffix, workers) -> None:
+    projects = [
+        project("solved", "2023-01-02", "2023-01-09", safety_analysis=False),
+        project("unsatisfied", "2023-01-02", "2023-01-02"),
+        dict(project("failed", "2023-01-02", "2023-01-09"), sheet="없는 파일.xlsx"),
+    ]
+    output, summary = tmp_path / f"schedules{suffix}", tmp_path / "summary.json"
+    arguments = [write_project(tmp_path, projects), "--output", str(output), "--summary", str(summary)]
+    assert main(arguments + ["--workers", str(workers)]) == 1
+
+    if suffix == ".parquet":
+        rows = pd.read_parquet(output)
+    else:
+        rows = pd.read_csv(output, encoding="utf-8-sig")
+    assert set(rows["project"]) == {"solved"} and len(rows) == 3
+    dates = dict(zip(rows["document"], pd.to_datetime(rows["date"]).dt.date.astype(str)))
+    assert dates["요구사항 명세서"] < dates["요구사항 명세 검증보고서"] < dates["설계 명세서"] == "2023-01-09"
+    assert "2023-01-04" not in dates.values()
+
+    report = json.loads(summary.read_text(encoding="utf-8"))
+    assert (report["solved"], report["unsatisfied"], report["failed"]) == (1, 1, 1)
+    statuses = {result["project"]: result for result in report["results"]}
+    assert statuses["failed"]["error"].startswith("FileNotFoundError")
+    assert statuses["unsatisfied"]["status"] == "unsatisfied" and statuses["solved"]["documents"] == 3
+
+
+def test_an_empty_manifest_writes_an_empty_summary(tmp_path) -> None:
+    output, summary = tmp_path / "schedules.csv", tmp_path / "summary.json"
+    assert main([write_project(tmp_path, []), "--output", str(output), "--summary", str(summary)]) == 0
+    assert json.loads(summary.read_text(encoding="utf-8"))["projects"] == 0
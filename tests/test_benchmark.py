@@ -0,0 +1,29 @@
+import json
+
+from benchmark import compare, main, planar_map, publication_dag, suite, word_search
+
+
+def test_instances_are_reproducible() -> None:
+    first, second = planar_map(100, seed=1), planar_map(100, seed=1)
+    assert len(first.variables) == 100
+    assert {cell: [c.variables for c in first.constraints[cell]] for cell in first.variables} == {
+        cell: [c.variables for c in second.constraints[cell]] for cell in second.variables
+    }
+    assert word_search(12, 6, seed=2).domains == word_search(12, 6, seed=2).domains
+    dag = publication_dag(30, seed=3)
+    assert dag.backtracking_search() is not None
+
+
+def test_quick_run_writes_results_and_compares(tmp_path) -> None:
+    output = tmp_path / "results.json"
+    assert main(["--quick", "--repeat", "1", "--output", str(output)]) == 0
+    results = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert len(results) == len(suite(quick=True))
+    assert all(result["solutions"] == 1 and result["peak_bytes"] > 0 for result in results)
+
+    slower = [dict(result, wall=result["wall"] * 2) for result in results]
+    lines, regressions = compare(slower, results, tolerance=0.2)
+    assert len(lines) == len(results) and len(regressions) == len(results)
+    assert compare(results, results, tolerance=0.2)[1] == []
+    rerun = ["--quick", "--repeat", "1", "--output", str(tmp_path / "rerun.json")]
+    assert main(rerun + ["--baseline", str(output), "--tolerance", "1000"]) == 0
@@ -0,0 +1,49 @@
+import datetime
+import random
+
+import numpy as np
+
+from business_calendar import business_calendar
+from date_generation import date_range
+
+
+def walk(start, end, holidays):
+    day, days = start, []
+    while day <= end:
+        if day.weekday() < 5 and day not in holidays:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def test_matches_a_day_by_day_walk() -> None:
+    rng = random.Random(0)
+    origin = datetime.date(2023, 1, 1)
+    for _ in range(50):
+        start = origin + datetime.timedelta(days=rng.randrange(400))
+        end = start + datetime.timedelta(days=rng.randrange(-3, 120))
+        holidays = [origin + datetime.timedelta(days=rng.randrange(500)) for _ in range(rng.randrange(10))]
+        expected = walk(start, end, holidays)
+        assert date_range(start, end, holidays) == expected
+        if expected:
+            calendar = business_calendar(holidays)
+            assert calendar.distance(expected[0], expected[-1]) == len(expected) - 1
+            assert calendar.add(expected[0], len(expected) - 1) == expected[-1]
+
+
+def test_offsets_count_from_the_business_day_before() -> None:
+    calendar = business_calendar([datetime.datetime(2023, 1, 2)])  # a Monday holiday
+    saturday = datetime.date(2022, 12, 31)
+    assert calendar.add(saturday, 1) == datetime.date(2023, 1, 3)
+    assert calendar.add(datetime.date(2023, 1, 3), -1) == datetime.date(2022, 12, 30)
+    assert calendar.distance(datetime.date(2023, 1, 10), datetime.date(2023, 1, 3)) == -5
+    dates = np.array(["2023-01-03", "2023-01-04"], dtype="datetime64[D]")
+    assert calendar.offset(dates, np.array([2, 5])).tolist() == [datetime.date(2023, 1, 5), datetime.date(2023, 1, 11)]
+    assert calendar.is_business_day(dates).all() and not calendar.is_business_day(saturday)
+
+
+def test_calendars_are_built_once_per_holiday_set() -> None:
+    first = business_calendar([datetime.date(2023, 5, 1), datetime.date(2023, 5, 5)])
+    assert business_calendar([datetime.datetime(2023, 5, 5), datetime.date(2023, 5, 1)]) is first
+    assert business_calendar([]) is not first
+    assert len(business_calendar().days(datetime.date(2023, 1, 1), datetime.date(2027, 12, 31))) == 1305
@@ -0,0 +1,43 @@
+import tracemalloc
+
+from date_generation import PublicationDependencyConstraint
+from map_coloring import MapColoringConstraint
+from queens import QueensConstraint, queens_csp
+from word_search import GridLocation, Placement, WordSearchConstraint, generate_domain
+
+
+def test_constraints_have_no_instance_dict() -> None:
+    constraints = [
+        MapColoringConstraint("WA", "NO"),
+        PublicationDependencyConstraint("spec", "review"),
+        QueensConstraint([1, 2, 3]),
+        WordSearchConstraint(["AB", "CD"]),
+    ]
+    assert not any(hasattr(constraint, "__dict__") for constraint in constraints)
+
+
+def test_queens_share_one_domain() -> None:
+    problem = queens_csp(1000)
+    assert len({id(rows) for rows in problem.domains.values()}) == 1
+    solution = queens_csp(8).backtracking_search()
+    assert solution is not None and QueensConstraint(list(range(1, 9))).satisfied(solution)
+
+
+def test_placements_are_decoded_on_demand() -> None:
+    assert Placement(2, 3, 3, 3).locations() == [GridLocation(2, 3), GridLocation(3, 2), GridLocation(4, 1)]
+    grid = [["A"] * 5 for _ in range(4)]
+    domain = generate_domain("ABC", grid)
+    # across 4x3, diagonals 2x3 each way, down 2x5
+    assert len(domain) == 12 + 6 + 6 + 10
+    assert all(0 <= row < 4 and 0 <= column < 5 for placement in domain for row, column in placement.locations())
+
+
+def test_large_grid_domain_stays_small() -> None:
+    grid = [["A"] * 100 for _ in range(100)]
+    tracemalloc.start()
+    try:
+        domain = generate_domain("ABCDEFGHIJ", grid)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(domain) > 30_000 and peak < 8_000_000
@@ -0,0 +1,123 @@
+import datetime
+from typing import Dict, List, Optional
+
+import pytest
+
+from compiled_csp import CompiledCSP
+from csp import CSP, Constraint
+from date_generation import PublicationDependencyConstraint
+from map_coloring import MapColoringConstraint
+from queens import queens_csp
+
+
+class Forbidden(Constraint[str, int]):
+    def __init__(self, variable: str, value: int) -> None:
+        super().__init__([variable])
+        self.variable, self.value = variable, value
+
+    def satisfied(self, assignment: Dict[str, int]) -> bool:
+        return assignment.get(self.variable) != self.value
+
+
+class AllDifferent(Constraint[str, int]):
+    def satisfied(self, assignment: Dict[str, int]) -> bool:
+        values = [assignment[variable] for variable in self.variables if variable in assignment]
+        return len(values) == len(set(values))
+
+
+def verify(problem: CSP, solution: Optional[Dict]) -> bool:
+    if solution is None or set(solution) != set(problem.variables):
+        return False
+    return all(
+        constraint.satisfied(solution) for variable in problem.variables for constraint in problem.constraints[variable]
+    )
+
+
+def colouring(colours: int, edges: List[List[str]]) -> CSP[str, int]:
+    regions = sorted({region for edge in edges for region in edge})
+    problem: CSP[str, int] = CSP(regions, {region: list(range(colours)) for region in regions})
+    for first, second in edges:
+        problem.add_constraint(MapColoringConstraint(first, second))
+    return problem
+
+
+def schedule(days: int) -> CSP[str, datetime.date]:
+    documents = ["spec", "review", "design", "test plan"]
+    dates = [datetime.date(2023, 1, 2) + datetime.timedelta(days=k) for k in range(days)]
+    problem: CSP[str, datetime.date] = CSP(documents, {document: list(dates) for document in documents})
+    for before, after in [("spec", "review"), ("spec", "design"), ("design", "test plan"), ("review", "test plan")]:
+        problem.add_constraint(PublicationDependencyConstraint(before, after))
+    return problem
+
+
+def australia(colours: int) -> CSP[str, int]:
+    edges = [["WA", "NO"], ["WA", "SA"], ["SA", "NO"], ["QL", "NO"], ["QL", "SA"], ["QL", "NSW"], ["NSW", "SA"]]
+    return colouring(colours, edges + [["VIC", "SA"], ["VIC", "NSW"], ["VIC", "TM"]])
+
+
+def with_unary(colours: int) -> CSP[str, int]:
+    problem = colouring(colours, [["A", "B"], ["B", "C"], ["A", "C"]])
+    problem.add_constraint(Forbidden("A", 0))
+    problem.add_constraint(Forbidden("B", 1))
+    return problem
+
+
+def with_nary(size: int) -> CSP[str, int]:
+    variables = ["A", "B", "C", "D"]
+    problem: CSP[str, int] = CSP(variables, {variable: list(range(size)) for variable in variables})
+    problem.add_constraint(AllDifferent(["A", "B", "C"]))
+    problem.add_constraint(MapColoringConstraint("C", "D"))
+    return problem
+
+
+INSTANCES = {
+    "binary": (australia(3), True),
+    "binary infeasible": (australia(2), False),
+    "dates": (schedule(3), True),
+    "dates infeasible": (schedule(2), False),
+    "unary": (with_unary(3), True),
+    "unary infeasible": (with_unary(2), False),
+    "n-ary": (with_nary(3), True),
+    "n-ary infeasible": (with_nary(2), False),
+    "queens": (queens_csp(6), True),
+    "queens infeasible": (queens_csp(3), False),
+}
+
+
+@pytest.mark.parametrize("name", INSTANCES)
+@pytest.mark.parametrize("arc_consistency", [True, False])
+def test_compiled_search_agrees_with_the_plain_search(name, arc_consistency) -> None:
+    problem, feasible = INSTANCES[name]
+    plain = problem.backtracking_search()
+    compiled = CompiledCSP(problem).backtracking_search(arc_consistency=arc_consistency)
+    assert (plain is not None) == (compiled is not None) == feasible
+    if feasible:
+        assert verify(problem, plain) and verify(problem, compiled)
+
+
+def test_initial_assignment_is_honoured() -> None:
+    problem = australia(3)
+    compiled = CompiledCSP(problem)
+    solution = compiled.backtracking_search({"SA": 2, "WA": 0})
+    assert verify(problem, solution) and solution is not None and solution["SA"] == 2 and solution["WA"] == 0
+    assert compiled.backtracking_search({"SA": 2, "WA": 2}) is None
+    assert problem.backtracking_search({"SA": 2, "WA": 2}) is None
+
+
+# The plain solver only checks a starting value against the constraints, not the domain.
+def test_initial_value_outside_the_domain() -> None:
+    problem = australia(3)
+    compiled = CompiledCSP(problem)
+    plain = problem.backtracking_search({"TM": 7})
+    solution = compiled.backtracking_search({"TM": 7})
+    assert plain is not None and plain["TM"] == 7
+    assert solution is not None and solution["TM"] == 7 and verify(problem, solution)
+    assert compiled.backtracking_search({"SA": 7, "WA": 7}) is None
+
+
+def test_degree_breaks_remaining_value_ties() -> None:
+    # Every variable starts with three values; B is the only one tied to all the others
+    problem = colouring(3, [["A", "B"], ["B", "C"], ["B", "D"], ["C", "D"]])
+    compiled = CompiledCSP(problem)
+    encoded = compiled.encode({})
+    assert compiled.variables[compiled._select_variable(compiled.masks.copy(), encoded)] == "B"
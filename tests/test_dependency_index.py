@@ -0,0 +1,108 @@
+import datetime
+import random
+from typing import Dict, List, Optional, Set, Tuple
+
+import pytest
+
+from compiled_csp import CompiledCSP
+from csp import CSP
+from date_generation import PublicationDependencyConstraint, date_range
+from dependency_index import DependencyIndex
+
+
+def random_graph(rng: random.Random, documents: int, density: float) -> Tuple[List[str], List[Tuple[str, str]]]:
+    names = [f"문서 {k}" for k in range(documents)]
+    order = list(names)
+    rng.shuffle(order)
+    edges = [(order[i], order[j]) for i in range(documents) for j in range(i + 1, documents) if rng.random() < density]
+    rng.shuffle(edges)
+    return names, edges
+
+
+def closure(documents: List[str], edges: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+    reach = {doc: {after for before, after in edges if before == doc} for doc in documents}
+    changed = True
+    while changed:
+        changed = False
+        for doc in documents:
+            extra = set().union(*(reach[after] for after in reach[doc])) - reach[doc]
+            if extra:
+                reach[doc] |= extra
+                changed = True
+    return {(doc, after) for doc in documents for after in reach[doc]}
+
+
+def solve_compiled(problem: CSP) -> Optional[Dict]:
+    return CompiledCSP(problem).backtracking_search()
+
+
+def test_keeps_every_dependency_of_a_document() -> None:
+    index = DependencyIndex(["명세서", "검증보고서", "시험 계획서"], [["명세서", "검증보고서"], ["명세서", "시험 계획서"]])
+    assert index.edges == [("명세서", "검증보고서"), ("명세서", "시험 계획서")]
+    assert index.successors["명세서"] == ["검증보고서", "시험 계획서"]
+    assert index.order[0] == "명세서"
+
+
+def test_order_reduction_and_components() -> None:
+    rng = random.Random(5)
+    for _ in range(30):
+        names, edges = random_graph(rng, 12, rng.choice([0.05, 0.2, 0.5]))
+        index = DependencyIndex(names, edges + edges[:3])
+        position = {doc: i for i, doc in enumerate(index.order)}
+        assert sorted(index.order) == sorted(names)
+        assert all(position[before] < position[after] for before, after in edges)
+
+        full = closure(names, edges)
+        assert closure(names, index.reduction) == full
+        for edge in index.reduction:
+            assert edge not in closure(names, [other for other in index.reduction if other != edge])
+
+        grouped = [doc for component in index.components for doc in component]
+        assert sorted(grouped) == sorted(names)
+        group = {doc: k for k, component in enumerate(index.components) for doc in component}
+        assert all(group[before] == group[after] for before, after in edges)
+        assert [len(component) for component in index.components] == sorted(
+            (len(component) for component in index.components), reverse=True
+        )
+
+
+def test_rejects_cycles_and_unknown_documents() -> None:
+    with pytest.raises(ValueError):
+        DependencyIndex(["A", "B", "C"], [("A", "B"), ("B", "C"), ("C", "A")])
+    with pytest.raises(LookupError):
+        DependencyIndex(["A"], [("A", "B")])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_components_are_solved_separately(workers) -> None:
+    rng = random.Random(9)
+    names: List[str] = []
+    edges: List[Tuple[str, str]] = []
+    for part in range(4):
+        part_names, part_edges = random_graph(rng, 8, 0.3)
+        rename = {name: f"{part}-{name}" for name in part_names}
+        names += list(rename.values())
+        edges += [(rename[before], rename[after]) for before, after in part_edges]
+    start = datetime.date(2023, 1, 2)
+    days = date_range(start, start + datetime.timedelta(days=20), [])
+    problem: CSP[str, datetime.date] = CSP(names, {name: days for name in names})
+    index = DependencyIndex(names, edges)
+    for before, after in index.reduction:
+        problem.add_constraint(PublicationDependencyConstraint(before, after))
+
+    assert sorted(map(sorted, problem.components())) == sorted(map(sorted, index.components))
+    solution = problem.solve_components(solve_compiled, index.components, workers=workers)
+    assert solution is not None and list(solution) == names
+    assert all(solution[before] < solution[after] for before, after in edges)
+
+
+def test_one_infeasible_component_fails_the_whole() -> None:
+    days = [datetime.date(2023, 1, 2), datetime.date(2023, 1, 3)]
+    names = ["A", "B", "C", "X", "Y"]
+    problem: CSP[str, datetime.date] = CSP(names, {name: days for name in names})
+    for before, after in [("A", "B"), ("B", "C"), ("X", "Y")]:
+        problem.add_constraint(PublicationDependencyConstraint(before, after))
+    assert problem.components() == [["A", "B", "C"], ["X", "Y"]]
+    sub = problem.subproblem(["X", "Y"])
+    assert sub.backtracking_search() == {"X": days[0], "Y": days[1]}
+    assert problem.solve_components(lambda part: part.backtracking_search()) is None
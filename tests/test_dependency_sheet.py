@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("openpyxl")
+
+import dependency_sheet  # noqa: E402
+from dependency_sheet import read_dependency_sheet, sidecar_path  # noqa: E402
+
+
+def write_sheet(path: str, names) -> None:
+    pd.DataFrame({"문서명": names, "선행 문서": ["요구사항\xa0명세서", None]}).to_excel(path, index=False)
+
+
+def test_sidecar_is_used_until_the_sheet_changes(tmp_path, monkeypatch) -> None:
+    path = str(tmp_path / "문서의존성.xlsx")
+    write_sheet(path, ["요구사항 명세서", "설계 명세서"])
+    first = read_dependency_sheet(path)
+    assert os.path.exists(sidecar_path(path))
+    assert first["선행 문서"][0] == "요구사항 명세서" and pd.isna(first["선행 문서"][1])
+
+    def no_excel(*args, **kwargs):
+        raise AssertionError("the sheet was parsed again")
+
+    monkeypatch.setattr(dependency_sheet.pd, "read_excel", no_excel)
+    again = read_dependency_sheet(path)
+    assert again["문서명"].tolist() == first["문서명"].tolist()
+
+    monkeypatch.undo()
+    write_sheet(path, ["요구사항 명세서", "시험 계획서"])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert read_dependency_sheet(path)["문서명"].tolist() == ["요구사항 명세서", "시험 계획서"]
+
+
+def test_unreadable_sidecar_is_rebuilt(tmp_path) -> None:
+    path = str(tmp_path / "문서의존성.xlsx")
+    write_sheet(path, ["요구사항 명세서", "설계 명세서"])
+    with open(sidecar_path(path), "wb") as sidecar:
+        sidecar.write(b"not parquet")
+    assert read_dependency_sheet(path)["문서명"].tolist() == ["요구사항 명세서", "설계 명세서"]
+    assert read_dependency_sheet(path)["문서명"].tolist() == ["요구사항 명세서", "설계 명세서"]
@@ -0,0 +1,55 @@
+from itertools import islice
+
+import pytest
+
+from compiled_csp import CompiledCSP
+from csp import CSP, forward_checking, least_constraining_value, mac, mrv_degree
+from map_coloring import MapColoringConstraint
+from queens import QueensConstraint, queens_csp
+
+
+@pytest.mark.parametrize("inference", [None, forward_checking, mac])
+def test_every_solution_is_found_once(inference) -> None:
+    problem = queens_csp(8)
+    solutions = list(problem.iter_solutions(select_variable=mrv_degree, inference=inference))
+    assert len(solutions) == 92
+    assert len({tuple(sorted(solution.items())) for solution in solutions}) == 92
+    assert all(QueensConstraint(problem.variables).satisfied(solution) for solution in solutions)
+    assert problem.count_solutions(inference=inference) == 92
+    assert problem.count_solutions(inference=inference, limit=5) == 5
+
+
+def test_pages_resume_where_the_last_one_stopped() -> None:
+    problem = queens_csp(6)
+    everything = list(problem.iter_solutions())
+    assert len(everything) == 4
+    assert list(problem.iter_solutions(limit=2, offset=1)) == everything[1:3]
+    assert list(problem.iter_solutions(offset=10)) == []
+
+    solutions = problem.iter_solutions()
+    assert list(islice(solutions, 3)) == everything[:3]
+    assert list(islice(solutions, 3)) == everything[3:]
+    assert problem.backtracking_search() == everything[0]
+
+
+def test_compiled_enumeration_matches_the_plain_one() -> None:
+    problem = queens_csp(6)
+    compiled = CompiledCSP(problem)
+    plain = {tuple(sorted(solution.items())) for solution in problem.iter_solutions()}
+    assert {tuple(sorted(solution.items())) for solution in compiled.iter_solutions()} == plain
+    assert compiled.count_solutions() == 4 and compiled.count_solutions(limit=1) == 1
+    assert list(compiled.iter_solutions(limit=1, offset=1)) == list(islice(compiled.iter_solutions(), 1, 2))
+    assert compiled.backtracking_search() == next(compiled.iter_solutions())
+
+    triangle: CSP[str, str] = CSP(["A", "B", "C"], {region: ["r", "g"] for region in "ABC"})
+    for first, second in [("A", "B"), ("B", "C"), ("A", "C")]:
+        triangle.add_constraint(MapColoringConstraint(first, second))
+    assert CompiledCSP(triangle).count_solutions() == 0
+    assert list(triangle.iter_solutions(order_values=least_constraining_value)) == []
+
+
+def test_complete_starting_assignment_is_the_only_solution() -> None:
+    problem = queens_csp(4)
+    start = {1: 2, 2: 4, 3: 1, 4: 3}
+    assert list(problem.iter_solutions(start)) == [start]
+    assert list(CompiledCSP(problem).iter_solutions(start)) == [start]
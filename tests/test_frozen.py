@@ -0,0 +1,87 @@
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from compiled_csp import CompiledCSP
+from csp import CSP, forward_checking, mac, mrv_degree
+from map_coloring import MapColoringConstraint
+from queens import QueensConstraint, queens_csp
+
+
+def frozen_queens(n: int) -> CSP[int, int]:
+    return queens_csp(n).freeze()
+
+
+def test_frozen_model_refuses_edits() -> None:
+    problem = frozen_queens(6)
+    assert problem.freeze() is problem and problem.frozen
+    with pytest.raises(TypeError):
+        problem.add_constraint(QueensConstraint(problem.variables))
+    with pytest.raises(TypeError):
+        problem.set_domain(1, [1])
+    with pytest.raises(TypeError):
+        problem.add_variable(7, [1])
+    with pytest.raises(TypeError):
+        problem.remove_variable(1)
+    with pytest.raises(TypeError):
+        problem.domains[1] = [1]
+    with pytest.raises(AttributeError):
+        problem.domains[1].append(7)  # type: ignore[attr-defined]
+    with pytest.raises(AttributeError):
+        problem.variables.append(7)
+    with pytest.raises(TypeError):
+        problem.constraints[1] = []
+    with pytest.raises(TypeError):
+        problem.add_hook(lambda event, variable, value: None)
+    assert pickle.loads(pickle.dumps(problem)).domains == problem.domains
+
+
+def test_frozen_model_solves_like_the_original() -> None:
+    original = queens_csp(8)
+    problem = frozen_queens(8)
+    for options in [{}, {"inference": forward_checking}, {"inference": mac}, {"backjumping": True}]:
+        assert problem.count_solutions(**options) == original.count_solutions(**options) == 92
+    assert problem.repair({1: 1, 2: 3}).solved
+    assert problem.min_conflicts(seed=1) is not None
+    assert CompiledCSP(problem).count_solutions() == 92
+    assert problem.parallel_search(workers=2, start_method="fork") is not None
+
+
+def test_threads_share_one_model() -> None:
+    problem = frozen_queens(8)
+    expected = {first: queens_csp(8).count_solutions({1: first}) for first in range(1, 9)}
+
+    def count(first: int) -> int:
+        return problem.count_solutions({1: first}, select_variable=mrv_degree, inference=forward_checking)
+
+    with ThreadPoolExecutor(8) as executor:
+        counts = dict(zip(range(1, 9), executor.map(count, list(range(1, 9)) * 4)))
+    assert counts == expected
+
+
+def test_threads_share_one_compiled_model() -> None:
+    regions = list(range(12))
+    clique: CSP[int, int] = CSP(regions, {region: list(range(11)) for region in regions})
+    for first in regions:
+        for second in regions[first + 1 :]:
+            clique.add_constraint(MapColoringConstraint(first, second))  # type: ignore[arg-type]
+    compiled = CompiledCSP(clique.freeze())
+    cancel = threading.Event()
+    cancel.set()
+    results = {}
+
+    def hopeless() -> None:
+        results["hopeless"] = compiled.solve(arc_consistency=False, timeout=0.3)
+
+    def cancelled() -> None:
+        results["cancelled"] = compiled.solve(arc_consistency=False, cancel=cancel)
+
+    threads = [threading.Thread(target=hopeless), threading.Thread(target=cancelled)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results["hopeless"].status == "timeout" and results["cancelled"].status == "cancelled"
+    assert results["hopeless"].stats is not results["cancelled"].stats
@@ -0,0 +1,86 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from csp import CSP, IncrementalConstraint, forward_checking, least_constraining_value, mac
+from queens import QueensConstraint, queens_csp
+from word_search import Placement, WordSearchConstraint
+
+
+# Fails the test if the search falls back to satisfied() instead of the incremental state.
+class StateOnlyQueens(QueensConstraint):
+    def satisfied(self, assignment: Dict[int, int]) -> bool:
+        raise AssertionError("queens were rechecked from scratch")
+
+
+class StateOnlyDifferent(IncrementalConstraint[str, int]):
+    def satisfied(self, assignment: Dict[str, int]) -> bool:
+        raise AssertionError("colours were rechecked from scratch")
+
+    def new_state(self) -> Any:
+        return {}
+
+    def accepts(self, state: Any, variable: str, value: int) -> bool:
+        return all(other == variable or taken != value for other, taken in state.items())
+
+    def on_assign(self, state: Any, variable: str, value: int) -> None:
+        state[variable] = value
+
+    def on_unassign(self, state: Any, variable: str, value: int) -> None:
+        del state[variable]
+
+
+def test_inconsistent_initial_assignment_is_rejected() -> None:
+    problem = queens_csp(8)
+    assert problem.backtracking_search({1: 1, 2: 1}) is None
+    assert problem.backtracking_search({1: 1, 3: 3}, inference=forward_checking) is None
+    assert problem.parallel_search({1: 1, 2: 1}, workers=1) is None
+
+
+def test_consistent_initial_assignment_is_kept() -> None:
+    problem = queens_csp(8)
+    solution = problem.backtracking_search({1: 1, 2: 5})
+    assert solution is not None and solution[1] == 1 and solution[2] == 5
+    assert QueensConstraint(problem.variables).satisfied(solution)
+
+
+def test_incremental_and_reference_checks_agree() -> None:
+    for n in (4, 6, 8, 10):
+        problem = queens_csp(n)
+        for inference in (None, forward_checking):
+            solution = problem.backtracking_search(inference=inference)
+            assert solution is not None and len(solution) == n
+            assert QueensConstraint(problem.variables).satisfied(solution)
+    assert queens_csp(3).backtracking_search() is None
+
+
+def test_overlapping_initial_word_placements_are_rejected() -> None:
+    words = ["AB", "CD"]
+    across = Placement(0, 0, 0, 2)
+    down = Placement(0, 0, 2, 2)
+    apart = Placement(1, 0, 0, 2)
+    domains: Dict[str, List[Placement]] = {"AB": [across], "CD": [down, apart]}
+    problem: CSP[str, Placement] = CSP(words, domains)
+    problem.add_constraint(WordSearchConstraint(words))
+    assert problem.backtracking_search({"AB": across, "CD": down}) is None
+    assert problem.backtracking_search() == {"AB": across, "CD": apart}
+
+
+@pytest.mark.parametrize("inference", [None, forward_checking, mac])
+def test_value_ordering_and_propagation_use_the_incremental_state(inference) -> None:
+    columns = list(range(1, 9))
+    problem: CSP[int, int] = CSP(columns, {column: list(range(1, 9)) for column in columns})
+    problem.add_constraint(StateOnlyQueens(columns))
+    solution = problem.backtracking_search(order_values=least_constraining_value, inference=inference)
+    assert solution is not None and QueensConstraint(columns).satisfied(solution)
+
+    # Binary incremental constraints also go through AC-3
+    regions = ["A", "B", "C", "D"]
+    coloured: CSP[str, int] = CSP(regions, {region: [1, 2, 3] for region in regions})
+    for first, second in [("A", "B"), ("B", "C"), ("A", "C"), ("C", "D")]:
+        coloured.add_constraint(StateOnlyDifferent([first, second]))
+    solution = coloured.backtracking_search(
+        {"A": 1}, order_values=least_constraining_value, inference=inference, arc_consistency=True
+    )
+    assert solution is not None and solution["A"] == 1
+    assert len({solution["A"], solution["B"], solution["C"]}) == 3 and solution["C"] != solution["D"]
@@ -0,0 +1,61 @@
+from typing import Dict, List
+
+import pytest
+from conftest import grid_map
+
+from csp import CSP
+from map_coloring import MapColoringConstraint, color_map
+from queens import QueensConstraint, queens_csp, solve_queens
+from word_search import Placement, WordSearchConstraint, generate_domain, generate_grid
+
+
+@pytest.mark.parametrize("tabu", [0, 5])
+def test_large_queens(tabu) -> None:
+    problem = queens_csp(300)
+    solution = problem.min_conflicts(seed=7, tabu=tabu)
+    assert solution is not None and list(solution) == problem.variables
+    assert QueensConstraint(problem.variables).satisfied(solution)
+
+
+def test_large_map() -> None:
+    problem = grid_map(30, 3)
+    solution = problem.min_conflicts(seed=3)
+    assert solution is not None and len(solution) == 900
+    assert all(constraint.satisfied(solution) for cell in problem.variables for constraint in problem.constraints[cell])
+
+
+def test_same_seed_same_solution() -> None:
+    assert queens_csp(50).min_conflicts(seed=11) == queens_csp(50).min_conflicts(seed=11)
+
+
+def test_gives_up_after_the_step_budget() -> None:
+    triangle: CSP[str, str] = CSP(["A", "B", "C"], {region: ["r", "g"] for region in "ABC"})
+    for first, second in [("A", "B"), ("B", "C"), ("A", "C")]:
+        triangle.add_constraint(MapColoringConstraint(first, second))
+    assert triangle.min_conflicts(max_steps=100, seed=1, tabu=1, restarts=3) is None
+
+
+def test_starting_assignment_is_repaired() -> None:
+    problem = queens_csp(8)
+    start = {column: 1 for column in problem.variables}
+    solution = problem.min_conflicts(seed=5, assignment=start)
+    assert solution is not None and QueensConstraint(problem.variables).satisfied(solution)
+
+
+def test_overlapping_words_are_counted_as_conflicts() -> None:
+    grid = generate_grid(6, 6)
+    words: List[str] = ["PYTHON", "CSP", "GRID", "WORD"]
+    domains: Dict[str, List[Placement]] = {word: generate_domain(word, grid) for word in words}
+    problem: CSP[str, Placement] = CSP(words, domains)
+    problem.add_constraint(WordSearchConstraint(words))
+    solution = problem.min_conflicts(seed=2, restarts=3)
+    assert solution is not None and WordSearchConstraint(words).satisfied(solution)
+
+
+def test_method_parameter() -> None:
+    solution = solve_queens(8, "min_conflicts", seed=1)
+    assert solution is not None and QueensConstraint(list(range(1, 9))).satisfied(solution)
+    assert solve_queens(6) == queens_csp(6).backtracking_search()
+    assert color_map(grid_map(4, 3), "min_conflicts", seed=1) is not None
+    with pytest.raises(ValueError):
+        solve_queens(4, "annealing")
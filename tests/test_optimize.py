@@ -0,0 +1,81 @@
+import datetime
+import random
+from typing import List, Tuple
+
+import pytest
+
+from csp import CSP, forward_checking, mrv_degree
+from date_generation import PublicationDependencyConstraint, date_range
+from map_coloring import MapColoringConstraint
+from schedule_objectives import earliest_finish, even_spacing, review_gap_violations
+
+START = datetime.date(2023, 1, 2)
+
+
+def schedule_csp(
+    documents: int, seed: int, density: float = 0.25
+) -> Tuple[CSP[str, datetime.date], List[Tuple[str, str]]]:
+    rng = random.Random(seed)
+    names = [f"문서 {k}" for k in range(documents)]
+    edges = [(names[before], names[k]) for k in range(1, documents) for before in range(k) if rng.random() < density]
+    days = date_range(START, START + datetime.timedelta(days=13), [])
+    problem: CSP[str, datetime.date] = CSP(names, {name: list(days) for name in names})
+    for before, after in edges:
+        problem.add_constraint(PublicationDependencyConstraint(before, after))
+    return problem, edges
+
+
+def goals(edges):
+    return {
+        "finish": earliest_finish(),
+        "spacing": even_spacing(),
+        "gap": review_gap_violations(edges, 3),
+    }
+
+
+@pytest.mark.parametrize("goal", ["finish", "spacing", "gap"])
+@pytest.mark.parametrize("inference", [None, forward_checking])
+def test_matches_exhaustive_enumeration(goal, inference) -> None:
+    problem, edges = schedule_csp(5, 1)
+    objective, bound = goals(edges)[goal]
+    best = min(objective(solution) for solution in problem.iter_solutions())
+
+    result = problem.optimize(objective, bound, select_variable=mrv_degree, inference=inference)
+    assert result.solved and result.found and result.cost == best == objective(result.assignment)
+    assert all(problem.consistent(name, result.assignment) for name in problem.variables)
+
+
+def test_bound_prunes_the_tree() -> None:
+    problem, edges = schedule_csp(6, 2)
+    objective, bound = even_spacing()
+    exhaustive = problem.optimize(objective, inference=forward_checking)
+    nodes = problem.stats.nodes
+    pruned = problem.optimize(objective, bound, inference=forward_checking)
+    assert pruned.cost == exhaustive.cost
+    assert problem.stats.nodes < nodes / 10
+    assert problem.stats.solutions < exhaustive.stats.solutions
+
+
+def test_improving_incumbents_are_reported() -> None:
+    problem, edges = schedule_csp(7, 3)
+    objective, bound = review_gap_violations(edges, 2)
+    reported: List[float] = []
+    result = problem.optimize(objective, bound, on_improve=lambda schedule, cost: reported.append(cost))
+    assert reported and reported == sorted(reported, reverse=True) and len(set(reported)) == len(reported)
+    assert reported[-1] == result.cost
+
+
+def test_anytime_search_keeps_its_incumbent() -> None:
+    problem, _ = schedule_csp(40, 4, density=0.03)
+    objective, bound = even_spacing()
+    result = problem.optimize(objective, bound, select_variable=mrv_degree, inference=forward_checking, timeout=0.3)
+    assert result.status == "timeout" and not result.solved and result.found
+    assert len(result.assignment) == 40 and objective(result.assignment) == result.cost
+
+
+def test_infeasible_problem_has_no_cost() -> None:
+    triangle: CSP[str, str] = CSP(["A", "B", "C"], {region: ["r", "g"] for region in "ABC"})
+    for first, second in [("A", "B"), ("B", "C"), ("A", "C")]:
+        triangle.add_constraint(MapColoringConstraint(first, second))
+    result = triangle.optimize(lambda colouring: 0.0)
+    assert result.status == "infeasible" and not result.found and result.cost is None
@@ -0,0 +1,102 @@
+import random
+from typing import Dict, List, Optional
+
+import pytest
+
+from csp import (
+    CSP,
+    SearchContext,
+    degree,
+    domain_order,
+    first_unassigned,
+    forward_checking,
+    least_constraining_value,
+    mac,
+    minimum_remaining_values,
+    mrv_degree,
+)
+from map_coloring import MapColoringConstraint
+from queens import QueensConstraint
+
+
+# B - A - C - D - A: A touches three regions, B only one, and B comes first.
+def regions(domains: Optional[Dict[str, List[int]]] = None) -> CSP[str, int]:
+    variables = ["B", "A", "C", "D"]
+    problem: CSP[str, int] = CSP(variables, {variable: [1, 2, 3] for variable in variables})
+    problem.domains.update(domains or {})
+    for first, second in [("A", "B"), ("A", "C"), ("A", "D"), ("C", "D")]:
+        problem.add_constraint(MapColoringConstraint(first, second))
+    return problem
+
+
+# Regions 0..n-1, each bordering a few random earlier ones, in `colours` colours
+def random_map(n: int, colours: int, seed: int = 3) -> CSP[int, int]:
+    rng = random.Random(seed)
+    problem: CSP[int, int] = CSP(list(range(n)), {region: list(range(colours)) for region in range(n)})
+    for region in range(1, n):
+        for other in rng.sample(range(region), min(region, 2)):
+            problem.add_constraint(MapColoringConstraint(region, other))  # type: ignore[arg-type]
+    return problem
+
+
+def context(problem: CSP[str, int], assignment: Optional[Dict[str, int]] = None, inference=None) -> SearchContext:
+    return SearchContext(problem, assignment or {}, first_unassigned, domain_order, inference, False)
+
+
+def test_variable_orderings_on_a_fixed_instance() -> None:
+    # B and A both have two values left; only A is tied to the rest of the map
+    problem = regions({"B": [1, 2], "A": [1, 2]})
+    assert first_unassigned(context(problem)) == "B"
+    assert minimum_remaining_values(context(problem)) == "B"
+    assert degree(context(problem)) == "A"
+    assert mrv_degree(context(problem)) == "A"
+
+
+def test_variable_orderings_follow_the_assignment() -> None:
+    problem = regions({"B": [1, 2]})
+    search = context(problem, {"A": 1})
+    # B has only 2 left, C and D still share a constraint, B's only one is closed
+    assert minimum_remaining_values(search) == "B"
+    assert degree(search) == "C"
+    assert search.degree("B") == 0 and search.degree("C") == 1
+    search.unassign("A")
+    assert degree(search) == "A"
+    assert search.degree("B") == 1
+
+
+def test_value_orderings_on_a_fixed_instance() -> None:
+    # A = 3 only rules out C = 3 and D = 3, while 1 and 2 also take a value from B
+    problem = regions({"B": [1, 2]})
+    assert domain_order(context(problem), "A") == [1, 2, 3]
+    assert least_constraining_value(context(problem), "A") == [3, 1, 2]
+    assert least_constraining_value(context(problem, {"C": 3}), "A") == [1, 2]
+
+
+# The MRV buckets must match the legal values counted from scratch after every
+# assignment, prune and backtrack, with and without propagation.
+@pytest.mark.parametrize("inference", [None, forward_checking, mac])
+@pytest.mark.parametrize("select", [minimum_remaining_values, mrv_degree])
+@pytest.mark.parametrize("model", ["queens", "map"])
+def test_remaining_counts_stay_in_step_with_the_search(select, inference, model) -> None:
+    n = 8
+    columns = list(range(1, n + 1))
+    problem: CSP[int, int] = CSP(columns, {column: list(range(1, n + 1)) for column in columns})
+    problem.add_constraint(QueensConstraint(columns))
+    if model == "map":
+        # Binary constraints, so MAC prunes through AC-3 as well
+        problem = random_map(40, 3)
+    checked = []
+
+    def checked_select(search: SearchContext) -> int:
+        fewest = min(len(search.legal_values(v)) for v in search.unassigned)
+        chosen = select(search)
+        assert len(search.legal_values(chosen)) == fewest
+        assert search.degree(chosen) == sum(
+            1 for c in problem.constraints[chosen] if sum(v in search.unassigned for v in c.variables) >= 2
+        )
+        checked.append(chosen)
+        return chosen
+
+    solution = problem.backtracking_search(select_variable=checked_select, inference=inference)
+    assert solution is not None and all(problem.consistent(variable, solution) for variable in problem.variables)
+    assert len(checked) >= n
@@ -0,0 +1,80 @@
+import pickle
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+import csp as csp_module
+from csp import CSP, Constraint
+
+
+# Colours v1 and v2 differently only while the gate is closed (gate = 0).
+class GatedDifferent(Constraint[str, int]):
+    def __init__(self, gate: str, first: str, second: str) -> None:
+        super().__init__([gate, first, second])
+        self.gate, self.first, self.second = gate, first, second
+
+    def satisfied(self, assignment: Dict[str, int]) -> bool:
+        if assignment.get(self.gate, 0) == 1:
+            return True
+        if self.first not in assignment or self.second not in assignment:
+            return True
+        return assignment[self.first] != assignment[self.second]
+
+
+# gate = 0 leaves an 11-clique to colour with 10 colours: infeasible and very slow to refute
+# without propagation. gate = 1 is solved immediately.
+def gated_pigeonhole() -> CSP[str, int]:
+    nodes: List[str] = [f"v{i}" for i in range(11)]
+    domains: Dict[str, List[int]] = {"gate": [0, 1]}
+    for node in nodes:
+        domains[node] = list(range(10))
+    problem: CSP[str, int] = CSP(["gate"] + nodes, domains)
+    for i, first in enumerate(nodes):
+        for second in nodes[i + 1 :]:
+            problem.add_constraint(GatedDifferent("gate", first, second))
+    return problem
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_first_solution_wins_and_stops_the_other_workers(start_method: str) -> None:
+    problem = gated_pigeonhole()
+    started = time.perf_counter()
+    solution = problem.parallel_search(workers=2, tasks_per_worker=1, start_method=start_method)
+    # The worker refuting gate = 0 must have been told to stop, or leaving the pool would hang.
+    assert time.perf_counter() - started < 30
+    assert solution is not None and solution["gate"] == 1
+    assert all(constraint.satisfied(solution) for v in problem.variables for constraint in problem.constraints[v])
+
+
+def test_cancel_stops_a_running_worker() -> None:
+    problem = gated_pigeonhole()
+    cancel = threading.Event()
+    csp_module._init_worker(problem, (csp_module.first_unassigned, csp_module.domain_order, None, False), cancel)
+    timer = threading.Timer(0.2, cancel.set)
+    timer.start()
+    started = time.perf_counter()
+    assert csp_module._solve_partition({"gate": 0}) is None
+    assert time.perf_counter() - started < 5
+    timer.join()
+
+
+def test_model_pickles_for_spawned_workers() -> None:
+    from queens import QueensConstraint
+
+    columns = list(range(1, 9))
+    problem: CSP[int, int] = CSP(columns, {column: list(range(1, 9)) for column in columns})
+    problem.add_constraint(QueensConstraint(columns))
+    restored = pickle.loads(pickle.dumps(problem))
+    assert type(restored.constraints[1][0]) is QueensConstraint
+    assert restored.backtracking_search() == problem.backtracking_search()
+
+
+def test_infeasible_returns_none() -> None:
+    from map_coloring import MapColoringConstraint
+
+    problem: CSP[str, str] = CSP(["a", "b", "c"], {v: ["r", "g"] for v in "abc"})
+    for first, second in [("a", "b"), ("b", "c"), ("a", "c")]:
+        problem.add_constraint(MapColoringConstraint(first, second))
+    assert problem.parallel_search(workers=2) is None
@@ -0,0 +1,81 @@
+import datetime
+import threading
+from typing import Dict
+
+import pytest
+from conftest import grid_map
+
+from csp import CSP, forward_checking, mrv_degree
+from date_generation import PublicationDependencyConstraint
+from map_coloring import MapColoringConstraint
+from queens import QueensConstraint, queens_csp
+
+def valid(problem: CSP, solution: Dict) -> bool:
+    return set(solution) == set(problem.variables) and all(
+        solution[variable] in problem.domains[variable] and problem.consistent(variable, solution)
+        for variable in problem.variables
+    )
+
+
+def test_narrowed_domain_only_repairs_its_neighbourhood() -> None:
+    problem = grid_map(20)
+    previous = problem.backtracking_search(select_variable=mrv_degree, inference=forward_checking)
+    assert previous is not None
+    cell = (10, 10)
+    problem.set_domain(cell, [value for value in [0, 1, 2] if value != previous[cell]])
+    result = problem.repair(previous, mrv_degree, inference=forward_checking)
+    assert result.solved and valid(problem, result.assignment)
+    changed = [variable for variable in problem.variables if result.assignment[variable] != previous[variable]]
+    assert cell in changed and len(changed) < 10
+    assert result.stats is problem.stats and problem.stats.nodes < 50
+
+
+def test_added_and_removed_documents() -> None:
+    days = [datetime.date(2023, 1, day) for day in range(2, 7)]
+    documents = ["spec", "review", "plan"]
+    problem: CSP[str, datetime.date] = CSP(list(documents), {document: list(days) for document in documents})
+    problem.add_constraint(PublicationDependencyConstraint("spec", "review"))
+    problem.add_constraint(PublicationDependencyConstraint("review", "plan"))
+    previous = problem.backtracking_search()
+    assert previous is not None
+
+    problem.add_variable("approval", list(days))
+    approval = PublicationDependencyConstraint("plan", "approval")
+    problem.add_constraint(approval)
+    result = problem.repair(previous)
+    assert result.solved and valid(problem, result.assignment)
+    assert {document: result.assignment[document] for document in documents} == previous
+
+    problem.remove_constraint(approval)
+    problem.remove_variable("review")
+    assert problem.constraints["spec"] == [] and "review" not in problem.domains
+    result = problem.repair(previous)
+    assert result.solved and set(result.assignment) == {"spec", "plan", "approval"}
+    with pytest.raises(LookupError):
+        problem.add_variable("spec", list(days))
+    with pytest.raises(LookupError):
+        problem.set_domain("review", list(days))
+
+
+def test_repair_that_needs_a_fresh_search() -> None:
+    problem = queens_csp(8)
+    previous = problem.backtracking_search()
+    assert previous is not None
+    problem.set_domain(1, [value for value in range(1, 9) if value != previous[1]])
+    result = problem.repair(previous, inference=forward_checking)
+    assert result.solved and QueensConstraint(problem.variables).satisfied(result.assignment)
+
+    triangle: CSP[str, str] = CSP(["A", "B", "C"], {region: ["r", "g", "b"] for region in "ABC"})
+    for first, second in [("A", "B"), ("B", "C"), ("A", "C")]:
+        triangle.add_constraint(MapColoringConstraint(first, second))
+    previous = triangle.backtracking_search()
+    assert previous is not None
+    triangle.set_domain("C", ["r", "g"])
+    triangle.set_domain("B", ["r", "g"])
+    triangle.set_domain("A", ["r", "g"])
+    assert triangle.repair(previous).status == "infeasible"
+
+    cancel = threading.Event()
+    cancel.set()
+    big = grid_map(30)
+    assert big.repair({}, inference=forward_checking, cancel=cancel).status == "cancelled"
@@ -0,0 +1,102 @@
+import datetime
+import random
+import threading
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+import pytest
+
+from csp import CSP, forward_checking
+from date_generation import PublicationDependencyConstraint, date_range
+from scenario_sweep import STAGES, ScenarioSweep, scenarios
+from temporal_network import schedule_dependencies
+
+HOLIDAYS = ["2023-01-11"]
+DAY = datetime.timedelta(days=1)
+
+
+# Fixed documents for three stages and three chains between them, like schedule_windows
+def project(seed: int) -> Tuple[List[str], List[Tuple[str, str]], Dict[str, Tuple[str, str]]]:
+    rng = random.Random(seed)
+    windows = {"spec": ("spec", "spec"), "design": ("design", "design"), "impl": ("impl", "impl")}
+    dependencies = []
+    for stage, (opens, closes) in enumerate([("spec", "design"), ("design", "impl"), ("impl", "end")]):
+        names = [f"{opens}-{closes} {k}" for k in range(rng.randint(1, 4))]
+        for k, name in enumerate(names):
+            windows[name] = (opens, closes)
+            dependencies.append((opens, name) if k == 0 else (rng.choice(names[:k]), name))
+        if closes != "end":
+            dependencies.append((names[-1], closes))
+    return list(windows), dependencies, windows
+
+
+def dated(windows, scenario):
+    return {doc: (scenario[opens], scenario[closes]) for doc, (opens, closes) in windows.items()}
+
+
+def solve_with_csp(documents, dependencies, windows):
+    def solve(scenario):
+        domains = {}
+        for doc, (first, last) in dated(windows, scenario).items():
+            domains[doc] = [first] if first == last else date_range(first, last, HOLIDAYS)
+        problem: CSP[str, datetime.date] = CSP(documents, domains)
+        for before, after in dependencies:
+            problem.add_constraint(PublicationDependencyConstraint(before, after))
+        return problem.backtracking_search(inference=forward_checking)
+
+    return solve
+
+
+def date_ranges(start: datetime.date) -> Dict[str, List[datetime.date]]:
+    return {stage: [start + (5 * k + offset) * DAY for offset in range(6)] for k, stage in enumerate(STAGES)}
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_screen_matches_the_temporal_network_and_the_csp(seed) -> None:
+    documents, dependencies, windows = project(seed)
+    sweep = ScenarioSweep(documents, dependencies, windows, HOLIDAYS)
+    result = sweep.run(date_ranges(datetime.date(2023, 1, 6)), solve_with_csp(documents, dependencies, windows))
+    assert 0 < result.passed.sum() < len(result)
+    for number in range(len(result)):
+        scenario = result.scenario(number)
+        timeline = schedule_dependencies(documents, dependencies, dated(windows, scenario), HOLIDAYS)
+        assert result.passed[number] == timeline.feasible, scenario
+    assert set(result.status[result.passed]) == {"solved"}
+    assert set(result.status[~result.passed]) == {"screened"}
+    assert sorted(result.schedules) == sorted(result.passed.nonzero()[0].tolist())
+
+
+def test_ten_thousand_scenarios_screen_in_well_under_a_second() -> None:
+    documents, dependencies, windows = project(5)
+    sweep = ScenarioSweep(documents, dependencies, windows, HOLIDAYS)
+    start = datetime.date(2023, 1, 2)
+    ranges = {stage: [start + (7 * k + offset) * DAY for offset in range(10)] for k, stage in enumerate(STAGES)}
+    started = perf_counter()
+    result = sweep.run(ranges)
+    assert len(result) == 10**4 and perf_counter() - started < 1
+    assert set(result.counts()) <= {"screened", "unchecked"} and result.passed.any()
+
+
+def test_only_passing_scenarios_are_solved_up_to_the_limit() -> None:
+    documents, dependencies, windows = project(1)
+    sweep = ScenarioSweep(documents, dependencies, windows, HOLIDAYS)
+    solved = []
+
+    def solve(scenario):
+        solved.append(scenario)
+        return {}
+
+    result = sweep.run(date_ranges(datetime.date(2023, 1, 2)), solve, limit=5)
+    assert len(solved) == 5 and all(sweep.screen({k: [v] for k, v in s.items()})[0] for s in solved)
+    assert result.counts()["solved"] == 5 and result.counts()["unchecked"] == result.passed.sum() - 5
+
+    cancel = threading.Event()
+    cancel.set()
+    assert "solved" not in sweep.run(date_ranges(datetime.date(2023, 1, 2)), solve, cancel=cancel).counts()
+
+
+def test_scenarios_cover_every_combination() -> None:
+    ranges = {"spec": ["2023-01-02"], "design": ["2023-01-09", "2023-01-10"], "impl": ["2023-01-16"] * 3}
+    grid = scenarios({**ranges, "end": ["2023-01-31"]})
+    assert all(len(days) == 6 for days in grid.values())
+    assert len(set(zip(*(grid[stage].tolist() for stage in STAGES)))) == 2
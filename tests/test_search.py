@@ -0,0 +1,54 @@
+import sys
+import time
+import tracemalloc
+from typing import List
+
+import pytest
+
+from csp import CSP, first_unassigned, forward_checking, mac, minimum_remaining_values, mrv_degree
+from map_coloring import MapColoringConstraint
+
+
+# A path of regions to two-colour; 3000 variables is deeper than the recursion limit.
+def chain(n: int) -> CSP[int, str]:
+    regions: List[int] = list(range(n))
+    problem: CSP[int, str] = CSP(regions, {region: ["r", "g"] for region in regions})
+    for region in regions[:-1]:
+        problem.add_constraint(MapColoringConstraint(region, region + 1))
+    return problem
+
+
+@pytest.mark.parametrize("select", [first_unassigned, minimum_remaining_values, mrv_degree])
+@pytest.mark.parametrize("inference", [None, forward_checking, mac])
+def test_deep_chain_is_solved_without_recursion(select, inference) -> None:
+    n = 3000
+    assert n > sys.getrecursionlimit()
+    problem = chain(n)
+    started = time.perf_counter()
+    solution = problem.backtracking_search(select_variable=select, inference=inference)
+    assert time.perf_counter() - started < 5
+    assert solution is not None and len(solution) == n
+    assert all(solution[region] != solution[region + 1] for region in range(n - 1))
+
+
+@pytest.mark.parametrize("inference", [None, forward_checking])
+def test_search_memory_grows_with_depth_only(inference) -> None:
+    n = 3000
+    problem = chain(n)
+    tracemalloc.start()
+    try:
+        problem.backtracking_search(inference=inference)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # One stack frame and a few small lists per assigned variable; no copies of the assignment.
+    assert peak < 1000 * n
+
+
+def test_search_leaves_the_model_untouched() -> None:
+    problem = chain(5)
+    domains = {region: list(values) for region, values in problem.domains.items()}
+    start = {0: "r"}
+    assert problem.backtracking_search(start, inference=forward_checking, arc_consistency=True) is not None
+    assert problem.domains == domains
+    assert start == {0: "r"}
@@ -0,0 +1,71 @@
+import datetime
+import random
+from typing import Dict, List, Tuple
+
+import pytest
+
+from compiled_csp import CompiledCSP
+from csp import CSP
+from date_generation import PublicationDependencyConstraint, date_range
+
+START = datetime.date(2023, 1, 2)
+DAY = datetime.timedelta(days=1)
+
+
+# Three stages between fixed documents, like the publication schedule: every document of a
+# stage comes after the fixed document opening it and, but for the last stage, before the
+# one closing it. Stage sizes and dependencies within a stage are random.
+def staged_model(seed: int, days: int = 5) -> Tuple[CSP[str, datetime.date], List[Tuple[str, str]]]:
+    rng = random.Random(seed)
+    fixed = {"spec": START, "design": START + 7 * DAY, "impl": START + 14 * DAY}
+    domains: Dict[str, List[datetime.date]] = {name: [day] for name, day in fixed.items()}
+    edges = [("spec", "design"), ("design", "impl")]
+    for opens, closes in [("spec", "design"), ("design", "impl"), ("impl", None)]:
+        names = [f"{opens} {k}" for k in range(rng.randint(2, 5))]
+        last = fixed[closes] - DAY if closes else fixed[opens] + days * DAY
+        for k, name in enumerate(names):
+            domains[name] = date_range(fixed[opens] + DAY, last, [])
+            edges.append((opens, name))
+            edges += [(before, name) for before in names[:k] if rng.random() < 0.4]
+            if closes:
+                edges.append((name, closes))
+    problem: CSP[str, datetime.date] = CSP(list(domains), domains)
+    for before, after in edges:
+        problem.add_constraint(PublicationDependencyConstraint(before, after))
+    return problem, edges
+
+
+def test_fixed_documents_cut_the_model_into_stages() -> None:
+    problem, _ = staged_model(1)
+    separators = problem.separators()
+    assert separators == ["spec", "design", "impl"]
+    assert len(problem.components()) == 1
+    groups = problem.components(separators=True)
+    assert groups[-1] == separators
+    for group in groups[:-1]:
+        (stage,) = {name.split()[0] for name in group if name not in separators}
+        closes = {"spec": "design", "design": "impl", "impl": "impl"}[stage]
+        assert [name for name in group if name in separators] == sorted({stage, closes}, key=separators.index)
+    staged = sorted(name for group in groups for name in group if name not in separators)
+    assert staged == sorted(name for name in problem.variables if name not in separators)
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("days", [1, 5])
+def test_stage_solutions_put_together_solve_the_model(seed, days) -> None:
+    problem, edges = staged_model(seed, days)
+    whole = CompiledCSP(problem).backtracking_search()
+    stitched = problem.solve_components(lambda part: CompiledCSP(part).backtracking_search())
+    assert (whole is None) == (stitched is None)
+    if stitched is not None:
+        assert list(stitched) == problem.variables
+        assert all(stitched[before] < stitched[after] for before, after in edges)
+
+
+def test_a_failing_stage_does_not_search_the_others_again() -> None:
+    problem, _ = staged_model(2, days=1)
+    problem.add_constraint(PublicationDependencyConstraint("impl 0", "impl 1"))
+    assert problem.backtracking_search() is None
+    whole = problem.stats.nodes
+    assert problem.solve_components(lambda part: part.backtracking_search()) is None
+    assert problem.stats.nodes * 10 < whole
@@ -0,0 +1,84 @@
+import datetime
+import random
+
+from csp import CSP
+from date_generation import PublicationDependencyConstraint
+from map_coloring import MapColoringConstraint, color_map
+from queens import queens_csp, solve_queens
+from solution_cache import SolutionCache
+
+
+def schedule(documents, edges) -> CSP[str, datetime.date]:
+    days = [datetime.date(2023, 1, day) for day in range(2, 9)]
+    problem: CSP[str, datetime.date] = CSP(list(documents), {document: list(days) for document in documents})
+    for before, after in edges:
+        problem.add_constraint(PublicationDependencyConstraint(before, after))
+    return problem
+
+
+def test_fingerprint_ignores_order_but_not_content() -> None:
+    documents = ["spec", "review", "plan", "approval"]
+    edges = [("spec", "review"), ("review", "plan"), ("plan", "approval")]
+    shuffled_documents, shuffled_edges = list(documents), list(edges)
+    random.Random(0).shuffle(shuffled_documents)
+    random.Random(1).shuffle(shuffled_edges)
+    fingerprint = schedule(documents, edges).fingerprint()
+    assert schedule(shuffled_documents, shuffled_edges).fingerprint() == fingerprint
+
+    reversed_domains = schedule(documents, edges)
+    for document in documents:
+        reversed_domains.set_domain(document, reversed_domains.domains[document][::-1])
+    assert reversed_domains.fingerprint() == fingerprint
+
+    assert schedule(documents, [("review", "spec"), *edges[1:]]).fingerprint() != fingerprint
+    narrowed = schedule(documents, edges)
+    narrowed.set_domain("spec", narrowed.domains["spec"][:2])
+    assert narrowed.fingerprint() != fingerprint
+    assert queens_csp(8).fingerprint() == queens_csp(8).fingerprint() != queens_csp(9).fingerprint()
+
+
+def test_memory_cache_evicts_the_least_recently_used() -> None:
+    cache: SolutionCache = SolutionCache(capacity=2)
+    cache.put("a", {"x": 1})
+    cache.put("b", None)
+    assert cache.get("a") == (True, {"x": 1})
+    cache.put("c", {"x": 3})
+    assert cache.get("b") == (False, None)
+    assert cache.get("a")[0] and cache.get("c")[0] and len(cache) == 2
+    found, solution = cache.get("a")
+    assert solution is not None
+    solution["x"] = 99
+    assert cache.get("a") == (True, {"x": 1})
+
+
+def test_disk_cache_outlives_the_memory_one(tmp_path) -> None:
+    problem = schedule(["spec", "review"], [("spec", "review")])
+    calls = []
+
+    def solve():
+        calls.append(1)
+        return problem.backtracking_search()
+
+    first = SolutionCache(capacity=1, directory=str(tmp_path), disk_capacity=2)
+    solution = first.cached(problem, solve)
+    assert solution is not None and first.cached(problem, solve) == solution
+    assert SolutionCache(directory=str(tmp_path)).cached(problem, solve) == solution
+    assert len(calls) == 1
+
+    for key in ["k1", "k2", "k3"]:
+        first.put(key, {})
+    assert len(list(tmp_path.glob("*.pickle"))) == 2
+
+
+def test_entry_points_consult_the_cache() -> None:
+    cache: SolutionCache = SolutionCache()
+    assert solve_queens(8, cache=cache) == solve_queens(8)
+    assert solve_queens(8, cache=cache) == solve_queens(8) and cache.hits == 1
+
+    triangle: CSP[str, str] = CSP(["A", "B", "C"], {region: ["r", "g"] for region in "ABC"})
+    for first, second in [("A", "B"), ("B", "C"), ("A", "C")]:
+        triangle.add_constraint(MapColoringConstraint(first, second))
+    assert color_map(triangle, "min_conflicts", seed=1, cache=cache) is None
+    assert cache.get(triangle.fingerprint()) == (False, None)
+    assert color_map(triangle, cache=cache) is None
+    assert cache.get(triangle.fingerprint()) == (True, None)
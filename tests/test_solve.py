@@ -0,0 +1,78 @@
+import threading
+import time
+from typing import Dict
+
+import pytest
+
+from compiled_csp import CompiledCSP
+from csp import CSP, forward_checking, mac, mrv_degree
+from map_coloring import MapColoringConstraint
+from queens import QueensConstraint, queens_csp
+
+
+# Twelve mutually adjacent regions and eleven colours: no solution, but neither arc
+# consistency nor forward checking sees that before trying every colouring of most regions.
+def pigeonhole() -> CSP[int, int]:
+    regions = list(range(12))
+    problem: CSP[int, int] = CSP(regions, {region: list(range(11)) for region in regions})
+    for first in regions:
+        for second in regions[first + 1 :]:
+            problem.add_constraint(MapColoringConstraint(first, second))  # type: ignore[arg-type]
+    return problem
+
+
+def consistent(problem: CSP, assignment: Dict) -> bool:
+    return all(problem.consistent(variable, assignment) for variable in assignment)
+
+
+@pytest.mark.parametrize("backjumping", [False, True])
+@pytest.mark.parametrize("inference", [forward_checking, mac])
+def test_timeout_returns_the_best_partial_assignment(inference, backjumping) -> None:
+    problem = pigeonhole()
+    started = time.perf_counter()
+    result = problem.solve(select_variable=mrv_degree, inference=inference, backjumping=backjumping, timeout=0.2)
+    assert time.perf_counter() - started < 1
+    assert result.status == "timeout" and not result.solved
+    assert len(result.assignment) >= 9 and consistent(problem, result.assignment)
+    assert result.stats is problem.stats and result.stats.nodes > 0
+
+
+def test_cancel_from_another_thread() -> None:
+    problem = pigeonhole()
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    result = problem.solve(inference=forward_checking, cancel=cancel, timeout=5)
+    assert result.status == "cancelled"
+    assert consistent(problem, result.assignment)
+
+
+def test_statuses_of_finished_searches() -> None:
+    result = queens_csp(8).solve(inference=forward_checking, timeout=5)
+    assert result.solved and QueensConstraint(list(range(1, 9))).satisfied(result.assignment)
+
+    triangle: CSP[str, str] = CSP(["A", "B", "C"], {region: ["r", "g"] for region in "ABC"})
+    for first, second in [("A", "B"), ("B", "C"), ("A", "C")]:
+        triangle.add_constraint(MapColoringConstraint(first, second))
+    result = triangle.solve(timeout=5)
+    assert result.status == "infeasible" and len(result.assignment) == 2
+
+
+def test_compiled_solver_stops_too() -> None:
+    problem = pigeonhole()
+    compiled = CompiledCSP(problem)
+    cancel = threading.Event()
+    result = compiled.solve(timeout=0.2, cancel=cancel)
+    assert result.status == "timeout" and len(result.assignment) >= 9
+    assert consistent(problem, result.assignment)
+    cancel.set()
+    assert compiled.solve(cancel=cancel).status == "cancelled"
+    assert compiled.count_solutions(timeout=0.1) == 0 and compiled.stop.reason == "timeout"
+    assert CompiledCSP(queens_csp(6)).solve(timeout=5).solved
+
+
+def test_time_spent_holding_a_solution_is_not_charged() -> None:
+    problem = queens_csp(6)
+    solutions = problem.iter_solutions(timeout=0.2)
+    first = next(solutions)
+    time.sleep(0.3)
+    assert len([first, *solutions]) == 4
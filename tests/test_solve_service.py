@@ -0,0 +1,83 @@
+import threading
+from typing import List
+
+import pytest
+
+from queens import queens_csp
+from solve_service import SolveService
+
+
+def test_jobs_are_served_round_robin_across_users() -> None:
+    service = SolveService(workers=1, per_user=3)
+    gate = threading.Event()
+    order: List[str] = []
+    try:
+        blocker = service.submit("other", "blocker", lambda job: gate.wait(5))
+        for key in ["a1", "a2", "a3"]:
+            service.submit("a", key, lambda job: order.append(job.key))
+        for key in ["b1", "b2"]:
+            service.submit("b", key, lambda job: order.append(job.key))
+        assert service.queued() >= 5
+        gate.set()
+        for key in ["a1", "a2", "a3", "b1", "b2"]:
+            assert service.jobs[key].wait(5)
+        assert blocker.status == "done" and blocker.result is True
+        assert order == ["a1", "b1", "a2", "b2", "a3"]
+    finally:
+        gate.set()
+        service.close()
+
+
+def test_per_user_limit_and_shared_keys() -> None:
+    service = SolveService(workers=1, per_user=1)
+    gate = threading.Event()
+    try:
+        first = service.submit("a", "model", lambda job: gate.wait(5))
+        assert service.submit("b", "model", lambda job: None) is first
+        with pytest.raises(RuntimeError):
+            service.submit("a", "other model", lambda job: None)
+        second = service.submit("b", "other model", lambda job: 42)
+        gate.set()
+        assert second.wait(5) and second.result == 42
+        assert service.submit("a", "other model", lambda job: 0) is second
+        assert service.submit("a", "other model", lambda job: 0, refresh=True) is not second
+    finally:
+        gate.set()
+        service.close()
+
+
+def test_cancelled_and_failing_jobs() -> None:
+    service = SolveService(workers=1, per_user=2)
+    gate = threading.Event()
+    try:
+        service.submit("a", "blocker", lambda job: gate.wait(5))
+        cancelled = service.submit("a", "queued", lambda job: "ran")
+        cancelled.cancel.set()
+        assert service.active("a") == 1
+        failing = service.submit("a", "failing", lambda job: 1 / 0)
+        gate.set()
+        assert cancelled.wait(5) and cancelled.status == "cancelled" and cancelled.result is None
+        assert failing.wait(5) and failing.status == "failed" and isinstance(failing.error, ZeroDivisionError)
+        assert service.submit("a", "failing", lambda job: "again").wait(5)
+    finally:
+        gate.set()
+        service.close()
+
+
+def test_progress_comes_from_the_watched_solver() -> None:
+    service = SolveService(workers=2)
+    seen = threading.Event()
+    problem = queens_csp(8)
+
+    def solve(job):
+        job.watch(problem)
+        problem.add_hook(lambda event, variable, value: seen.set())
+        return problem.backtracking_search()
+
+    try:
+        job = service.submit("a", "queens", solve)
+        assert job.wait(5) and job.result is not None
+        assert seen.is_set() and job.progress()["nodes"] == problem.stats.nodes > 0
+        assert job.elapsed() > 0
+    finally:
+        service.close()
@@ -0,0 +1,80 @@
+from collections import Counter
+from typing import Dict
+
+from compiled_csp import CompiledCSP
+from csp import CSP, Constraint, forward_checking, least_constraining_value
+from map_coloring import MapColoringConstraint
+from queens import queens_csp
+
+
+class NotRed(Constraint[str, str]):
+    def satisfied(self, assignment: Dict[str, str]) -> bool:
+        return all(assignment.get(variable) != "r" for variable in self.variables)
+
+
+def australia() -> CSP[str, str]:
+    regions = ["WA", "NO", "SA", "QL", "NSW", "VIC", "TM"]
+    problem: CSP[str, str] = CSP(regions, {region: ["r", "g", "b"] for region in regions})
+    for first, second in [("WA", "NO"), ("WA", "SA"), ("SA", "NO"), ("QL", "NO"), ("QL", "SA"), ("QL", "NSW")]:
+        problem.add_constraint(MapColoringConstraint(first, second))
+    for first, second in [("NSW", "SA"), ("VIC", "SA"), ("VIC", "NSW"), ("VIC", "TM")]:
+        problem.add_constraint(MapColoringConstraint(first, second))
+    problem.add_constraint(NotRed(["SA"]))
+    return problem
+
+
+def test_search_counters() -> None:
+    problem = queens_csp(6)
+    assert problem.backtracking_search() is not None
+    stats = problem.stats
+    assert stats.solutions == 1 and stats.nodes > 6 and stats.backtracks > 0
+    assert stats.elapsed > 0
+    assert [name for name, _, _ in stats.by_constraint()] == ["QueensConstraint"]
+    assert stats.by_constraint()[0][1] == stats.checks
+
+    assert problem.count_solutions(inference=forward_checking) == 4
+    assert problem.stats.solutions == 4 and problem.stats is not stats
+
+
+def test_checks_are_broken_down_by_constraint_class() -> None:
+    problem = australia()
+    solution = problem.backtracking_search(order_values=least_constraining_value)
+    assert solution is not None and solution["SA"] != "r"
+    counts = {name: checks for name, checks, _ in problem.stats.by_constraint()}
+    assert set(counts) == {"MapColoringConstraint", "NotRed"}
+    assert sum(counts.values()) == problem.stats.checks
+    assert all(seconds >= 0 for _, _, seconds in problem.stats.by_constraint())
+
+
+def test_hooks_see_every_event() -> None:
+    problem = queens_csp(6)
+    events: Counter = Counter()
+    problem.add_hook(lambda event, variable, value: events.update([event]))
+    problem.backtracking_search(inference=forward_checking)
+    assert events["node"] == problem.stats.nodes
+    assert events["backtrack"] == problem.stats.backtracks
+    assert events["solution"] == 1 and events["prune"] > 0
+
+
+def test_iterator_stats_grow_as_pages_are_pulled() -> None:
+    problem = queens_csp(6)
+    solutions = problem.iter_solutions()
+    stats = problem.stats
+    assert stats.solutions == 0
+    next(solutions)
+    first = stats.nodes
+    next(solutions)
+    assert stats.solutions == 2 and stats.nodes > first
+
+
+def test_compiled_and_local_search_stats() -> None:
+    problem = australia()
+    compiled = CompiledCSP(problem)
+    assert compiled.backtracking_search() is not None
+    assert compiled.stats.nodes >= 7 and compiled.stats.solutions == 1
+    tables = {name: checks for name, checks, _ in compiled.compile_stats.by_constraint()}
+    assert tables == {"MapColoringConstraint": 10 * 9, "NotRed": 3}
+
+    large = queens_csp(40)
+    assert large.min_conflicts(seed=1) is not None
+    assert large.stats.solutions == 1 and large.stats.checks > 0 and large.stats.elapsed > 0
@@ -0,0 +1,122 @@
+import datetime
+import random
+from time import perf_counter
+
+import pytest
+
+from business_calendar import business_calendar
+from csp import CSP
+from date_generation import PublicationDependencyConstraint, date_range
+from temporal_network import schedule_dependencies
+
+MONDAY = datetime.date(2023, 1, 2)
+
+
+def day(offset: int) -> datetime.date:
+    return MONDAY + datetime.timedelta(days=offset)
+
+
+def random_instance(rng: random.Random, documents: int):
+    names = [f"문서 {k}" for k in range(documents)]
+    edges = [(names[before], names[k]) for k in range(1, documents) for before in range(k) if rng.random() < 0.3]
+    windows = {}
+    for name in names:
+        start = day(rng.randrange(10))
+        windows[name] = (start, start) if rng.random() < 0.2 else (start, start + datetime.timedelta(rng.randrange(12)))
+    return names, edges, windows
+
+
+def test_earliest_and_latest_bound_every_csp_solution() -> None:
+    rng = random.Random(4)
+    holidays = [day(3)]
+    for _ in range(40):
+        names, edges, windows = random_instance(rng, 5)
+        domains = {}
+        for name, (start, end) in windows.items():
+            domains[name] = [start] if start == end else date_range(start, end, holidays)
+        problem: CSP[str, datetime.date] = CSP(names, domains)
+        for before, after in edges:
+            problem.add_constraint(PublicationDependencyConstraint(before, after))
+        solutions = list(problem.iter_solutions())
+
+        timeline = schedule_dependencies(names, edges, windows, holidays)
+        assert timeline.feasible == bool(solutions)
+        if solutions:
+            assert timeline.earliest == {name: min(s[name] for s in solutions) for name in names}
+            assert timeline.latest == {name: max(s[name] for s in solutions) for name in names}
+            assert timeline.earliest in solutions and timeline.latest in solutions
+
+
+def test_lags_count_business_days() -> None:
+    windows = {"A": (day(4), day(4)), "B": (day(0), day(30)), "C": (day(0), day(30))}
+    timeline = schedule_dependencies(["A", "B", "C"], [("A", "B", 3), ("B", "C")], windows, [day(7)])
+    # Friday, then three business days on with Monday a holiday, then the next one
+    assert timeline.earliest == {"A": day(4), "B": day(10), "C": day(11)}
+    assert timeline.latest["C"] == day(30) and timeline.latest["B"] == day(29)
+    assert timeline.slack() == {"A": 0, "B": 13, "C": 13}
+
+
+def test_weekend_fixed_dates_sit_between_business_days() -> None:
+    windows = {"A": (day(0), day(14)), "명세서": (day(6), day(6)), "B": (day(0), day(14))}
+    timeline = schedule_dependencies(["A", "명세서", "B"], [("A", "명세서"), ("명세서", "B")], windows)
+    assert timeline.feasible
+    assert timeline.earliest == {"A": day(0), "명세서": day(6), "B": day(7)}
+    assert timeline.latest["A"] == day(4)
+
+
+def test_weekend_fixed_predecessor_keeps_its_day() -> None:
+    windows = {"A": (day(5), day(5)), "B": (day(7), day(7))}
+    timeline = schedule_dependencies(["A", "B"], [("A", "B")], windows)
+    assert timeline.feasible
+    assert timeline.earliest == timeline.latest == {"A": day(5), "B": day(7)}
+    assert timeline.slack() == {"A": 0, "B": 0}
+
+
+def test_reports_the_chain_that_overruns_a_window() -> None:
+    windows = {
+        "요구사항 명세서": (day(2), day(2)),
+        "검증보고서": (day(0), day(4)),
+        "시험 계획서": (day(0), day(4)),
+        "여유 문서": (day(0), day(30)),
+    }
+    dependencies = [
+        ("요구사항 명세서", "검증보고서"),
+        ("검증보고서", "시험 계획서"),
+        ("요구사항 명세서", "여유 문서"),
+    ]
+    timeline = schedule_dependencies(list(windows), dependencies, windows, [day(3)])
+    assert not timeline.feasible and timeline.reason == "window"
+    assert timeline.chain == ["요구사항 명세서", "검증보고서", "시험 계획서"]
+
+
+def test_reports_a_dependency_cycle() -> None:
+    windows = {name: (day(0), day(10)) for name in "ABCD"}
+    timeline = schedule_dependencies(list("ABCD"), [("A", "B"), ("B", "C"), ("C", "B"), ("C", "D")], windows)
+    assert timeline.reason == "cycle" and timeline.chain == ["B", "C", "B"]
+
+
+def test_given_order_matches_own_order() -> None:
+    names, edges, windows = random_instance(random.Random(8), 30)
+    own = schedule_dependencies(names, edges, windows)
+    given = schedule_dependencies(names, edges, windows, order=names)
+    assert (own.earliest, own.latest, own.reason) == (given.earliest, given.latest, given.reason)
+
+
+def test_unknown_documents_are_rejected() -> None:
+    with pytest.raises(LookupError):
+        schedule_dependencies(["A"], [], {})
+    with pytest.raises(LookupError):
+        schedule_dependencies(["A"], [("A", "B")], {"A": (day(0), day(1))})
+
+
+def test_large_chain_in_one_pass() -> None:
+    documents = 20000
+    names = [f"문서 {k}" for k in range(documents)]
+    edges = [(names[k - 1], names[k]) for k in range(1, documents)]
+    end = business_calendar().add(MONDAY, documents)
+    windows = {name: (MONDAY, end) for name in names}
+    started = perf_counter()
+    timeline = schedule_dependencies(names, edges, windows)
+    assert perf_counter() - started < 2
+    assert timeline.feasible and timeline.earliest[names[-1]] == business_calendar().add(MONDAY, documents - 1)
+    assert timeline.latest[names[0]] == business_calendar().add(MONDAY, 1)